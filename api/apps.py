@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from . import signals  # noqa: F401
+        from .sweeper import start_scheduler
+
+        request_started.connect(start_scheduler, dispatch_uid="api.sweeper")
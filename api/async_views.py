@@ -0,0 +1,237 @@
+# api/async_views.py
+"""
+Native async versions of the read-heavy list endpoints.
+
+Under ASGI (``uvicorn shramo.asgi:application``, opt-in with ``DB_POOL=1``,
+see settings.py) these run on the event loop
+and only hand the query itself to a thread through the async ORM
+(``afirst``/``aiterator``), so a request waiting on Postgres no longer holds
+a whole worker. They take the same query parameters and return the same
+``{"next", "results"}`` pages as the DRF actions they mirror, ``?fields=`` and
+``?expand=`` included. Serialization is unchanged: every relation the
+serializers touch is select/prefetch related, so it never reaches the database.
+
+Under WSGI they still work, Django just runs them in a per-request event loop.
+The event stream is the exception: WSGI buffers a streaming async response
+whole, so WSGI clients should use the long-poll endpoint instead.
+"""
+import json
+import math
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from . import conditional, events, feed, geo, sparse
+from .middleware import serializing
+from .models import Worker, Job, JobApplication, Booking
+from .pagination import KeysetPagination
+from .serializers import WorkerSerializer, JobFeedSerializer, BookingSerializer
+from .skills import normalize_skill, parse_skills
+from .views import BookingViewSet
+
+
+def error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+async def paginated(request, queryset, serializer_class, ordering, expandable=None):
+    paginator = KeysetPagination()
+    request = Request(request)  # query_params and absolute URIs for the next link
+    context = {"request": request}
+    serializer = serializer_class(context=context)
+    queryset = sparse.restrict(queryset, serializer, expandable or {})
+    columns = sparse.flat_columns(serializer, queryset)
+    if columns is not None:
+        queryset = sparse.values(queryset, columns, ordering)
+    else:
+        queryset = sparse.keep_columns(queryset, [field.lstrip("-") for field in ordering])
+    try:
+        page = await paginator.apaginate_queryset(queryset, request, ordering=ordering)
+    except NotFound as exc:
+        return error(str(exc.detail), status=404)
+    if columns is not None:
+        with serializing():
+            results = sparse.render(page, columns)
+    else:
+        results = serializer_class(page, many=True, context=context).data
+    return JsonResponse(paginator.get_paginated_data(results), encoder=DjangoJSONEncoder)
+
+
+async def conditional_paginated(request, state, queryset, serializer_class, ordering, expandable=None):
+    """``paginated``, or 304 while ``state`` is what the client last saw (see api/conditional.py)."""
+    etag, last_modified = conditional.validators(request, state)
+    response = conditional.not_modified(request, etag, last_modified)
+    if response is None:
+        response = await paginated(request, queryset, serializer_class, ordering, expandable)
+        response = conditional.with_validators(response, etag, last_modified)
+    return response
+
+
+# ✅ Worker search: ?skills=a,b&match=any|all, same as /api/workers/
+@require_GET
+async def workers(request):
+    queryset = Worker.objects.all()
+    skills = parse_skills(request.GET.get("skills"))
+    if skills:
+        queryset = queryset.with_skills(skills, match="all" if request.GET.get("match") == "all" else "any")
+    return await paginated(request, queryset, WorkerSerializer, ("phone",))
+
+
+# ✅ Workers near a point, nearest first (?sort=rating for best rated), same as /api/workers/nearby/
+@require_GET
+async def workers_nearby(request):
+    lat = geo.parse_coordinate(request.GET.get("lat"), 90)
+    lon = geo.parse_coordinate(request.GET.get("lon"), 180)
+    if lat is None or lon is None:
+        return error("valid lat and lon required")
+    radius_km = geo.parse_radius(request.GET.get("radius_km"))
+    if radius_km is None:
+        return error("radius_km must be a number")
+
+    queryset = Worker.objects.near(lat, lon, radius_km)
+    skill = normalize_skill(request.GET.get("skill"))
+    if skill:
+        queryset = queryset.with_skills([skill])
+    ordering = ("-rating_score", "phone") if request.GET.get("sort") == "rating" else ("distance_km", "phone")
+    return await paginated(request, queryset, WorkerSerializer, ordering)
+
+
+# ✅ Worker's job feed, same as /api/jobs/feed/
+@require_GET
+async def job_feed(request):
+    worker_phone = request.GET.get("worker_phone")
+    if not worker_phone:
+        return error("worker_phone required")
+    worker = await Worker.objects.filter(phone=worker_phone).afirst()
+    if worker is None:
+        return error("Worker not found", status=404)
+
+    applied = JobApplication.objects.filter(job=OuterRef("pk"), worker_phone=worker_phone)
+    jobs = Job.objects.filter(status="open", work_date__gte=timezone.localdate()).filter(~Exists(applied))
+    jobs = feed.rank_jobs_for_worker(jobs, worker)
+    return await paginated(request, jobs, JobFeedSerializer, ("-feed_score", "-id"))
+
+
+def _bookings():
+    return Booking.objects.select_related("employer_phone", "worker_phone")
+
+
+# ✅ Same as /api/bookings/my_bookings/
+@require_GET
+async def my_bookings(request):
+    employer_phone = request.GET.get("employer_phone")
+    if not employer_phone:
+        return error("employer_phone required")
+    bookings = _bookings().filter(employer_phone=employer_phone)
+    state = await sync_to_async(conditional.booking_state)(employer_phone=employer_phone)
+    return await conditional_paginated(
+        request, state, bookings, BookingSerializer, ("-created_at", "-id"), BookingViewSet.expandable
+    )
+
+
+# ✅ Same as /api/bookings/worker_bookings/
+@require_GET
+async def worker_bookings(request):
+    worker_phone = request.GET.get("worker_phone")
+    if not worker_phone:
+        return error("worker_phone required")
+    bookings = _bookings().filter(worker_phone=worker_phone)
+    state = await sync_to_async(conditional.booking_state)(worker_phone=worker_phone)
+    return await conditional_paginated(
+        request, state, bookings, BookingSerializer, ("-created_at", "-id"), BookingViewSet.expandable
+    )
+
+
+# -- change feed ---------------------------------------------------------------
+
+LONG_POLL_TIMEOUT = 25
+MAX_LONG_POLL_TIMEOUT = 55
+
+
+async def _feed_position(request):
+    """``(phone, last_event_id)`` from the query string / ``Last-Event-ID`` header, or an error response."""
+    phone = request.GET.get("phone")
+    if not phone:
+        return None, error("phone required")
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if last_id in (None, ""):
+        return (phone, await events.latest_id(phone)), None
+    try:
+        return (phone, int(last_id)), None
+    except ValueError:
+        return None, error("last_event_id must be an integer")
+
+
+# ✅ Server-Sent Events: application and booking changes for ?phone= (worker or employer) as they commit
+@require_GET
+async def event_stream(request):
+    position, response = await _feed_position(request)
+    if response is not None:
+        return response
+    phone, last_id = position
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT_SECONDS", 15)
+    # streams are recycled so they never outlive proxy timeouts; EventSource reconnects with Last-Event-ID
+    deadline = time.monotonic() + getattr(settings, "EVENTS_STREAM_SECONDS", 300)
+
+    async def stream(last_id):
+        yield "retry: 3000\n\n"
+        with events.broker().subscribe([phone]) as subscription:
+            while True:
+                batch = await events.after(phone, last_id)
+                for event in batch:
+                    last_id = event["id"]
+                    payload = json.dumps(event, cls=DjangoJSONEncoder)
+                    yield f"id: {last_id}\nevent: {event['kind']}\ndata: {payload}\n\n"
+                if len(batch) == events.BATCH_SIZE:
+                    continue  # more already waiting
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if not await subscription.wait(min(heartbeat, remaining)):
+                    yield ": keepalive\n\n"  # also picks up events committed by other processes
+
+    response = StreamingHttpResponse(stream(last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ✅ Long-poll fallback: returns as soon as there is an event after ?last_event_id, or empty after ?timeout seconds
+@require_GET
+async def event_poll(request):
+    position, response = await _feed_position(request)
+    if response is not None:
+        return response
+    phone, last_id = position
+    try:
+        timeout = float(request.GET.get("timeout", LONG_POLL_TIMEOUT))
+    except ValueError:
+        return error("timeout must be a number")
+    if not math.isfinite(timeout):  # a nan deadline would never pass
+        return error("timeout must be a number")
+    timeout = min(max(timeout, 0.0), MAX_LONG_POLL_TIMEOUT)
+
+    with events.broker().subscribe([phone]) as subscription:
+        found = await events.after(phone, last_id)
+        deadline = time.monotonic() + timeout
+        while not found:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # woken by this process's commits; the heartbeat re-read catches other processes'
+            await subscription.wait(min(getattr(settings, "EVENTS_HEARTBEAT_SECONDS", 15), remaining))
+            found = await events.after(phone, last_id)
+
+    return JsonResponse(
+        {"last_event_id": found[-1]["id"] if found else last_id, "events": found},
+        encoder=DjangoJSONEncoder,
+    )
@@ -0,0 +1,94 @@
+# api/availability.py
+"""
+Worker calendars.
+
+``WorkerOccupancy`` holds one row per worker and busy day: the work date of
+a confirmed job application, the day of an accepted booking (its
+``work_date``, or the day it was accepted when it has none) and the days off
+a worker blocks out. Confirming work writes the row and completing it
+deletes it. The ``(date, worker)`` unique index refuses a second commitment
+on the same day and answers "free on D" as an indexed anti-join
+(``Worker.objects.free_on(day)``), so a worker booked for Tuesday is still
+found for Wednesday.
+
+``Worker.is_available`` remains as a cached "free today", for the ranking
+index, the old filters and clients. It is written here whenever a row for
+today comes or goes, and by ``api/sweeper.py`` as the days roll over (and
+after rows went with a deleted application or booking).
+"""
+from django.db import IntegrityError
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from . import cache, matching
+from .models import Worker, WorkerOccupancy
+
+
+class Busy(Exception):
+    def __init__(self, day):
+        super().__init__(f"Worker is already busy on {day.isoformat()}")
+        self.day = day
+
+
+def occupy(phone, day, kind, **source):
+    """Put ``day`` in the worker's calendar for an ``application_id=`` or ``booking_id=``.
+
+    Runs inside the caller's transaction and raises ``Busy`` when the day is
+    taken; the caller must let it roll the transaction back.
+    """
+    try:
+        WorkerOccupancy.objects.create(worker_id=phone, date=day, kind=kind, **source)
+    except IntegrityError:
+        raise Busy(day)
+    if day == timezone.localdate():
+        _today(phone, available=False)
+
+
+def release(**source):
+    """Free the day held by an ``application_id=`` or ``booking_id=``."""
+    rows = WorkerOccupancy.objects.filter(**source)
+    freed_today = list(rows.filter(date=timezone.localdate()).values_list("worker", flat=True))
+    rows.delete()
+    for phone in freed_today:
+        _today(phone, available=True)
+
+
+def set_days_off(phone, days, off=True):
+    """Block out (or free again) ``days``; days already taken by work are left as they are."""
+    if off:
+        WorkerOccupancy.objects.bulk_create(
+            [WorkerOccupancy(worker_id=phone, date=day, kind="off") for day in days], ignore_conflicts=True
+        )
+    else:
+        WorkerOccupancy.objects.filter(worker=phone, kind="off", date__in=days).delete()
+    if timezone.localdate() in days:
+        refresh([phone])
+
+
+def calendar(phone, start, end):
+    """The worker's busy days from ``start`` to ``end`` inclusive."""
+    return list(
+        WorkerOccupancy.objects.filter(worker=phone, date__range=(start, end))
+        .order_by("date")
+        .values("date", "kind", "application", "booking")
+    )
+
+
+def stale(today=None):
+    """Workers whose ``is_available`` does not match their calendar for ``today``."""
+    busy = WorkerOccupancy.objects.filter(worker=OuterRef("pk"), date=today or timezone.localdate())
+    return Worker.objects.annotate(busy=Exists(busy)).filter(is_available=F("busy"))
+
+
+def refresh(phones, today=None):
+    """Rewrite ``is_available`` from the calendar for these workers; returns the phones that changed."""
+    changed = list(stale(today).filter(phone__in=phones).values_list("phone", "busy"))
+    for phone, busy in changed:
+        _today(phone, available=not busy)
+    return [phone for phone, _ in changed]
+
+
+def _today(phone, available):
+    Worker.objects.filter(phone=phone).update(is_available=available, updated_at=timezone.now())
+    matching.workers_changed([phone])
+    cache.invalidate_worker(phone)
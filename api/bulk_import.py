@@ -0,0 +1,187 @@
+# api/bulk_import.py
+"""
+Streaming bulk import of workers and jobs.
+
+The request body (NDJSON, or CSV with a header row) is read line by line,
+validated in chunks with the import serializers and written with one
+``bulk_create`` per chunk, so memory stays bounded by the chunk size no matter
+how large the upload is.
+"""
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import cache, geo, matching, pincodes
+from .models import Worker, Employer, Job
+from .serializers import WorkerImportSerializer, JobImportSerializer
+from .skills import sync_worker_skills
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000  # errors past this are counted but not listed
+
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class UnsupportedFormat(Exception):
+    pass
+
+
+def read_records(request):
+    """Yield ``(line_number, dict)`` per row, or ``(line_number, error_message)`` for unparseable rows."""
+    content_type = (request.content_type or "").split(";")[0].strip().lower()
+    stream = request.stream
+    if stream is None:
+        return iter(())
+    if content_type in CSV_TYPES:
+        return _csv_records(stream)
+    if content_type in NDJSON_TYPES:
+        return _ndjson_records(stream)
+    raise UnsupportedFormat(f"Content-Type must be one of {', '.join(CSV_TYPES + NDJSON_TYPES)}")
+
+
+def _ndjson_records(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Each line must be a JSON object"
+
+
+def _csv_records(stream):
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8"))
+    for record in reader:
+        # empty cells mean "not given" so optional fields fall back to their defaults
+        yield reader.line_num, {key: value for key, value in record.items() if key and value not in ("", None)}
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkImporter:
+    serializer_class = None
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, records):
+        for chunk in _chunks(records, self.chunk_size):
+            self.import_chunk(chunk)
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
+
+    def error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def import_chunk(self, chunk):
+        # one serializer per chunk: building a ModelSerializer's fields costs
+        # far more than validating a row with them
+        serializer = self.serializer_class()
+        valid = []
+        for line, record in chunk:
+            self.rows += 1
+            if isinstance(record, str):
+                self.error(line, {"non_field_errors": [record]})
+                continue
+            try:
+                valid.append((line, serializer.run_validation(record)))
+            except ValidationError as exc:
+                self.error(line, exc.detail)
+
+        valid = self.check(valid)
+        if valid:
+            with transaction.atomic():
+                self.save([data for _, data in valid])
+            self.imported += len(valid)
+
+    def check(self, valid):
+        """Cross-row checks that need the database, done once per chunk."""
+        return valid
+
+    def save(self, rows):
+        raise NotImplementedError
+
+
+class WorkerImporter(BulkImporter):
+    """Upserts workers on ``phone``; only the columns present in a row are overwritten."""
+    serializer_class = WorkerImportSerializer
+
+    def save(self, rows):
+        # the last row wins when a phone repeats inside one chunk
+        latest = {data["phone"]: data for data in rows}
+        groups = {}
+        for data in latest.values():
+            groups.setdefault(frozenset(data), []).append(data)
+
+        phones = []
+        with_skills = []
+        for columns, group in groups.items():
+            batch = [Worker(**data) for data in group]
+            for worker in batch:
+                worker.geo_cell = geo.cell_for(worker.latitude, worker.longitude)
+            update_fields = set(columns) - {"phone"}
+            if columns & {"latitude", "longitude"}:
+                update_fields.add("geo_cell")
+            if update_fields:
+                update_fields.add("updated_at")
+                Worker.objects.bulk_create(
+                    batch, update_conflicts=True, unique_fields=["phone"], update_fields=sorted(update_fields)
+                )
+            else:
+                Worker.objects.bulk_create(batch, ignore_conflicts=True)
+            phones.extend(worker.phone for worker in batch)
+            if "skills" in columns:
+                with_skills.extend(batch)
+
+        sync_worker_skills(with_skills)
+        matching.workers_changed(phones)
+        cache.invalidate_workers(phones)
+        # after the upsert, so a row without coordinates never overwrites the ones already stored
+        pincodes.backfill(Worker.objects.filter(phone__in=phones))
+
+
+class JobImporter(BulkImporter):
+    serializer_class = JobImportSerializer
+
+    def check(self, valid):
+        phones = {data["employer_phone"] for _, data in valid}
+        known = set(Employer.objects.filter(phone__in=phones).values_list("phone", flat=True))
+        checked = []
+        for line, data in valid:
+            if data["employer_phone"] in known:
+                checked.append((line, data))
+            else:
+                self.error(line, {"employer_phone": [f"Employer {data['employer_phone']} does not exist."]})
+        return checked
+
+    def save(self, rows):
+        jobs = []
+        for data in rows:
+            data = dict(data)
+            jobs.append(Job(employer_phone_id=data.pop("employer_phone"), **data))
+        Job.objects.bulk_create(jobs)
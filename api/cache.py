@@ -0,0 +1,159 @@
+# api/cache.py
+"""
+Read-through cache for serialized detail payloads.
+
+Payloads live under ``api:p:<model>:<pk>:<version>``, plus a hash of the
+``?fields=``/``?expand=`` variant for sparse requests. Invalidation never
+deletes anything; it bumps the row's version key so every process (and every
+variant) moves on to a fresh key at once, and stale payloads simply age out.
+New version keys start from a nanosecond timestamp so a version key that got
+evicted can never point back at an old payload.
+
+Backend is any Django cache, selected with ``API_CACHE_ALIAS``. With more than
+one web process it must be a shared one (Redis, Memcached): the default
+LocMemCache is per process, so a version bumped by the process that served
+a write never reaches the others and they keep serving the stale payload.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from . import conditional
+from .sparse import Spec
+
+TIMEOUT = getattr(settings, "API_CACHE_TIMEOUT", 300)
+
+
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+counters = Counters()
+
+
+def _cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _version_key(label, pk):
+    return f"api:v:{label}:{pk}"
+
+
+def version(model, pk):
+    """Current version of ``model``/``pk``; it changes whenever the row is invalidated."""
+    cache = _cache()
+    version_key = _version_key(_label(model), pk)
+    current = cache.get(version_key)
+    if current is None:
+        cache.add(version_key, time.time_ns(), None)
+        current = cache.get(version_key)
+    return current
+
+
+def get_or_build(model, pk, build, variant=None):
+    """Return the cached payload for ``model``/``pk``, calling ``build()`` and storing it on a miss.
+
+    ``variant`` tells apart payloads of the same row serialized differently.
+    """
+    cache = _cache()
+    payload_key = f"api:p:{_label(model)}:{pk}:{version(model, pk)}"
+    if variant:
+        payload_key += ":" + hashlib.sha1(variant.encode()).hexdigest()[:16]
+    payload = cache.get(payload_key)
+    counters.add(payload is not None)
+    if payload is None:
+        payload = build()
+        cache.set(payload_key, payload, TIMEOUT)
+    return payload
+
+
+def invalidate(model, pks):
+    """Bump the version of each row once the current transaction commits."""
+    label = _label(model)
+    keys = [_version_key(label, pk) for pk in set(pks)]
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_worker(phone):
+    """A worker's payload, plus every job payload that embeds it through an application."""
+    invalidate_workers([phone])
+
+
+def invalidate_workers(phones):
+    """``invalidate_worker`` for many workers, with one query for all their jobs."""
+    from .models import Worker, Job, JobApplication
+
+    invalidate(Worker, phones)
+    invalidate(Job, JobApplication.objects.filter(worker_phone__in=phones).values_list("job_id", flat=True))
+
+
+def _bump(keys):
+    cache = _cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass  # nothing cached under this row yet
+
+
+class CachedRetrieveMixin:
+    """``retrieve`` served from the payload cache; invalidation lives in ``api/signals.py``.
+
+    The row's version doubles as its ETag, so a client revalidating an
+    unchanged row gets a 304 from one cache read, without touching the database.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        lookup = self.lookup_value(model)
+        spec = Spec.from_request(request)
+        variant = spec.key() if spec else None
+
+        def build():
+            return self.get_serializer(self.get_object()).data
+
+        def respond():
+            return Response(get_or_build(model, lookup, build, variant=variant))
+
+        etag = conditional.etag(request, _label(model), lookup, version(model, lookup))
+        return conditional.respond(request, respond, etag=etag)
+
+    def lookup_value(self, model):
+        """The URL's lookup as the row's key is stored ("05" -> 5), so it names the key invalidation bumps."""
+        meta = model._meta
+        field = meta.pk if self.lookup_field == "pk" else meta.get_field(self.lookup_field)
+        try:
+            return field.to_python(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValidationError:
+            raise NotFound()
@@ -0,0 +1,97 @@
+# api/conditional.py
+"""
+Conditional GET: ``ETag``/``Last-Modified`` validators worked out before the
+response itself, so a client polling an unchanged resource gets
+``304 Not Modified`` without the main query running or anything being
+serialized.
+
+Detail endpoints use the row version of the payload cache (api/cache.py).
+Lists use a small aggregate over the rows they page through (``job_state``,
+``booking_state``): row counts and the latest ``updated_at`` of the rows and
+of everything their serializer embeds, plus the latest tombstone, since a
+deleted row leaves no ``updated_at`` behind. It covers the whole filtered set;
+the ETag also hashes the full URL (cursor, page size, ``?fields=``...), so every
+page and variant validates separately.
+
+``Last-Modified`` has one-second resolution; clients should revalidate with
+``If-None-Match``, which Django checks in preference to ``If-Modified-Since``.
+"""
+import datetime
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Job, Booking, Tombstone
+
+
+def etag(request, *state):
+    """Strong ETag for this URL and response format over ``state``."""
+    renderer = getattr(request, "accepted_renderer", None)  # DRF views only
+    parts = [request.get_full_path(), renderer.format if renderer else "", *map(str, state)]
+    return '"{}"'.format(hashlib.sha1("|".join(parts).encode()).hexdigest())
+
+
+def validators(request, state):
+    """``(etag, last_modified)`` for a list whose rows are summarised by ``state``."""
+    last_modified = max((value for value in state.values() if isinstance(value, datetime.datetime)), default=None)
+    return etag(request, *(f"{key}={value}" for key, value in sorted(state.items()))), last_modified
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """A 304 (or 412) when the request's validators still match, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag=None, last_modified=None):
+    if response.status_code in (200, 304):
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(_timestamp(last_modified))
+    return response
+
+
+def respond(request, build, etag=None, last_modified=None):
+    """``not_modified``, or ``build()``'s response carrying the validators."""
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = with_validators(build(), etag, last_modified)
+    return response
+
+
+def _timestamp(moment):
+    return int(moment.timestamp()) if moment is not None else None
+
+
+def job_state(employer_phone):
+    """An employer's jobs as ``JobSerializer`` shows them: with applications and their workers."""
+    state = Job.objects.filter(employer_phone=employer_phone).aggregate(
+        job_count=Count("pk", distinct=True),
+        application_count=Count("applications", distinct=True),
+        jobs_changed=Max("updated_at"),
+        applications_changed=Max("applications__updated_at"),
+        workers_changed=Max("applications__worker_phone__updated_at"),
+    )
+    state["deleted"] = Tombstone.objects.filter(
+        employer_phone=employer_phone, kind__in=("job", "job_application")
+    ).aggregate(latest=Max("deleted_at"))["latest"]
+    return state
+
+
+def booking_state(**owner):
+    """Bookings of one ``employer_phone=`` or ``worker_phone=``, with the embedded employer and worker."""
+    state = Booking.objects.filter(**owner).aggregate(
+        booking_count=Count("pk"),
+        bookings_changed=Max("updated_at"),
+        employers_changed=Max("employer_phone__updated_at"),
+        workers_changed=Max("worker_phone__updated_at"),
+    )
+    state["deleted"] = Tombstone.objects.filter(kind="booking", **owner).aggregate(
+        latest=Max("deleted_at")
+    )["latest"]
+    return state
@@ -0,0 +1,206 @@
+# api/events.py
+"""
+Change feed for job applications and bookings.
+
+Every status change is written as an ``Event`` row in the same transaction
+as the change itself, addressed to both parties (worker and employer phone).
+Clients follow their feed through ``/api/events/`` (Server-Sent Events) or
+``/api/events/poll/`` (long-poll) and resume from the last event id they saw,
+so nothing is lost across reconnects: the table is the source of truth.
+
+The pub/sub broker only carries wake-ups ("phone X has something new"), so
+waiting streams re-read the table instead of polling it. Brokers:
+
+* ``InProcessBroker`` (default) - wakes streams in this process once the
+  transaction commits. Streams served by other processes still see the event
+  at their next heartbeat.
+* ``PostgresBroker`` - ``pg_notify`` inside the writing transaction (Postgres
+  delivers it on commit), plus one ``LISTEN`` connection per process, so
+  every process wakes immediately.
+
+Select one with ``EVENTS_BROKER``. Model saves are published from
+``api/signals.py``; ``api/transitions.py`` publishes its ``QuerySet.update``
+changes itself.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("id", "kind", "object_id", "status", "worker_phone", "employer_phone", "data", "created_at")
+BATCH_SIZE = 100
+
+
+class Subscription:
+    """Wake-up flag for one waiting stream, settable from any thread."""
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.flag = asyncio.Event()
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.flag.set)
+        except RuntimeError:
+            pass  # the stream's loop is already gone
+
+    async def wait(self, timeout):
+        """True when woken, False when ``timeout`` seconds passed quietly."""
+        try:
+            await asyncio.wait_for(self.flag.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.flag.clear()
+        return True
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # channel -> set of Subscription
+
+    def publish(self, channels):
+        """Called inside the writing transaction; subscribers wake once it commits."""
+        transaction.on_commit(lambda: self.deliver(channels))
+
+    def deliver(self, channels):
+        with self._lock:
+            woken = set()
+            for channel in channels:
+                woken.update(self._subscriptions.get(channel, ()))
+        for subscription in woken:
+            subscription.notify()
+
+    @contextmanager
+    def subscribe(self, channels):
+        subscription = Subscription(channels)
+        with self._lock:
+            for channel in channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in channels:
+                    subscribers = self._subscriptions.get(channel)
+                    if subscribers is not None:
+                        subscribers.discard(subscription)
+                        if not subscribers:
+                            del self._subscriptions[channel]
+
+
+class PostgresBroker(InProcessBroker):
+    channel = "shramo_events"
+    reconnect_delay = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channels):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, ",".join(channels)])
+
+    @contextmanager
+    def subscribe(self, channels):
+        self._start_listener()
+        with super().subscribe(channels) as subscription:
+            yield subscription
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            # a dedicated connection: LISTEN needs autocommit and must outlive requests
+            db = connections.create_connection("default")
+            try:
+                db.ensure_connection()
+                db.connection.autocommit = True
+                db.connection.execute(f"LISTEN {self.channel}")
+                for notify in db.connection.notifies():
+                    self.deliver(notify.payload.split(","))
+            except Exception:
+                logger.exception("Event listener lost its connection, reconnecting")
+            finally:
+                db.close()
+            time.sleep(self.reconnect_delay)
+
+
+@lru_cache(maxsize=None)
+def broker():
+    return import_string(getattr(settings, "EVENTS_BROKER", "api.events.InProcessBroker"))()
+
+
+def record(kind, object_id, status, worker_phone, employer_phone, **data):
+    """Store one change for both parties and wake their streams."""
+    Event.objects.create(
+        kind=kind,
+        object_id=object_id,
+        status=status,
+        worker_phone_id=worker_phone,
+        employer_phone_id=employer_phone,
+        data=data,
+    )
+    broker().publish([worker_phone, employer_phone])
+
+
+def record_many(kind, changes):
+    """``record`` for many rows at once: one INSERT and one publish.
+
+    ``changes`` are ``(object_id, status, worker_phone, employer_phone, data)`` tuples.
+    """
+    rows = [
+        Event(
+            kind=kind,
+            object_id=object_id,
+            status=status,
+            worker_phone_id=worker_phone,
+            employer_phone_id=employer_phone,
+            data=data,
+        )
+        for object_id, status, worker_phone, employer_phone, data in changes
+    ]
+    if rows:
+        Event.objects.bulk_create(rows)
+        broker().publish(sorted({phone for row in rows for phone in (row.worker_phone_id, row.employer_phone_id)}))
+
+
+def application_changed(app_id, status, worker_phone, employer_phone, job_id):
+    record("job_application", app_id, status, worker_phone, employer_phone, job_id=job_id)
+
+
+def booking_changed(booking_id, status, worker_phone, employer_phone):
+    record("booking", booking_id, status, worker_phone, employer_phone)
+
+
+# -- reading -------------------------------------------------------------------
+
+def _for_phone(phone):
+    return Event.objects.filter(Q(worker_phone=phone) | Q(employer_phone=phone))
+
+
+async def latest_id(phone):
+    """Where a client with no last-event id starts: after everything already recorded."""
+    row = await _for_phone(phone).order_by("-id").values_list("id", flat=True).afirst()
+    return row or 0
+
+
+async def after(phone, last_id, limit=BATCH_SIZE):
+    rows = _for_phone(phone).filter(id__gt=last_id).order_by("id").values(*FIELDS)[:limit]
+    return [row async for row in rows]
@@ -0,0 +1,55 @@
+# api/fanout.py
+"""
+Job broadcast: contact the best available workers for a job in one batch.
+
+``broadcast`` ranks workers free on the job's date with the in-memory
+matching index (api/matching.py), leaves out those already contacted about
+the job or already applying to it, and writes every ``JobContact`` row with
+a single ``bulk_create(ignore_conflicts=True)``. The ``(job, worker_phone)`` unique
+constraint turns a repeated or concurrent broadcast into a no-op for workers
+already reached. Workers answer many contacts at once with ``respond``: one
+UPDATE per distinct answer, whatever the number of contacts.
+"""
+from django.db import transaction
+
+from . import matching
+from .models import Worker, JobApplication, JobContact
+
+MAX_WORKERS = 500
+RESPONSES = tuple(value for value, _ in JobContact._meta.get_field("response").choices)
+
+
+def broadcast(job, limit):
+    """Contact up to ``limit`` more workers about ``job``; ``[(phone, score, distance_km)]`` of those contacted."""
+    reached = set(
+        JobContact.objects.filter(job=job).values_list("worker_phone", flat=True).union(
+            JobApplication.objects.filter(job=job).values_list("worker_phone", flat=True)
+        )
+    )
+    ranked = [row for row in matching.rank_workers_for_job(job, k=limit + len(reached)) if row[0] not in reached]
+    ranked = ranked[:limit]
+    # the index can lag writes made by other processes: check the calendar for the job's date
+    available = set(
+        Worker.objects.free_on(job.work_date).filter(phone__in=[phone for phone, _, _ in ranked]).values_list(
+            "phone", flat=True
+        )
+    )
+    ranked = [row for row in ranked if row[0] in available]
+    JobContact.objects.bulk_create(
+        [JobContact(job=job, worker_phone_id=phone) for phone, _, _ in ranked], ignore_conflicts=True
+    )
+    return ranked
+
+
+def respond(worker_phone, answers):
+    """Record ``{job_id: response}`` on the worker's contacts; returns the job ids that had a contact."""
+    found = set(
+        JobContact.objects.filter(worker_phone=worker_phone, job_id__in=answers).values_list("job_id", flat=True)
+    )
+    by_response = {}
+    for job_id in found:
+        by_response.setdefault(answers[job_id], []).append(job_id)
+    with transaction.atomic():
+        for response, job_ids in by_response.items():
+            JobContact.objects.filter(worker_phone=worker_phone, job_id__in=job_ids).update(response=response)
+    return sorted(found)
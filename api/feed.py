@@ -0,0 +1,62 @@
+# api/feed.py
+"""
+Ranking for the worker job feed.
+
+The score is computed by the database so the feed can be keyset-paginated on
+``(-feed_score, -id)`` like any other list:
+
+* skill   - 1 when ``work_type`` is one of the worker's skills
+* distance - ``1 / (1 + km / DISTANCE_SCALE_KM)`` from the worker to the employer
+* wage    - ``wage / (wage + asked)``, 0.5 when the job pays what the worker asks
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce
+
+from . import geo
+from .skills import parse_skills
+
+WEIGHTS = {"skill": 0.4, "distance": 0.35, "wage": 0.25}
+DISTANCE_SCALE_KM = 10.0
+DEFAULT_ASKED_WAGE = 500.0
+
+
+def rank_jobs_for_worker(jobs, worker):
+    """Annotate ``feed_score`` (and ``distance_km`` when the worker has coordinates) on a Job queryset."""
+    skills = parse_skills(worker.skills)
+    if skills:
+        skill_score = Case(
+            When(reduce(or_, [Q(work_type__iexact=name) for name in skills]), then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    else:
+        skill_score = Value(0.0)
+
+    asked = float(worker.wages) if worker.wages else DEFAULT_ASKED_WAGE
+    wage_score = ExpressionWrapper(
+        F("wage") * Value(1.0) / (F("wage") + Value(asked)), output_field=FloatField()
+    )
+
+    lat = geo.parse_coordinate(worker.latitude, 90)
+    lon = geo.parse_coordinate(worker.longitude, 180)
+    if lat is not None and lon is not None:
+        jobs = jobs.annotate(distance_km=geo.haversine_expression(
+            lat, lon, "employer_phone__latitude", "employer_phone__longitude"
+        ))
+        distance_score = Coalesce(
+            Value(1.0) / (Value(1.0) + F("distance_km") / Value(DISTANCE_SCALE_KM)),
+            Value(0.0),
+            output_field=FloatField(),
+        )
+    else:
+        distance_score = Value(0.0)
+
+    return jobs.annotate(feed_score=ExpressionWrapper(
+        Value(WEIGHTS["skill"]) * skill_score
+        + Value(WEIGHTS["distance"]) * distance_score
+        + Value(WEIGHTS["wage"]) * wage_score,
+        output_field=FloatField(),
+    ))
@@ -0,0 +1,106 @@
+# api/geo.py
+"""
+Grid-cell spatial index helpers.
+
+Coordinates are bucketed into fixed CELL_DEGREES x CELL_DEGREES cells and the
+cell number is stored on the row (``Worker.geo_cell``), so a radius search
+becomes an indexed ``geo_cell IN (...)`` lookup over the handful of cells that
+cover the search circle, instead of a scan of the whole table.
+"""
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+CELL_DEGREES = 0.1  # ~11 km at the equator
+CELL_COLUMNS = int(round(360 / CELL_DEGREES))
+CELL_ROWS = int(round(180 / CELL_DEGREES))
+
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 50.0
+
+
+def parse_coordinate(value, limit):
+    """Return ``value`` as a float within +/- ``limit``, or None if it is unusable."""
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value) or abs(value) > limit:
+        return None
+    return value
+
+
+def parse_radius(value):
+    """Search radius in km, clamped to ``0..MAX_RADIUS_KM``; ``DEFAULT_RADIUS_KM`` when not given.
+
+    None when ``value`` is not a finite number (``float()`` takes "nan" and "inf").
+    """
+    if value is None or value == "":
+        return DEFAULT_RADIUS_KM
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(value):
+        return None
+    return min(max(value, 0.0), MAX_RADIUS_KM)
+
+
+def _row(lat):
+    return min(max(int(math.floor((lat + 90) / CELL_DEGREES)), 0), CELL_ROWS - 1)
+
+
+def _col(lon):
+    return int(math.floor((lon + 180) / CELL_DEGREES)) % CELL_COLUMNS
+
+
+def cell_for(lat, lon):
+    """Grid cell number for a point, or None when either coordinate is missing."""
+    lat, lon = parse_coordinate(lat, 90), parse_coordinate(lon, 180)
+    if lat is None or lon is None:
+        return None
+    return _row(lat) * CELL_COLUMNS + _col(lon)
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle around a point."""
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    dlon = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), lon - dlon, lon + dlon
+
+
+def cells_for_radius(lat, lon, radius_km):
+    """Every grid cell that intersects the bounding box of the search circle."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    steps = int((max_lon - min_lon) / CELL_DEGREES) + 1
+    cols = {_col(min_lon + i * CELL_DEGREES) for i in range(steps)} | {_col(max_lon)}
+    rows = range(_row(min_lat), _row(max_lat) + 1)
+    return [row * CELL_COLUMNS + col for row in rows for col in sorted(cols)]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points."""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_expression(lat, lon, lat_field="latitude", lon_field="longitude"):
+    """ORM expression for the distance in km from (lat, lon) to the row's coordinates."""
+    dlat = Radians(F(lat_field) - Value(lat))
+    dlon = Radians(F(lon_field) - Value(lon))
+    a = Power(Sin(dlat / 2), 2) + (
+        Cos(Value(math.radians(lat))) * Cos(Radians(F(lat_field))) * Power(Sin(dlon / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
@@ -0,0 +1,165 @@
+# api/idempotency.py
+"""
+``Idempotency-Key`` for POST requests, so a client retrying over a flaky
+network gets the first outcome back instead of a second booking or another
+run of a transition.
+
+Keys live in the ``idempotency_keys`` table. The first request with a key
+claims it by inserting the row; the unique index on ``key`` lets exactly one
+request win, whichever process it reaches. The winner runs and stores its
+response on the row. A retry with the same key is answered from the row
+(marked ``Idempotent-Replayed: true``) before authentication, parsing or the
+view run, in one indexed read. A duplicate arriving while the first request
+is still in flight waits for it, re-reading the row with a short backoff,
+and gets the stored response once it is there; only after
+``IDEMPOTENCY_WAIT_SECONDS`` does it give up with ``409`` and ``Retry-After``.
+A key is bound to the method and URL it was first used with, and reusing it
+elsewhere is a ``422``.
+
+The claim is renewed while the first request runs, so however long it takes
+no duplicate runs alongside it; a claim whose process died lapses
+``IDEMPOTENCY_LOCK_SECONDS`` later and the next request takes the key over.
+5xx responses and exceptions release the key, so a retry after a server
+error runs again (and a waiting duplicate runs it). Answered rows are kept
+for ``IDEMPOTENCY_TTL``; ``api/sweeper.py`` deletes expired rows.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+METHODS = ("POST",)
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = (0.05, 0.5)  # first and longest pause between re-reads of an in-flight key
+
+
+def digest(key):
+    """What is stored for ``key``: fixed width, so the unique index stays small."""
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def _lock_seconds():
+    return getattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 30)
+
+
+def _expired(row, now):
+    if row.status is None:
+        return row.claimed_until is None or row.claimed_until < now
+    return row.created_at < now - timedelta(seconds=getattr(settings, "IDEMPOTENCY_TTL", 86400))
+
+
+def _claim(key, target):
+    """``(row, claimed)``: the key's row, and whether this request inserted it."""
+    claimed_until = timezone.now() + timedelta(seconds=_lock_seconds())
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(key=key, target=target, claimed_until=claimed_until), True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(key=key).first(), False
+
+
+@contextmanager
+def _holding(pk):
+    """Renew the claim on row ``pk`` while the block runs, so a slow request is never taken over."""
+    lock = _lock_seconds()
+    done = threading.Event()
+
+    def renew():
+        try:
+            while not done.wait(lock / 3):
+                IdempotencyKey.objects.filter(pk=pk, status=None).update(
+                    claimed_until=timezone.now() + timedelta(seconds=lock)
+                )
+        finally:
+            connections.close_all()  # this thread's own connections
+
+    thread = threading.Thread(target=renew, name="idempotency-claim", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def _replay(row):
+    response = HttpResponse(bytes(row.content), status=row.status)
+    for name, value in row.headers:
+        response[name] = value
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _execute(row, handler):
+    with _holding(row.pk):
+        try:
+            response = handler()
+        except BaseException:
+            IdempotencyKey.objects.filter(pk=row.pk).delete()
+            raise
+        if response.status_code >= 500 or response.streaming:
+            IdempotencyKey.objects.filter(pk=row.pk).delete()
+            return response
+        if hasattr(response, "render"):
+            response.render()
+        IdempotencyKey.objects.filter(pk=row.pk).update(
+            status=response.status_code, headers=list(response.items()), content=response.content, claimed_until=None
+        )
+    return response
+
+
+def run(request, handler):
+    """``handler()``'s response, or the one stored for the request's ``Idempotency-Key``."""
+    key = request.headers.get(HEADER)
+    if request.method not in METHODS or key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error(f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters", 400)
+
+    key = digest(key)
+    target = f"{request.method} {request.get_full_path()}"
+    deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 10)
+    pause, longest = POLL_SECONDS
+    while True:
+        row = IdempotencyKey.objects.filter(key=key).first()
+        if row is not None and _expired(row, timezone.now()):
+            # only this version of the row: a claim renewed meanwhile is left alone
+            IdempotencyKey.objects.filter(pk=row.pk, status=row.status, claimed_until=row.claimed_until).delete()
+            row = None
+        if row is None:
+            row, claimed = _claim(key, target)
+            if claimed:
+                return _execute(row, handler)
+        if row is not None:
+            if row.target != target:
+                return _error(f"{HEADER} was already used for {row.target}", 422)
+            if row.status is not None:
+                return _replay(row)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            response = _error(f"A request with this {HEADER} is still in progress", 409)
+            response["Retry-After"] = "1"
+            return response
+        time.sleep(min(pause, remaining))
+        pause = min(pause * 2, longest)
+
+
+class IdempotentMixin:
+    """View side: POST requests carrying an ``Idempotency-Key`` run at most once."""
+
+    def dispatch(self, request, *args, **kwargs):
+        return run(request, lambda: super(IdempotentMixin, self).dispatch(request, *args, **kwargs))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import pincodes
+from api.models import Worker, Employer
+
+
+class Command(BaseCommand):
+    help = "Fill missing worker and employer coordinates from their pincode, using the offline pincode table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if pincodes.table() is None:
+            raise CommandError("No pincode table, build one with build_pincode_table")
+        workers = pincodes.backfill(Worker.objects.all(), options["batch_size"])
+        employers = pincodes.backfill(Employer.objects.all(), options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Filled coordinates of {workers} workers and {employers} employers"))
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+from api.management.commands.bench_endpoints import percentile
+from api.models import Worker, Booking
+
+
+class SimulatedLatency:
+    """Execute wrapper that blocks each query for a fixed time, like a round trip to a remote Postgres."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        # at the bottom of the stack: execute_wrapper() blocks pop from the top
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync DRF endpoints served by a fixed pool of WSGI workers with the async views "
+        "under the ASGI handler, with simulated per-query database latency. Reports JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--latency-ms", type=float, nargs="+", default=[5.0, 20.0, 100.0],
+            help="Added to every query; one run per value.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument("--wsgi-workers", type=int, default=4, help="Sync workers, as in `gunicorn -w`.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--only", nargs="*", help="Endpoint names to run (default: all).")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        endpoints = self.endpoints(rng)
+        if options["only"]:
+            endpoints = {name: urls for name, urls in endpoints.items() if name in options["only"]}
+        logging.getLogger("api.timing").setLevel(logging.WARNING)
+
+        latency = SimulatedLatency(0)
+        connection_created.connect(latency.install)
+        for connection in connections.all(initialized_only=True):
+            latency.install(connection)
+
+        report = {
+            "database": connections["default"].vendor,
+            "requests_per_endpoint": options["requests"],
+            "concurrency": options["concurrency"],
+            "wsgi_workers": options["wsgi_workers"],
+            "runs": [],
+        }
+        try:
+            for latency_ms in options["latency_ms"]:
+                latency.seconds = latency_ms / 1000
+                run = {"latency_ms": latency_ms, "endpoints": {}}
+                for name, (sync_urls, async_urls) in endpoints.items():
+                    wsgi = self.run_wsgi(sync_urls, options["requests"], options["wsgi_workers"])
+                    asgi = asyncio.run(self.run_asgi(async_urls, options["requests"], options["concurrency"]))
+                    run["endpoints"][name] = {
+                        "wsgi": wsgi,
+                        "asgi": asgi,
+                        "speedup": round(asgi["throughput_rps"] / wsgi["throughput_rps"], 2),
+                    }
+                    self.stderr.write(
+                        f"{latency_ms}ms {name}: wsgi={wsgi['throughput_rps']}rps asgi={asgi['throughput_rps']}rps"
+                    )
+                report["runs"].append(run)
+        finally:
+            connection_created.disconnect(latency.install)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output)
+        self.stdout.write(output)
+
+    def endpoints(self, rng):
+        workers = list(Worker.objects.exclude(latitude=None).values_list("phone", "latitude", "longitude")[:200])
+        employers = list(Booking.objects.values_list("employer_phone", flat=True).distinct()[:200])
+        if not (workers and employers):
+            raise CommandError("No data to benchmark against, run `manage.py seed_data` first.")
+
+        def pair(path, rows, fmt):
+            queries = [fmt(row) for row in rng.sample(rows, min(20, len(rows)))]
+            return [f"/api/{path}?{q}" for q in queries], [f"/api/async/{path}?{q}" for q in queries]
+
+        return {
+            "workers.skills": pair("workers/", [None], lambda _: "skills=plumber,painter&match=any"),
+            "workers.nearby": pair("workers/nearby/", workers, lambda w: f"lat={w[1]}&lon={w[2]}&radius_km=10"),
+            "jobs.feed": pair("jobs/feed/", workers, lambda w: f"worker_phone={w[0]}"),
+            "bookings.my_bookings": pair("bookings/my_bookings/", employers, lambda p: f"employer_phone={p}"),
+            "bookings.worker_bookings": pair("bookings/worker_bookings/", workers, lambda w: f"worker_phone={w[0]}"),
+        }
+
+    def run_wsgi(self, urls, requests, workers):
+        """Each worker thread serves one request at a time, like a gunicorn sync worker."""
+        def worker(indexes):
+            client = Client()
+            samples = []
+            for i in indexes:
+                start = time.perf_counter()
+                response = client.get(urls[i % len(urls)])
+                samples.append(((time.perf_counter() - start) * 1000, response.status_code >= 400))
+            return samples
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(worker, [range(n, requests, workers) for n in range(workers)])
+            samples = [sample for result in results for sample in result]
+        return self.summary(samples, time.perf_counter() - started)
+
+    async def run_asgi(self, urls, requests, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                # what ASGIHandler does per request: its sync ORM calls get their own thread
+                async with ThreadSensitiveContext():
+                    start = time.perf_counter()
+                    response = await client.get(urls[i % len(urls)])
+                    return (time.perf_counter() - start) * 1000, response.status_code >= 400
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(one(i) for i in range(requests)))
+        return self.summary(samples, time.perf_counter() - started)
+
+    def summary(self, samples, elapsed):
+        latencies = [ms for ms, _ in samples]
+        return {
+            "requests": len(samples),
+            "errors": sum(failed for _, failed in samples),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "throughput_rps": round(len(samples) / elapsed, 1),
+        }
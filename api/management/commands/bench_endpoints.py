@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Worker, Employer, Job, JobApplication
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Drive the main read endpoints through the test client and report latency, queries and throughput as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--only", nargs="*", help="Endpoint names to run (default: all).")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        endpoints = self.endpoints(rng)
+        if options["only"]:
+            endpoints = {name: urls for name, urls in endpoints.items() if name in options["only"]}
+
+        # the timing middleware keeps running (its cost is part of every real
+        # request), but one log line per request would drown the report
+        logging.getLogger("api.timing").setLevel(logging.WARNING)
+
+        client = Client()
+        report = {"database": connection.vendor, "requests_per_endpoint": options["requests"], "endpoints": {}}
+        for name, urls in endpoints.items():
+            report["endpoints"][name] = self.run(client, urls, options["warmup"], options["requests"])
+            self.stderr.write(f"{name}: p50={report['endpoints'][name]['p50_ms']}ms")
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output)
+        self.stdout.write(output)
+
+    def endpoints(self, rng):
+        workers = list(Worker.objects.exclude(latitude=None).values_list("phone", "latitude", "longitude")[:200])
+        employers = list(Employer.objects.values_list("phone", flat=True)[:200])
+        jobs = list(Job.objects.values_list("id", flat=True)[:200])
+        applications = list(JobApplication.objects.values_list("job_id", "worker_phone")[:200])
+        if not (workers and employers and jobs and applications):
+            raise CommandError("No data to benchmark against, run `manage.py seed_data` first.")
+
+        def sample(fmt, rows, count=20):
+            return [fmt(row) for row in rng.sample(rows, min(count, len(rows)))]
+
+        return {
+            "workers.list": ["/api/workers/"],
+            "workers.skills": ["/api/workers/?skills=plumber,painter&match=any"],
+            "workers.nearby": sample(lambda w: f"/api/workers/nearby/?lat={w[1]}&lon={w[2]}&radius_km=10", workers),
+            "employers.list": ["/api/employers/"],
+            "jobs.list": ["/api/jobs/"],
+            "jobs.retrieve": sample(lambda pk: f"/api/jobs/{pk}/", jobs),
+            "jobs.my_jobs": sample(lambda p: f"/api/jobs/my_jobs/?employer_phone={p}", employers),
+            "jobs.employer_history": sample(lambda p: f"/api/jobs/employer_history/?employer_phone={p}", employers),
+            "jobs.worker_history": sample(lambda w: f"/api/jobs/worker_history/?worker_phone={w[0]}", workers),
+            "job_applications.by_job": sample(lambda pk: f"/api/job-applications/?job_id={pk}", jobs),
+            "job_applications.get_by_job_and_worker": sample(
+                lambda a: f"/api/job-applications/get_by_job_and_worker/?job_id={a[0]}&worker_phone={a[1]}", applications
+            ),
+            "bookings.list": ["/api/bookings/"],
+            "bookings.my_bookings": sample(lambda p: f"/api/bookings/my_bookings/?employer_phone={p}", employers),
+            "bookings.worker_bookings": sample(lambda w: f"/api/bookings/worker_bookings/?worker_phone={w[0]}", workers),
+        }
+
+    def run(self, client, urls, warmup, requests):
+        for i in range(warmup):
+            client.get(urls[i % len(urls)])
+
+        latencies = []
+        queries = 0
+        errors = 0
+        started = time.perf_counter()
+        for i in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(urls[i % len(urls)])
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries += len(captured)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": requests,
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "queries_per_request": round(queries / requests, 2),
+            "throughput_rps": round(requests / elapsed, 1),
+        }
@@ -0,0 +1,56 @@
+import csv
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import geo
+from api.pincodes import PincodeTable, normalize
+
+# header names accepted for each column, compared case-insensitively
+# (the India Post directory calls them pincode/latitude/longitude, other sources lat/lng)
+COLUMNS = {
+    "pincode": ("pincode", "pin", "postal_code"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lon", "lng"),
+}
+
+
+class Command(BaseCommand):
+    help = "Build the memory-mapped pincode table (api/pincodes.py) from a CSV of pincode coordinates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV with a header row; several rows per pincode are averaged.")
+        parser.add_argument("--output", default=None, help="Table file to write (default PINCODE_TABLE_PATH).")
+
+    def handle(self, *args, **options):
+        output = options["output"] or settings.PINCODE_TABLE_PATH
+        sums = defaultdict(lambda: [0.0, 0.0, 0])
+        skipped = 0
+        with open(options["csv_path"], newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            columns = self.columns(reader.fieldnames or [])
+            for row in reader:
+                code = normalize(row[columns["pincode"]])
+                lat = geo.parse_coordinate(row[columns["latitude"]], 90)
+                lon = geo.parse_coordinate(row[columns["longitude"]], 180)
+                if code is None or lat is None or lon is None:
+                    skipped += 1  # e.g. post offices listed with "NA" coordinates
+                    continue
+                total = sums[code]
+                total[0] += lat
+                total[1] += lon
+                total[2] += 1
+
+        PincodeTable.write(output, {code: (lat / n, lon / n) for code, (lat, lon, n) in sums.items()})
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(sums)} pincodes to {output} ({skipped} rows skipped)"))
+
+    def columns(self, fieldnames):
+        names = {name.strip().lower(): name for name in fieldnames}
+        found = {}
+        for column, aliases in COLUMNS.items():
+            match = next((names[alias] for alias in aliases if alias in names), None)
+            if match is None:
+                raise CommandError(f"No {column} column in the CSV header")
+            found[column] = match
+        return found
@@ -0,0 +1,190 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import geo, ratings
+from api.models import Worker, Employer, Job, JobApplication, JobContact, Booking, WorkerOccupancy
+from api.models import ArchivedJob, ArchivedJobApplication, ArchivedJobContact, ArchivedBooking
+from api.skills import sync_worker_skills
+
+CITIES = [
+    ("Delhi", 28.6139, 77.2090),
+    ("Mumbai", 19.0760, 72.8777),
+    ("Bengaluru", 12.9716, 77.5946),
+    ("Pune", 18.5204, 73.8567),
+    ("Jaipur", 26.9124, 75.7873),
+    ("Lucknow", 26.8467, 80.9462),
+    ("Patna", 25.5941, 85.1376),
+    ("Indore", 22.7196, 75.8577),
+]
+SKILLS = [
+    "plumber", "electrician", "painter", "carpenter", "mason", "welder", "driver",
+    "cook", "cleaner", "gardener", "security guard", "helper", "tile fitter", "labourer",
+]
+NAMES = ["Ramesh", "Suresh", "Anita", "Sunita", "Mohan", "Geeta", "Raju", "Pooja", "Imran", "Lakshmi"]
+
+# rows per unit of --scale
+BASE_VOLUMES = {"workers": 1000, "employers": 200, "jobs": 1000, "bookings": 1000, "contacts": 2000}
+
+
+class Command(BaseCommand):
+    help = "Seed deterministic synthetic workers, employers, jobs, applications, bookings and contacts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the base volumes (1.0 = 1000 workers).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--applications-per-job", type=int, default=3)
+        parser.add_argument("--clear", action="store_true", help="Delete all existing rows in the api tables first.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        volumes = {name: max(1, int(count * options["scale"])) for name, count in BASE_VOLUMES.items()}
+
+        if options["clear"]:
+            for model in (
+                ArchivedJobContact, ArchivedJobApplication, ArchivedJob, ArchivedBooking,
+                JobContact, JobApplication, Booking, Job, Worker, Employer,
+            ):
+                model.objects.all().delete()
+
+        workers = self.seed_workers(rng, volumes["workers"], batch_size)
+        employers = self.seed_employers(rng, volumes["employers"], batch_size)
+        jobs = self.seed_jobs(rng, employers, volumes["jobs"], batch_size)
+        applications = self.seed_applications(rng, jobs, workers, options["applications_per_job"], batch_size)
+        bookings = self.seed_bookings(rng, employers, workers, volumes["bookings"], batch_size)
+        contacts = self.seed_contacts(rng, jobs, workers, volumes["contacts"], batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(workers)} workers, {len(employers)} employers, {len(jobs)} jobs, "
+            f"{applications} applications, {bookings} bookings, {contacts} contacts"
+        ))
+
+    def point(self, rng):
+        city, lat, lon = rng.choice(CITIES)
+        return city, round(lat + rng.uniform(-0.2, 0.2), 6), round(lon + rng.uniform(-0.2, 0.2), 6)
+
+    def rating_aggregates(self, rng):
+        count = rng.choice([0, 0, rng.randint(1, 5), rng.randint(5, 40)])
+        total = sum(rng.randint(2, 5) for _ in range(count))
+        rating, score = ratings.averages(total, count)
+        return dict(rating=Decimal(str(rating)), rating_sum=total, rating_count=count, rating_score=score)
+
+    def seed_workers(self, rng, count, batch_size):
+        workers = []
+        for i in range(count):
+            city, lat, lon = self.point(rng)
+            workers.append(Worker(
+                phone=f"7{i:09d}",
+                name=f"{rng.choice(NAMES)} {i}",
+                location=city,
+                skills=", ".join(rng.sample(SKILLS, rng.randint(1, 3))),
+                is_available=rng.random() < 0.8,
+                **self.rating_aggregates(rng),
+                latitude=lat,
+                longitude=lon,
+                geo_cell=geo.cell_for(lat, lon),
+                pincode=str(rng.randint(110001, 855117)),
+                age=rng.randint(18, 60),
+                gender=rng.choice(["Male", "Female"]),
+                has_phone=rng.random() < 0.7,
+                wages=Decimal(rng.randrange(300, 1200, 50)),
+            ))
+        today = timezone.localdate()
+        for start in range(0, count, batch_size):
+            batch = workers[start:start + batch_size]
+            with transaction.atomic():
+                Worker.objects.bulk_create(batch, ignore_conflicts=True)
+                sync_worker_skills(batch)
+                # is_available mirrors today's calendar (api/availability.py)
+                WorkerOccupancy.objects.bulk_create(
+                    [WorkerOccupancy(worker=w, date=today, kind="off") for w in batch if not w.is_available],
+                    ignore_conflicts=True,
+                )
+        return workers
+
+    def seed_employers(self, rng, count, batch_size):
+        employers = []
+        for i in range(count):
+            city, lat, lon = self.point(rng)
+            employers.append(Employer(
+                phone=f"6{i:09d}",
+                name=f"Employer {i}",
+                location=city,
+                latitude=lat,
+                longitude=lon,
+                pincode=str(rng.randint(110001, 855117)),
+            ))
+        Employer.objects.bulk_create(employers, batch_size=batch_size, ignore_conflicts=True)
+        return employers
+
+    def seed_jobs(self, rng, employers, count, batch_size):
+        today = timezone.localdate()
+        jobs = [
+            Job(
+                employer_phone=rng.choice(employers),
+                work_type=rng.choice(SKILLS),
+                location=rng.choice(CITIES)[0],
+                work_date=today + datetime.timedelta(days=rng.randint(-60, 30)),
+                wage=Decimal(rng.randrange(300, 1500, 50)),
+                detail="Synthetic job",
+                status=rng.choices(["open", "assigned", "completed"], weights=[5, 2, 3])[0],
+            )
+            for _ in range(count)
+        ]
+        return Job.objects.bulk_create(jobs, batch_size=batch_size)
+
+    def seed_applications(self, rng, jobs, workers, per_job, batch_size):
+        applications = []
+        for job in jobs:
+            for worker in rng.sample(workers, min(per_job, len(workers))):
+                status = "completed" if job.status == "completed" else rng.choice(
+                    ["pending", "waiting_for_worker_confirmation", "accepted", "declined"]
+                )
+                applications.append(JobApplication(
+                    job=job,
+                    worker_phone=worker,
+                    status=status,
+                    employer_accept=status in ("waiting_for_worker_confirmation", "accepted", "completed"),
+                    worker_accept=status in ("accepted", "completed"),
+                    employer_complete=status == "completed",
+                    worker_complete=status == "completed",
+                ))
+        JobApplication.objects.bulk_create(applications, batch_size=batch_size, ignore_conflicts=True)
+        return len(applications)
+
+    def seed_bookings(self, rng, employers, workers, count, batch_size):
+        bookings = []
+        for _ in range(count):
+            status = rng.choice(["pending", "accepted", "declined", "completed"])
+            bookings.append(Booking(
+                employer_phone=rng.choice(employers),
+                worker_phone=rng.choice(workers),
+                description="Synthetic booking",
+                location=rng.choice(CITIES)[0],
+                category=rng.choice(SKILLS),
+                status=status,
+                employer_response=True,
+                worker_response=None if status == "pending" else status != "declined",
+                employer_complete=status == "completed",
+                worker_complete=status == "completed",
+            ))
+        Booking.objects.bulk_create(bookings, batch_size=batch_size)
+        return len(bookings)
+
+    def seed_contacts(self, rng, jobs, workers, count, batch_size):
+        contacts = [
+            JobContact(
+                job=rng.choice(jobs),
+                worker_phone=rng.choice(workers),
+                response=rng.choice(["accepted", "rejected", "no_response", None]),
+            )
+            for _ in range(count)
+        ]
+        JobContact.objects.bulk_create(contacts, batch_size=batch_size, ignore_conflicts=True)
+        return len(contacts)
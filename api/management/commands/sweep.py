@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api import sweeper
+
+
+class Command(BaseCommand):
+    help = "Expire past-date open jobs, archive finished jobs and bookings, prune old events and tombstones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction (default SWEEP_BATCH_SIZE).")
+        parser.add_argument(
+            "--archive-after-days", type=int, default=None,
+            help="Archive finished rows untouched this long (default SWEEP_ARCHIVE_AFTER_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        counts = sweeper.sweep(options["batch_size"], options["archive_after_days"])
+        self.stdout.write(self.style.SUCCESS(", ".join(f"{name}: {count}" for name, count in counts.items())))
@@ -0,0 +1,211 @@
+# api/matching.py
+"""
+Vectorized worker ranking for job matching.
+
+Every worker's coordinates, Bayesian rating score, wage and availability are kept in a
+process-wide columnar snapshot (NumPy arrays) so ranking all workers for a job
+is a handful of array operations instead of a table scan per request. Rows
+are refreshed incrementally: ``Worker`` saves/deletes mark their phone dirty
+(see ``api/signals.py``) and the next ranking call reloads only those rows. A
+full reload every ``MATCHING_INDEX_TTL`` seconds picks up writes made by
+other gunicorn workers.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from . import geo
+from .models import Worker, WorkerOccupancy
+from .skills import normalize_skill, parse_skills
+
+WEIGHTS = {"skill": 0.4, "distance": 0.3, "rating": 0.15, "wage": 0.15}
+DISTANCE_SCALE_KM = 10.0  # distance score halves roughly every 7 km
+MAX_RATING = 5.0
+
+
+class WorkerIndex:
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._loaded_at = None
+        self._reset(0)
+
+    def _reset(self, capacity):
+        self.size = 0
+        self.phones = []
+        self.rows = {}
+        self.skill_rows = {}
+        self.row_skills = []
+        self.lat = np.full(capacity, np.nan)
+        self.lon = np.full(capacity, np.nan)
+        self.rating = np.zeros(capacity, dtype=np.float32)
+        self.wages = np.full(capacity, np.nan)
+        self.available = np.zeros(capacity, dtype=bool)  # free today (Worker.is_available)
+        self.present = np.zeros(capacity, dtype=bool)  # False for the slots of removed workers
+
+    def _grow(self, needed):
+        capacity = len(self.lat)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        fills = (
+            ("lat", np.nan), ("lon", np.nan), ("rating", 0), ("wages", np.nan), ("available", False), ("present", False)
+        )
+        for name, fill in fills:
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    # -- maintenance ---------------------------------------------------------
+
+    def mark_dirty(self, phones):
+        with self._lock:
+            self._dirty.update(phones)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _values(self, queryset):
+        return queryset.values_list(
+            "phone", "latitude", "longitude", "rating_score", "wages", "is_available", "skills"
+        ).iterator(chunk_size=5000)
+
+    def _store(self, row, values):
+        phone, lat, lon, rating, wages, available, skills = values
+        self.lat[row] = np.nan if lat is None else lat
+        self.lon[row] = np.nan if lon is None else lon
+        self.rating[row] = rating or 0
+        self.wages[row] = np.nan if wages is None else float(wages)
+        self.available[row] = available
+        self.present[row] = True
+        for name in self.row_skills[row]:
+            self.skill_rows[name].discard(row)
+        self.row_skills[row] = parse_skills(skills)
+        for name in self.row_skills[row]:
+            self.skill_rows.setdefault(name, set()).add(row)
+
+    def _append(self, values):
+        row = self.size
+        self._grow(row + 1)
+        self.size += 1
+        self.phones.append(values[0])
+        self.rows[values[0]] = row
+        self.row_skills.append([])
+        self._store(row, values)
+
+    def _remove(self, phone):
+        # the slot is kept (row numbers stay stable) but can never be ranked again
+        row = self.rows.pop(phone)
+        self.available[row] = False
+        self.present[row] = False
+        for name in self.row_skills[row]:
+            self.skill_rows[name].discard(row)
+        self.row_skills[row] = []
+
+    def refresh(self):
+        with self._lock:
+            expired = self.ttl is not None and self._loaded_at is not None and time.monotonic() - self._loaded_at > self.ttl
+            if self._loaded_at is None or expired:
+                self._reset(Worker.objects.count())
+                for values in self._values(Worker.objects.all()):
+                    self._append(values)
+                self._loaded_at = time.monotonic()
+                self._dirty.clear()
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                seen = set()
+                for values in self._values(Worker.objects.filter(phone__in=dirty)):
+                    seen.add(values[0])
+                    if values[0] in self.rows:
+                        self._store(self.rows[values[0]], values)
+                    else:
+                        self._append(values)
+                for phone in dirty - seen:
+                    if phone in self.rows:
+                        self._remove(phone)
+
+    # -- ranking ---------------------------------------------------------------
+
+    def rank(self, lat=None, lon=None, skill=None, wage=None, k=20, busy=None):
+        """Top ``k`` available workers as ``[(phone, score, distance_km or None), ...]``, best first.
+
+        Available means free today, unless ``busy`` gives the phones taken on the day that matters.
+        """
+        self.refresh()
+        with self._lock:
+            n = self.size
+            if not n:
+                return []
+            score = np.zeros(n)
+
+            skill = normalize_skill(skill)
+            if skill:
+                rows = self.skill_rows.get(skill)
+                if rows:
+                    score[np.fromiter(rows, dtype=np.int64, count=len(rows))] += WEIGHTS["skill"]
+
+            distance = None
+            if lat is not None and lon is not None:
+                distance = _haversine_km(lat, lon, self.lat[:n], self.lon[:n])
+                score += WEIGHTS["distance"] * np.nan_to_num(np.exp(-distance / DISTANCE_SCALE_KM), nan=0.0)
+
+            score += WEIGHTS["rating"] * (self.rating[:n] / MAX_RATING)
+
+            if wage is not None and wage > 0:
+                asked = self.wages[:n]
+                fit = np.clip(1 - (asked - wage) / wage, 0, 1)
+                score += WEIGHTS["wage"] * np.where(np.isnan(asked), 1.0, fit)
+
+            if busy is None:
+                score[~self.available[:n]] = -np.inf
+            else:
+                score[~self.present[:n]] = -np.inf
+                taken = [self.rows[phone] for phone in busy if phone in self.rows]
+                score[np.array(taken, dtype=np.int64)] = -np.inf
+            candidates = np.flatnonzero(np.isfinite(score))
+            if len(candidates) > k:
+                top = np.argpartition(-score[candidates], k - 1)[:k]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(-score[candidates], kind="stable")]
+
+            return [
+                (
+                    self.phones[row],
+                    round(float(score[row]), 4),
+                    None if distance is None or np.isnan(distance[row]) else round(float(distance[row]), 3),
+                )
+                for row in candidates
+            ]
+
+
+def _haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * geo.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+worker_index = WorkerIndex(ttl=getattr(settings, "MATCHING_INDEX_TTL", 300))
+
+
+def workers_changed(phones):
+    """Tell the ranking index that these workers were written outside of ``Model.save``/``delete``."""
+    worker_index.mark_dirty(phones)
+
+
+def rank_workers_for_job(job, k=20):
+    """Workers free on the job's work date, best match first."""
+    employer = job.employer_phone
+    return worker_index.rank(
+        lat=geo.parse_coordinate(employer.latitude, 90),
+        lon=geo.parse_coordinate(employer.longitude, 180),
+        skill=job.work_type,
+        wage=float(job.wage) if job.wage is not None else None,
+        k=k,
+        busy=set(WorkerOccupancy.objects.filter(date=job.work_date).values_list("worker", flat=True)),
+    )
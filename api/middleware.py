@@ -0,0 +1,211 @@
+# api/middleware.py
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger("api.timing")
+
+_current = ContextVar("api_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize", "serializing", "view_name", "view_start", "view_end")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+        self.view_name = None
+        self.view_start = None
+        self.view_end = None
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def serializing():
+    """Count the block as serialization of the current request; queries it runs stay database time."""
+    timings = _current.get()
+    if timings is None or timings.serializing:  # not timed, or inside a block already counted
+        yield
+        return
+    timings.serializing = True
+    db = timings.db
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize += time.perf_counter() - start - (timings.db - db)
+        timings.serializing = False
+
+
+class SerializeTimingMixin:
+    """Serializer side: ``to_representation`` is reported as ``serialize`` by ``RequestTimingMiddleware``."""
+
+    def to_representation(self, instance):
+        with serializing():
+            return super().to_representation(instance)
+
+
+def view_name(view_func, method):
+    """`JobApplicationViewSet.apply` style name for DRF viewsets, the function name otherwise."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+def _enter_query_wrapper(timings):
+    wrapper = connection.execute_wrapper(timings.record_query)
+    wrapper.__enter__()
+    return wrapper
+
+
+class RequestTimingMiddleware:
+    """
+    Breaks each request's time down into database, application (the view and
+    ORM hydration), serialization (``SerializeTimingMixin`` serializers) and
+    rendering, and reports it both as a ``Server-Timing`` header and as an
+    ``api.timing`` log line at INFO (``API_TIMING_LOG_LEVEL``).
+
+    Only perf_counter reads and a cursor wrapper are added per request, so it
+    is meant to stay on in production. Set ``API_TIMING_ENABLED = False`` to
+    switch it off.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "API_TIMING_ENABLED", True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = request._timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.record_query):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        timings = request._timings = RequestTimings()
+        token = _current.set(timings)  # copied into the threads sync_to_async runs the view on
+        start = time.perf_counter()
+        # under ASGI the ORM runs on the request's sync thread, which has its
+        # own connection object, so the query wrapper is installed there
+        wrapper = await sync_to_async(_enter_query_wrapper)(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrapper.__exit__)(None, None, None)
+            _current.reset(token)
+        return self.report(request, response, timings, start)
+
+    def report(self, request, response, timings, start):
+        end = time.perf_counter()
+
+        # DRF responses are rendered after process_template_response, anything
+        # else (plain or streaming responses) has no separate render phase
+        view_start = timings.view_start or start
+        view_end = timings.view_end or end
+        total_ms = (end - start) * 1000
+        db_ms = timings.db * 1000
+        serialize_ms = timings.serialize * 1000
+        app_ms = max((view_end - view_start) * 1000 - db_ms - serialize_ms, 0.0)
+        render_ms = (end - view_end) * 1000
+
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{timings.queries} queries", '
+            f'app;dur={app_ms:.1f};desc="view+orm", '
+            f"serialize;dur={serialize_ms:.1f}, "
+            f"render;dur={render_ms:.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+        name = timings.view_name or "unresolved"
+        logger.info(
+            "view=%s method=%s status=%s queries=%d db_ms=%.1f app_ms=%.1f serialize_ms=%.1f render_ms=%.1f "
+            "total_ms=%.1f",
+            name, request.method, response.status_code, timings.queries, db_ms, app_ms, serialize_ms, render_ms,
+            total_ms,
+            extra={
+                "view": name,
+                "path": request.path,
+                "status_code": response.status_code,
+                "queries": timings.queries,
+                "db_ms": db_ms,
+                "app_ms": app_ms,
+                "serialize_ms": serialize_ms,
+                "render_ms": render_ms,
+                "total_ms": total_ms,
+            },
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = getattr(request, "_timings", None)
+        if timings is not None:
+            timings.view_name = view_name(view_func, request.method)
+            timings.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, "_timings", None)
+        if timings is not None:
+            timings.view_end = time.perf_counter()
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can sit in an async middleware chain. Stock WhiteNoise is
+    sync-only, and one sync middleware makes Django run every request under
+    ASGI through a thread hop, serializing the async views behind it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)  # in-memory lookup
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
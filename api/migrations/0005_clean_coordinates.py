@@ -0,0 +1,31 @@
+# Clears coordinate strings that cannot be cast to a number, so the
+# CharField -> FloatField change in 0006 does not fail on legacy rows.
+
+from django.db import migrations
+
+
+def clean_coordinates(apps, schema_editor):
+    for model_name in ('Worker', 'Employer'):
+        model = apps.get_model('api', model_name)
+        for limit, field in ((90, 'latitude'), (180, 'longitude')):
+            bad = []
+            for pk, value in model.objects.exclude(**{f'{field}__isnull': True}).values_list('pk', field).iterator():
+                try:
+                    ok = abs(float(value)) <= limit
+                except (TypeError, ValueError):
+                    ok = False
+                if not ok:
+                    bad.append(pk)
+            if bad:
+                model.objects.filter(pk__in=bad).update(**{field: None})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_employer_latitude_employer_longitude_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+from api import geo
+
+
+def populate_geo_cell(apps, schema_editor):
+    Worker = apps.get_model('api', 'Worker')
+    rows = Worker.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for phone, lat, lon in rows.values_list('phone', 'latitude', 'longitude').iterator():
+        Worker.objects.filter(phone=phone).update(geo_cell=geo.cell_for(lat, lon))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_clean_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worker',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='employer',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='employer',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='worker',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='worker',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='worker',
+            index=models.Index(fields=['geo_cell'], name='workers_geo_cell_idx'),
+        ),
+        migrations.RunPython(populate_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from api.skills import parse_skills
+
+
+def backfill_worker_skills(apps, schema_editor):
+    Worker = apps.get_model('api', 'Worker')
+    Skill = apps.get_model('api', 'Skill')
+    WorkerSkill = apps.get_model('api', 'WorkerSkill')
+    skill_ids = {}
+    batch = []
+    for phone, skills in Worker.objects.values_list('phone', 'skills').iterator(chunk_size=2000):
+        for name in parse_skills(skills):
+            if name not in skill_ids:
+                skill_ids[name] = Skill.objects.get_or_create(name=name)[0].id
+            batch.append(WorkerSkill(worker_id=phone, skill_id=skill_ids[name]))
+        if len(batch) >= 2000:
+            WorkerSkill.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    WorkerSkill.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_worker_geo_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'db_table': 'skills',
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkerSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worker_skills', to='api.skill')),
+                ('worker', models.ForeignKey(db_column='worker_phone', on_delete=django.db.models.deletion.CASCADE, related_name='worker_skills', to='api.worker')),
+            ],
+            options={
+                'db_table': 'worker_skills',
+                'unique_together': {('skill', 'worker')},
+            },
+        ),
+        migrations.RunPython(backfill_worker_skills, migrations.RunPython.noop),
+    ]
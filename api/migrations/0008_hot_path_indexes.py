@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_skill_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['worker_phone', '-created_at', '-id'], name='bookings_worker_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['employer_phone', '-created_at', '-id'], name='bookings_employer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at', '-id'], name='bookings_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['employer_phone', 'status'], name='jobs_employer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['work_date'], name='jobs_open_work_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['worker_phone', 'status'], name='job_apps_worker_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['-applied_at', '-id'], name='job_apps_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcontact',
+            index=models.Index(fields=['-contacted_at', '-id'], name='job_contacts_contacted_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_worker_stats(apps, schema_editor):
+    JobApplication = apps.get_model('api', 'JobApplication')
+    Booking = apps.get_model('api', 'Booking')
+    WorkerStats = apps.get_model('api', 'WorkerStats')
+
+    stats = {}
+    jobs = (
+        JobApplication.objects.filter(status='completed', job__status='completed')
+        .values('worker_phone')
+        .annotate(count=Count('id'), earned=Sum('job__wage'), last=Max('updated_at'))
+    )
+    for row in jobs:
+        stats[row['worker_phone']] = WorkerStats(
+            worker_id=row['worker_phone'],
+            completed_jobs=row['count'],
+            total_earnings=row['earned'] or 0,
+            last_active=row['last'].date() if row['last'] else None,
+        )
+    bookings = (
+        Booking.objects.filter(status='completed')
+        .values('worker_phone')
+        .annotate(count=Count('id'), last=Max('created_at'))
+    )
+    for row in bookings:
+        entry = stats.setdefault(row['worker_phone'], WorkerStats(worker_id=row['worker_phone']))
+        entry.completed_bookings = row['count']
+        last = row['last'].date() if row['last'] else None
+        if last and (entry.last_active is None or last > entry.last_active):
+            entry.last_active = last
+    WorkerStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerStats',
+            fields=[
+                ('worker', models.OneToOneField(db_column='worker_phone', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.worker')),
+                ('completed_jobs', models.IntegerField(default=0)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_active', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'worker_stats',
+            },
+        ),
+        migrations.RunPython(backfill_worker_stats, migrations.RunPython.noop),
+    ]
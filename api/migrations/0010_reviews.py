@@ -0,0 +1,117 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_unreviewed_ratings(apps, schema_editor):
+    # nothing ever computed the old rating columns; with no reviews behind them they start at zero
+    for name in ('Worker', 'Employer'):
+        apps.get_model('api', name).objects.filter(rating_count=0).update(rating=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_worker_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reviewer', models.CharField(choices=[('employer', 'employer'), ('worker', 'worker')], max_length=10)),
+                ('rating', models.PositiveSmallIntegerField()),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'reviews',
+            },
+        ),
+        migrations.AddField(
+            model_name='employer',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='employer',
+            name='rating_score',
+            field=models.FloatField(default=3.5),
+        ),
+        migrations.AddField(
+            model_name='employer',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='rating_score',
+            field=models.FloatField(default=3.5),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='worker',
+            name='rating',
+            field=models.DecimalField(decimal_places=1, default=0.0, max_digits=2),
+        ),
+        migrations.AddIndex(
+            model_name='worker',
+            index=models.Index(fields=['-rating_score', 'phone'], name='workers_rating_score_idx'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.jobapplication'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.booking'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='employer_phone',
+            field=models.ForeignKey(db_column='employer_phone', on_delete=django.db.models.deletion.CASCADE, to='api.employer'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='worker_phone',
+            field=models.ForeignKey(db_column='worker_phone', on_delete=django.db.models.deletion.CASCADE, to='api.worker'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['worker_phone', '-created_at', '-id'], name='reviews_worker_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['employer_phone', '-created_at', '-id'], name='reviews_employer_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('application__isnull', False), ('booking__isnull', True)), models.Q(('application__isnull', True), ('booking__isnull', False)), _connector='OR'), name='reviews_one_target'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(condition=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='reviews_rating_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('application', 'reviewer'), name='reviews_application_reviewer_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('booking', 'reviewer'), name='reviews_booking_reviewer_uniq'),
+        ),
+        migrations.RunPython(reset_unreviewed_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_reviews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('job_application', 'job_application'), ('booking', 'booking')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('status', models.CharField(max_length=40)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employer_phone', models.ForeignKey(db_column='employer_phone', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.employer')),
+                ('worker_phone', models.ForeignKey(db_column='worker_phone', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.worker')),
+            ],
+            options={
+                'db_table': 'events',
+                'indexes': [models.Index(fields=['worker_phone', 'id'], name='events_worker_id_idx'), models.Index(fields=['employer_phone', 'id'], name='events_employer_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('worker', 'worker'), ('job', 'job'), ('job_application', 'job_application'), ('booking', 'booking')], max_length=20)),
+                ('object_id', models.CharField(max_length=20)),
+                ('worker_phone', models.CharField(blank=True, max_length=15, null=True)),
+                ('employer_phone', models.CharField(blank=True, max_length=15, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['worker_phone', 'updated_at'], name='bookings_worker_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['employer_phone', 'updated_at'], name='bookings_employer_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['employer_phone', 'updated_at'], name='jobs_employer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['worker_phone', 'updated_at'], name='job_apps_worker_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'updated_at'], name='job_apps_job_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['worker_phone', 'deleted_at'], name='tombstones_worker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['employer_phone', 'deleted_at'], name='tombstones_employer_idx'),
+        ),
+    ]
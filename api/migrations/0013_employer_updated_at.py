@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
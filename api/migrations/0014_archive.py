@@ -0,0 +1,135 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_employer_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('employer_phone', models.CharField(max_length=15)),
+                ('worker_phone', models.CharField(max_length=15)),
+                ('description', models.TextField(blank=True)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('employer_response', models.BooleanField(default=None, null=True)),
+                ('worker_response', models.BooleanField(default=None, null=True)),
+                ('employer_complete', models.BooleanField(default=False)),
+                ('worker_complete', models.BooleanField(default=False)),
+                ('status', models.CharField(max_length=20)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'bookings_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('employer_phone', models.CharField(max_length=15)),
+                ('work_type', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=200)),
+                ('work_date', models.DateField()),
+                ('wage', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('detail', models.CharField(max_length=200)),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'jobs_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJobApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('worker_phone', models.CharField(max_length=15)),
+                ('worker_accept', models.BooleanField(default=False)),
+                ('employer_accept', models.BooleanField(default=False)),
+                ('worker_complete', models.BooleanField(default=False)),
+                ('employer_complete', models.BooleanField(default=False)),
+                ('status', models.CharField(max_length=40)),
+                ('applied_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'job_applications_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJobContact',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('worker_phone', models.CharField(max_length=15)),
+                ('contacted_at', models.DateTimeField()),
+                ('response', models.CharField(blank=True, max_length=20, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'job_contacts_archive',
+            },
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('open', 'open'), ('assigned', 'assigned'), ('completed', 'completed'), ('expired', 'expired')], default='open', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='application',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.jobapplication'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='booking',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.booking'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'updated_at'], name='bookings_status_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'updated_at'], name='jobs_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['employer_phone', 'created_at'], name='bookings_archive_employer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['worker_phone', 'created_at'], name='bookings_archive_worker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedjob',
+            index=models.Index(fields=['employer_phone', 'work_date'], name='jobs_archive_employer_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedjobapplication',
+            name='job',
+            field=models.ForeignKey(db_column='job_id', on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='api.archivedjob'),
+        ),
+        migrations.AddField(
+            model_name='archivedjobcontact',
+            name='job',
+            field=models.ForeignKey(db_column='job_id', on_delete=django.db.models.deletion.CASCADE, related_name='contacts', to='api.archivedjob'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedjobapplication',
+            index=models.Index(fields=['worker_phone', 'applied_at'], name='job_apps_archive_worker_idx'),
+        ),
+    ]
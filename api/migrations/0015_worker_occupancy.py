@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_occupancy(apps, schema_editor):
+    """Calendar rows for work in progress, and a day off today for workers marked unavailable without any."""
+    Worker = apps.get_model('api', 'Worker')
+    JobApplication = apps.get_model('api', 'JobApplication')
+    Booking = apps.get_model('api', 'Booking')
+    WorkerOccupancy = apps.get_model('api', 'WorkerOccupancy')
+    today = timezone.localdate()
+
+    rows = [
+        WorkerOccupancy(worker_id=phone, date=day, kind='job', application_id=pk)
+        for pk, phone, day in JobApplication.objects.filter(status='accepted').values_list(
+            'pk', 'worker_phone', 'job__work_date'
+        ).iterator()
+    ]
+    # bookings had no date: they occupy the day they were accepted
+    rows += [
+        WorkerOccupancy(worker_id=phone, date=timezone.localdate(updated_at), kind='booking', booking_id=pk)
+        for pk, phone, updated_at in Booking.objects.filter(status='accepted').values_list(
+            'pk', 'worker_phone', 'updated_at'
+        ).iterator()
+    ]
+    # first come first served for a worker committed twice on one day; the unique index
+    # is only created once this function has run, so duplicates are dropped here
+    taken = set()
+    rows = [row for row in rows if (row.worker_id, row.date) not in taken and not taken.add((row.worker_id, row.date))]
+    WorkerOccupancy.objects.bulk_create(rows, batch_size=1000)
+
+    busy_today = WorkerOccupancy.objects.filter(date=today).values('worker')
+    off = Worker.objects.filter(is_available=False).exclude(phone__in=busy_today).values_list('phone', flat=True)
+    WorkerOccupancy.objects.bulk_create(
+        [WorkerOccupancy(worker_id=phone, date=today, kind='off') for phone in off.iterator()], batch_size=1000
+    )
+    Worker.objects.filter(phone__in=busy_today).update(is_available=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='work_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='work_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='WorkerOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('job', 'job'), ('booking', 'booking'), ('off', 'off')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.jobapplication')),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.booking')),
+                ('worker', models.ForeignKey(db_column='worker_phone', on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='api.worker')),
+            ],
+            options={
+                'db_table': 'worker_occupancy',
+                'unique_together': {('date', 'worker')},
+            },
+        ),
+        migrations.RunPython(populate_occupancy, migrations.RunPython.noop),
+    ]
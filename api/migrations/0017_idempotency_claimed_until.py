@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,35 +1,139 @@
 # shramo/models.py
 from django.db import models
 
+from . import geo
+
+# Bayesian prior for rating_score: every worker/employer starts as if they had
+# RATING_PRIOR_WEIGHT reviews of RATING_PRIOR_MEAN stars (see api/ratings.py)
+RATING_PRIOR_MEAN = 3.5
+RATING_PRIOR_WEIGHT = 5
+
+
+class WorkerQuerySet(models.QuerySet):
+    def near(self, lat, lon, radius_km):
+        """Workers within ``radius_km`` of a point, nearest first, annotated with ``distance_km``.
+
+        Candidates are pruned through the ``geo_cell`` index and a bounding box
+        before the haversine distance is computed, so only nearby rows are read.
+        """
+        min_lat, max_lat, min_lon, max_lon = geo.bounding_box(lat, lon, radius_km)
+        qs = self.filter(
+            geo_cell__in=geo.cells_for_radius(lat, lon, radius_km),
+            latitude__range=(min_lat, max_lat),
+        )
+        if -180 <= min_lon and max_lon <= 180:
+            qs = qs.filter(longitude__range=(min_lon, max_lon))
+        return (
+            qs.annotate(distance_km=geo.haversine_expression(lat, lon))
+            .filter(distance_km__lte=radius_km)
+            .order_by("distance_km", "phone")
+        )
+
+    def free_on(self, day):
+        """Workers with nothing in their calendar on ``day``, through the (date, worker) index."""
+        return self.exclude(models.Exists(WorkerOccupancy.objects.filter(worker=models.OuterRef("pk"), date=day)))
+
+    def with_skills(self, names, match="any"):
+        """Workers having any (or all) of the given normalized skill names, via the WorkerSkill index."""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return self
+        rows = WorkerSkill.objects.filter(skill__name__in=names).values("worker")
+        if match == "all":
+            rows = rows.annotate(matched=models.Count("skill")).filter(matched=len(names)).values("worker")
+        return self.filter(phone__in=rows)
+
+
 class Worker(models.Model):
     phone = models.CharField(max_length=15, primary_key=True)
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=200)
     skills = models.CharField(max_length=500)  # comma separated
-    is_available = models.BooleanField(default=True)
-    rating = models.IntegerField(default=0)
+    is_available = models.BooleanField(default=True)  # free today: derived from WorkerOccupancy, see api/availability.py
+    rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)  # plain average of reviews
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_score = models.FloatField(default=RATING_PRIOR_MEAN)  # Bayesian-adjusted, used for ranking
 
-    longitude = models.CharField(null=True, blank=True)
-    latitude = models.CharField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)  # see api/geo.py
     pincode = models.CharField(max_length=10, null=True, blank=True)
     age = models.IntegerField(null=True, blank=True)
     gender = models.CharField(max_length=10, null=True, blank=True)  # e.g., Male/Female/Other
     has_phone = models.BooleanField(default=True)
     wages = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # store daily/monthly wages
+    updated_at = models.DateTimeField(auto_now=True)  # delta sync, see api/sync.py
 
-
+    objects = WorkerQuerySet.as_manager()
 
     class Meta:
         db_table = 'workers'
+        indexes = [
+            models.Index(fields=['geo_cell'], name='workers_geo_cell_idx'),
+            models.Index(fields=['-rating_score', 'phone'], name='workers_rating_score_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo.cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
+        super().save(*args, **kwargs)
+
+class WorkerStats(models.Model):
+    # maintained by api/stats.py inside the completion transitions
+    worker = models.OneToOneField(
+        Worker,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='worker_phone',
+        primary_key=True,
+        related_name='stats'
+    )
+    completed_jobs = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # sum of Job.wage
+    last_active = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'worker_stats'
+
+class Skill(models.Model):
+    name = models.CharField(max_length=100, unique=True)  # normalized, see api/skills.py
+
+    class Meta:
+        db_table = 'skills'
+
+    def __str__(self):
+        return self.name
+
+class WorkerSkill(models.Model):
+    worker = models.ForeignKey(
+        Worker,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='worker_phone',
+        related_name='worker_skills'
+    )
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='worker_skills')
+
+    class Meta:
+        db_table = 'worker_skills'
+        unique_together = ('skill', 'worker')  # doubles as the skill -> workers index
 
 class Employer(models.Model):
     phone = models.CharField(max_length=15, primary_key=True)
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=200)
     rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_score = models.FloatField(default=RATING_PRIOR_MEAN)
     pincode = models.CharField(max_length=10, null=True, blank=True)
-    longitude = models.CharField(null=True, blank=True)
-    latitude = models.CharField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # delta sync and conditional GET of embedded employers
 
     class Meta:
         db_table = 'employers'
@@ -49,14 +153,24 @@ class Job(models.Model):
 
     status = models.CharField(
         max_length=20,
-        choices=[('open', 'open'), ('assigned', 'assigned'), ('completed', 'completed')],
+        # expired: still open when its work_date passed, set by api/sweeper.py
+        choices=[('open', 'open'), ('assigned', 'assigned'), ('completed', 'completed'), ('expired', 'expired')],
         default='open'
     )
 
     created_at = models.DateTimeField(auto_now_add=True, null=True)  # 👈 important
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['employer_phone', 'status'], name='jobs_employer_status_idx'),
+            models.Index(fields=['employer_phone', 'updated_at'], name='jobs_employer_updated_idx'),
+            # the worker feed only ever looks at open jobs
+            models.Index(fields=['work_date'], condition=models.Q(status='open'), name='jobs_open_work_date_idx'),
+            # finished jobs the sweeper moves to the archive, oldest first
+            models.Index(fields=['status', 'updated_at'], name='jobs_status_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.work_type} - {self.location} ({self.status})"
@@ -99,6 +213,12 @@ class JobApplication(models.Model):
     class Meta:
         db_table = 'job_applications'
         unique_together = ('job', 'worker_phone')  # one application per worker per job
+        indexes = [
+            models.Index(fields=['worker_phone', 'status'], name='job_apps_worker_status_idx'),
+            models.Index(fields=['-applied_at', '-id'], name='job_apps_applied_idx'),
+            models.Index(fields=['worker_phone', 'updated_at'], name='job_apps_worker_updated_idx'),
+            models.Index(fields=['job', 'updated_at'], name='job_apps_job_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Job {self.job.id} - Worker {self.worker_phone} ({self.status})"
@@ -126,6 +246,9 @@ class JobContact(models.Model):
     class Meta:
         db_table = 'job_contacts'
         unique_together = ('job', 'worker_phone')
+        indexes = [
+            models.Index(fields=['-contacted_at', '-id'], name='job_contacts_contacted_idx'),
+        ]
 
 class Booking(models.Model):
     employer_phone = models.ForeignKey(
@@ -143,7 +266,9 @@ class Booking(models.Model):
     description = models.TextField(blank=True)
     location = models.CharField(max_length=100, blank=True)
     category = models.CharField(max_length=50, blank=True)
+    work_date = models.DateField(null=True, blank=True)  # the day booked; empty books the day it is accepted
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     employer_response = models.BooleanField(null=True, default=None)
     worker_response = models.BooleanField(null=True, default=None)
     employer_complete = models.BooleanField(default=False)
@@ -155,4 +280,230 @@ class Booking(models.Model):
     )
 
     class Meta:
-        db_table = 'bookings'
\ No newline at end of file
+        db_table = 'bookings'
+        indexes = [
+            models.Index(fields=['worker_phone', '-created_at', '-id'], name='bookings_worker_created_idx'),
+            models.Index(fields=['employer_phone', '-created_at', '-id'], name='bookings_employer_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='bookings_created_idx'),
+            models.Index(fields=['worker_phone', 'updated_at'], name='bookings_worker_upd_idx'),
+            models.Index(fields=['employer_phone', 'updated_at'], name='bookings_employer_upd_idx'),
+            models.Index(fields=['status', 'updated_at'], name='bookings_status_upd_idx'),
+        ]
+
+class WorkerOccupancy(models.Model):
+    # a worker's calendar: one row per busy day, written by api/availability.py.
+    # Worker.is_available caches whether today has a row.
+    worker = models.ForeignKey(
+        Worker,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='worker_phone',
+        related_name='occupancy'
+    )
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=[('job', 'job'), ('booking', 'booking'), ('off', 'off')])
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'worker_occupancy'
+        # one commitment per worker and day; date first, so it is also the "busy on D" index
+        unique_together = ('date', 'worker')
+
+class Review(models.Model):
+    # written once through api/ratings.py, which folds it into the reviewee's running aggregates.
+    # No database constraint on the targets: reviews stay when api/sweeper.py moves the
+    # application/booking to the archive tables under the same id.
+    application = models.ForeignKey(
+        JobApplication,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='reviews',
+        db_constraint=False
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='reviews',
+        db_constraint=False
+    )
+    reviewer = models.CharField(max_length=10, choices=[('employer', 'employer'), ('worker', 'worker')])
+    # the two parties, copied from the application/booking; the reviewee is the side that is not the reviewer
+    worker_phone = models.ForeignKey(
+        Worker,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='worker_phone'
+    )
+    employer_phone = models.ForeignKey(
+        Employer,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='employer_phone'
+    )
+    rating = models.PositiveSmallIntegerField()  # 1-5
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reviews'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(application__isnull=False, booking__isnull=True)
+                | models.Q(application__isnull=True, booking__isnull=False),
+                name='reviews_one_target',
+            ),
+            models.CheckConstraint(condition=models.Q(rating__gte=1, rating__lte=5), name='reviews_rating_range'),
+            # one review per side per application/booking (NULL targets never collide)
+            models.UniqueConstraint(fields=['application', 'reviewer'], name='reviews_application_reviewer_uniq'),
+            models.UniqueConstraint(fields=['booking', 'reviewer'], name='reviews_booking_reviewer_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['worker_phone', '-created_at', '-id'], name='reviews_worker_created_idx'),
+            models.Index(fields=['employer_phone', '-created_at', '-id'], name='reviews_employer_created_idx'),
+        ]
+
+class Event(models.Model):
+    # change feed behind /api/events/, written by api/events.py in the same transaction as the change
+    kind = models.CharField(max_length=20, choices=[('job_application', 'job_application'), ('booking', 'booking')])
+    object_id = models.IntegerField()
+    status = models.CharField(max_length=40)
+    worker_phone = models.ForeignKey(
+        Worker,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='worker_phone',
+        related_name='+'
+    )
+    employer_phone = models.ForeignKey(
+        Employer,
+        on_delete=models.CASCADE,
+        to_field='phone',
+        db_column='employer_phone',
+        related_name='+'
+    )
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'events'
+        indexes = [
+            # "everything after id N for this phone", from either side
+            models.Index(fields=['worker_phone', 'id'], name='events_worker_id_idx'),
+            models.Index(fields=['employer_phone', 'id'], name='events_employer_id_idx'),
+        ]
+
+class Tombstone(models.Model):
+    # deleted rows, kept for delta sync (api/sync.py); plain phone columns so they outlive the rows they name
+    kind = models.CharField(
+        max_length=20,
+        choices=[('worker', 'worker'), ('job', 'job'), ('job_application', 'job_application'), ('booking', 'booking')]
+    )
+    object_id = models.CharField(max_length=20)
+    worker_phone = models.CharField(max_length=15, null=True, blank=True)
+    employer_phone = models.CharField(max_length=15, null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tombstones'
+        indexes = [
+            models.Index(fields=['worker_phone', 'deleted_at'], name='tombstones_worker_idx'),
+            models.Index(fields=['employer_phone', 'deleted_at'], name='tombstones_employer_idx'),
+        ]
+
+class IdempotencyKey(models.Model):
+    # Idempotency-Key of a POST and its stored response (api/idempotency.py); status is null while in flight
+    key = models.CharField(max_length=40, unique=True)
+    target = models.TextField()
+    status = models.PositiveSmallIntegerField(null=True)
+    claimed_until = models.DateTimeField(null=True)  # renewed while the request runs, null once answered
+    headers = models.JSONField(default=list)
+    content = models.BinaryField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+
+
+# -- archive -------------------------------------------------------------------
+# Finished jobs (with their applications and contacts) and bookings older than
+# SWEEP_ARCHIVE_AFTER_DAYS, moved out of the hot tables by api/sweeper.py under
+# their original ids. Phones are plain columns so history outlives the profiles;
+# the export endpoints read these tables along with the hot ones.
+
+class ArchivedJob(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    employer_phone = models.CharField(max_length=15)
+    work_type = models.CharField(max_length=100)
+    location = models.CharField(max_length=200)
+    work_date = models.DateField()
+    wage = models.DecimalField(max_digits=8, decimal_places=2)
+    detail = models.CharField(max_length=200)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'jobs_archive'
+        indexes = [
+            models.Index(fields=['employer_phone', 'work_date'], name='jobs_archive_employer_idx'),
+        ]
+
+class ArchivedJobApplication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    job = models.ForeignKey(ArchivedJob, on_delete=models.CASCADE, related_name='applications', db_column='job_id')
+    worker_phone = models.CharField(max_length=15)
+    worker_accept = models.BooleanField(default=False)
+    employer_accept = models.BooleanField(default=False)
+    worker_complete = models.BooleanField(default=False)
+    employer_complete = models.BooleanField(default=False)
+    status = models.CharField(max_length=40)
+    applied_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'job_applications_archive'
+        indexes = [
+            models.Index(fields=['worker_phone', 'applied_at'], name='job_apps_archive_worker_idx'),
+        ]
+
+class ArchivedJobContact(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    job = models.ForeignKey(ArchivedJob, on_delete=models.CASCADE, related_name='contacts', db_column='job_id')
+    worker_phone = models.CharField(max_length=15)
+    contacted_at = models.DateTimeField()
+    response = models.CharField(max_length=20, null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'job_contacts_archive'
+
+class ArchivedBooking(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    employer_phone = models.CharField(max_length=15)
+    worker_phone = models.CharField(max_length=15)
+    description = models.TextField(blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    category = models.CharField(max_length=50, blank=True)
+    work_date = models.DateField(null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    employer_response = models.BooleanField(null=True, default=None)
+    worker_response = models.BooleanField(null=True, default=None)
+    employer_complete = models.BooleanField(default=False)
+    worker_complete = models.BooleanField(default=False)
+    status = models.CharField(max_length=20)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'bookings_archive'
+        indexes = [
+            models.Index(fields=['employer_phone', 'created_at'], name='bookings_archive_employer_idx'),
+            models.Index(fields=['worker_phone', 'created_at'], name='bookings_archive_worker_idx'),
+        ]
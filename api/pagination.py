@@ -0,0 +1,152 @@
+# api/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the sort key of the last row served rather than by an
+offset, so the database seeks straight to the next page through the index on
+the ordering columns and page N costs the same as page 1.
+"""
+import base64
+import datetime
+import json
+import math
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only cursor pagination over a unique, non-null ordering tuple.
+
+    Views declare the ordering with ``keyset_ordering`` (e.g. ``('-created_at', '-id')``);
+    the last field must be unique so every row has a distinct position.
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        return self.finish_page(list(self.page_queryset(queryset, request, view, ordering)))
+
+    async def apaginate_queryset(self, queryset, request, view=None, ordering=None):
+        """``paginate_queryset`` for async views, fetching the page through the async ORM."""
+        page = self.page_queryset(queryset, request, view, ordering)
+        return self.finish_page([row async for row in page.aiterator(chunk_size=self.limit + 1)])
+
+    def page_queryset(self, queryset, request, view=None, ordering=None):
+        """The next ``page_size + 1`` rows after the cursor; the extra row tells whether there is a next page."""
+        self.request = request
+        self.ordering = tuple(ordering or getattr(view, 'keyset_ordering', self.ordering))
+        self.limit = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset[:self.limit + 1]
+
+    def finish_page(self, rows):
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_position = self.key_for(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def after(self, position):
+        """Rows strictly after ``position`` in the ordering, as a lexicographic OR of seeks."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def key_for(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            values.append(row[name] if isinstance(row, dict) else getattr(row, name))
+        return values
+
+    def encode_cursor(self, position):
+        values = [v.isoformat() if isinstance(v, (datetime.date, datetime.time)) else str(v) for v in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, queryset):
+        """The position in a ``?cursor=``, typed like the ordering columns; ``NotFound`` if it is not one of ours."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self.to_python(queryset, field.lstrip('-'), value) for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, queryset, name, value):
+        # the ordering columns are never null, so neither is a position we handed out
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise ValueError(name)
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            field = annotation.output_field
+        else:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = queryset.model._meta.pk if name == 'pk' else None
+            if field is None:
+                raise ValueError(name)
+        value = field.to_python(value)
+        if value is None or (isinstance(value, float) and not math.isfinite(value)):
+            raise ValueError(name)
+        return value
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,170 @@
+# api/pincodes.py
+"""
+Offline pincode -> coordinates lookup, for workers and employers that give a
+pincode but no GPS position.
+
+The table is a binary file built once with ``manage.py build_pincode_table``
+from a pincode-centroid CSV. Layout, little-endian:
+
+    b"PINCODE1", uint32 count, 4 bytes padding
+    count x uint32 pincode, sorted
+    count x float32 (latitude, longitude), in the same order
+
+It is opened read-only with ``mmap`` and a lookup is a ``bisect`` over a
+memoryview of the pincode column, so nothing is parsed or copied onto the
+heap and every process (each gunicorn worker) maps the same page-cache pages:
+one copy of the table in RAM however many workers run. The ~19k Indian
+pincodes take about 230 KB.
+
+``PINCODE_TABLE_PATH`` points at the file; without it lookups return None.
+There is no network access at runtime.
+"""
+import bisect
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache, geo, matching
+from .models import Worker
+
+MAGIC = b"PINCODE1"
+HEADER = struct.Struct("<8sI4x")
+POINT = struct.Struct("<ff")
+
+PINCODE_RE = re.compile(r"^[1-9][0-9]{5}$")
+
+
+def normalize(pincode):
+    """The pincode as an int, or None unless it is six digits (spaces allowed, as in "411 001")."""
+    value = re.sub(r"\s", "", str(pincode or ""))
+    return int(value) if PINCODE_RE.match(value) else None
+
+
+class PincodeTable:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._map) if len(self._map) >= HEADER.size else (None, 0)
+        if magic != MAGIC or len(self._map) != HEADER.size + count * (4 + POINT.size):
+            raise ValueError(f"{path} is not a pincode table")
+        self._count = count
+        self._points = HEADER.size + count * 4
+        self._pincodes = memoryview(self._map)[HEADER.size:self._points].cast("I")
+        if sys.byteorder != "little":
+            self._pincodes = array("I", self._pincodes)  # a private copy, only on big-endian hosts
+            self._pincodes.byteswap()
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, pincode):
+        """``(latitude, longitude)`` of the pincode's centroid, or None."""
+        code = normalize(pincode)
+        if code is None:
+            return None
+        i = bisect.bisect_left(self._pincodes, code)
+        if i == self._count or self._pincodes[i] != code:
+            return None
+        lat, lon = POINT.unpack_from(self._map, self._points + i * POINT.size)
+        return round(lat, 5), round(lon, 5)  # float32 is good to about a metre; drop the noise digits
+
+    @staticmethod
+    def write(path, points):
+        """Write ``{pincode: (latitude, longitude)}`` as a table.
+
+        The file is replaced atomically: running processes keep reading the
+        table they mapped and pick up the new one when they restart.
+        """
+        codes = sorted(points)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(codes)))
+            f.write(struct.pack(f"<{len(codes)}I", *codes))
+            for code in codes:
+                f.write(POINT.pack(*points[code]))
+        os.replace(tmp, path)
+
+
+@lru_cache(maxsize=None)
+def table():
+    path = getattr(settings, "PINCODE_TABLE_PATH", None)
+    if not path or not os.path.exists(path):
+        return None
+    return PincodeTable(path)
+
+
+def coordinates(pincode):
+    """``(latitude, longitude)`` for a pincode, or None when it (or the table) is unknown."""
+    pincodes = table()
+    return pincodes.lookup(pincode) if pincodes is not None else None
+
+
+def fill_coordinates(data, instance=None):
+    """Add the pincode's coordinates to serializer ``data`` that would leave the row without any."""
+    def value(name):
+        return data[name] if name in data else getattr(instance, name, None)
+
+    if value("latitude") is None or value("longitude") is None:
+        point = coordinates(value("pincode"))
+        if point is not None:
+            data["latitude"], data["longitude"] = point
+    return data
+
+
+def backfill(queryset, batch_size=1000):
+    """Fill in the missing coordinates of ``queryset`` rows from their pincode; returns the rows filled."""
+    if table() is None:
+        return 0
+    model = queryset.model
+    missing = (
+        queryset.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+        .exclude(Q(pincode__isnull=True) | Q(pincode=""))
+        .order_by("pk")
+        .only("pk", "pincode")
+    )
+    has_cell = any(field.name == "geo_cell" for field in model._meta.concrete_fields)
+    fields = ["latitude", "longitude", "updated_at"] + (["geo_cell"] if has_cell else [])
+
+    filled = 0
+    last = None
+    while True:
+        # rows with an unknown pincode stay missing, so walk the primary key rather than re-querying
+        rows = list((missing if last is None else missing.filter(pk__gt=last))[:batch_size])
+        if not rows:
+            return filled
+        last = rows[-1].pk
+        now = timezone.now()
+        changed = []
+        for row in rows:
+            point = coordinates(row.pincode)
+            if point is None:
+                continue
+            row.latitude, row.longitude = point
+            row.updated_at = now
+            if has_cell:
+                row.geo_cell = geo.cell_for(*point)
+            changed.append(row)
+        with transaction.atomic():
+            model.objects.bulk_update(changed, fields)
+            _changed(model, [row.pk for row in changed])
+        filled += len(changed)
+        if len(rows) < batch_size:
+            return filled
+
+
+def _changed(model, pks):
+    """What the post_save signals would have done; ``bulk_update`` does not send them."""
+    if model is Worker:
+        matching.workers_changed(pks)
+        cache.invalidate_workers(pks)
+    else:
+        cache.invalidate(model, pks)
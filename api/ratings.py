@@ -0,0 +1,100 @@
+# api/ratings.py
+"""
+Reviews and running rating aggregates.
+
+Each worker and employer keeps ``rating_sum`` and ``rating_count``; a new
+review adds to them with one ``UPDATE ... SET rating_sum = rating_sum + n``
+in the same transaction as the review insert, so no average is ever
+recomputed over the review history. The same statement refreshes the plain
+average (``rating``) and the Bayesian-adjusted ``rating_score``
+
+    (PRIOR_WEIGHT * PRIOR_MEAN + rating_sum) / (PRIOR_WEIGHT + rating_count)
+
+which pulls sparsely reviewed profiles towards the prior, so one 5-star
+review does not outrank fifty 4.8s. ``rating_score`` is indexed on workers
+for "top rated" listings.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from . import cache, matching
+from .models import RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT, Worker, Employer, Review
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+
+class ReviewError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def averages(total, count):
+    """``(rating, rating_score)`` for a running sum and count, as stored on the profile."""
+    rating = round(total / count, 1) if count else 0
+    score = (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + total) / (RATING_PRIOR_WEIGHT + count)
+    return rating, score
+
+
+def _aggregate_updates(rating):
+    # SET expressions all read the row's values from before the update
+    total = F("rating_sum") + rating
+    count = F("rating_count") + 1
+    as_float = Value(1.0, output_field=FloatField())
+    return {
+        "rating_sum": total,
+        "rating_count": count,
+        "rating": Round(total * as_float / count, 1),
+        "rating_score": (Value(RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN) + total * as_float)
+        / (Value(RATING_PRIOR_WEIGHT) + count),
+    }
+
+
+def _target(application, booking):
+    """Parties of the completed application or booking being reviewed."""
+    if (application is None) == (booking is None):
+        raise ReviewError("Exactly one of application or booking is required")
+    if application is not None:
+        target, employer_phone = application, application.job.employer_phone_id
+    else:
+        target, employer_phone = booking, booking.employer_phone_id
+    if target.status != "completed":
+        raise ReviewError("Only completed work can be reviewed", status=409)
+    return target.worker_phone_id, employer_phone
+
+
+def submit_review(reviewer, rating, comment="", application=None, booking=None):
+    """Store the review and fold it into the reviewee's aggregates; the employer reviews the worker and vice versa."""
+    worker_phone, employer_phone = _target(application, booking)
+    try:
+        with transaction.atomic():
+            review = Review.objects.create(
+                application=application,
+                booking=booking,
+                reviewer=reviewer,
+                worker_phone_id=worker_phone,
+                employer_phone_id=employer_phone,
+                rating=rating,
+                comment=comment,
+            )
+            if reviewer == "employer":
+                Worker.objects.filter(phone=worker_phone).update(
+                    updated_at=timezone.now(), **_aggregate_updates(rating)
+                )
+            else:
+                Employer.objects.filter(phone=employer_phone).update(
+                    updated_at=timezone.now(), **_aggregate_updates(rating)
+                )
+    except IntegrityError:
+        raise ReviewError(f"The {reviewer} has already reviewed this", status=409)
+
+    # QuerySet.update bypasses post_save
+    if reviewer == "employer":
+        matching.workers_changed([worker_phone])
+        cache.invalidate_worker(worker_phone)
+    else:
+        cache.invalidate(Employer, [employer_phone])
+    return review
@@ -1,20 +1,64 @@
 # shramo/serializers.py
+from django.db import transaction
 from rest_framework import serializers
-from .models import Worker, Employer, Job, JobApplication,JobContact,Booking
+from .models import Worker, Employer, Job, JobApplication,JobContact,Booking,WorkerStats,Review
+from .pincodes import fill_coordinates
+from .skills import sync_worker_skills
+from .middleware import SerializeTimingMixin
+from .sparse import SparseFieldsMixin
+
+
+class PincodeCoordinatesMixin:
+    # coordinates from the offline pincode table (api/pincodes.py) when a save leaves the row without any
+    def create(self, validated_data):
+        return super().create(fill_coordinates(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, fill_coordinates(validated_data, instance))
+
+class WorkerSerializer(SparseFieldsMixin, SerializeTimingMixin, PincodeCoordinatesMixin, serializers.ModelSerializer):
+    distance_km = serializers.FloatField(read_only=True)  # only set by the nearby search
 
-class WorkerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Worker
         fields = '__all__'
-        read_only_fields = ('rating',)
+        # is_available caches today's calendar (api/availability.py); days off go through /calendar/
+        read_only_fields = ('rating', 'rating_sum', 'rating_count', 'rating_score', 'is_available')
 
-class EmployerSerializer(serializers.ModelSerializer):
+    # keep the WorkerSkill index in step with the comma separated skills string
+    def create(self, validated_data):
+        with transaction.atomic():
+            worker = super().create(validated_data)
+            sync_worker_skills([worker])
+        return worker
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            worker = super().update(instance, validated_data)
+            if 'skills' in validated_data:
+                sync_worker_skills([worker])
+        return worker
+
+class WorkerStatsSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WorkerStats
+        fields = '__all__'
+
+class WorkerImportSerializer(WorkerSerializer):
+    # bulk import upserts on phone, so an existing phone is not a validation error
+    phone = serializers.CharField(max_length=15)
+
+    class Meta(WorkerSerializer.Meta):
+        exclude = ('geo_cell',)
+        fields = None
+
+class EmployerSerializer(SparseFieldsMixin, SerializeTimingMixin, PincodeCoordinatesMixin, serializers.ModelSerializer):
     class Meta:
         model = Employer
         fields = '__all__'
-        read_only_fields = ('rating',)
+        read_only_fields = ('rating', 'rating_sum', 'rating_count', 'rating_score')
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
     worker = WorkerSerializer(source="worker_phone", read_only=True)
     worker_phone = serializers.CharField(write_only=True)
 
@@ -30,7 +74,7 @@ class JobApplicationSerializer(serializers.ModelSerializer):
 
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
     applications = JobApplicationSerializer(many=True, read_only=True)
 
     class Meta:
@@ -38,20 +82,45 @@ class JobSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('status', 'created_at')
 
+
+class JobFeedSerializer(JobSerializer):
+    # what a worker browsing the feed sees: the job and its ranking, not who else applied
+    applications = None
+    feed_score = serializers.FloatField(read_only=True)
+    distance_km = serializers.FloatField(read_only=True)
+
+
+class JobImportSerializer(serializers.ModelSerializer):
+    # employers are checked in one query per chunk rather than one per row
+    employer_phone = serializers.CharField(max_length=15)
+
+    class Meta:
+        model = Job
+        exclude = ('id', 'status', 'created_at')
+
     
-class JobContactSerializer(serializers.ModelSerializer):
+class JobContactSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = JobContact
         fields = '__all__'
 
-class BookingSerializer(serializers.ModelSerializer):
+class PhoneRelatedField(serializers.SlugRelatedField):
+    # the phone slug is the target's primary key: read it off the foreign key column, so a
+    # booking serialized without its nested employer/worker does not load them one by one
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_representation(self, value):
+        return value.pk
+
+class BookingSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
     employer = EmployerSerializer(source="employer_phone", read_only=True)
     worker = WorkerSerializer(source="worker_phone", read_only=True)
-    employer_phone = serializers.SlugRelatedField(
+    employer_phone = PhoneRelatedField(
         queryset=Employer.objects.all(),
         slug_field='phone'
     )
-    worker_phone = serializers.SlugRelatedField(
+    worker_phone = PhoneRelatedField(
         queryset=Worker.objects.all(),
         slug_field='phone'
     )
@@ -59,4 +128,17 @@ class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
-        read_only_fields = ('status', 'created_at')
\ No newline at end of file
+        read_only_fields = ('status', 'created_at')
+
+class ReviewSerializer(SparseFieldsMixin, SerializeTimingMixin, serializers.ModelSerializer):
+    application = serializers.PrimaryKeyRelatedField(
+        queryset=JobApplication.objects.select_related('job'), required=False, allow_null=True
+    )
+    booking = serializers.PrimaryKeyRelatedField(queryset=Booking.objects.all(), required=False, allow_null=True)
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+
+    class Meta:
+        model = Review
+        fields = '__all__'
+        read_only_fields = ('worker_phone', 'employer_phone', 'created_at')
+        validators = []  # duplicates are caught by the unique constraints in api/ratings.py
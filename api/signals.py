@@ -0,0 +1,81 @@
+# api/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, events, matching
+from .models import Worker, Employer, Job, JobApplication, Booking, Tombstone
+
+
+@receiver([post_save, post_delete], sender=Worker)
+def refresh_matching_index(sender, instance, **kwargs):
+    matching.workers_changed([instance.phone])
+
+
+# -- detail payload cache ------------------------------------------------------
+
+@receiver([post_save, post_delete], sender=Worker)
+def invalidate_worker(sender, instance, **kwargs):
+    cache.invalidate_worker(instance.phone)
+
+
+@receiver([post_save, post_delete], sender=Employer)
+def invalidate_employer(sender, instance, **kwargs):
+    cache.invalidate(Employer, [instance.phone])
+
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_job(sender, instance, **kwargs):
+    cache.invalidate(Job, [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=JobApplication)
+def invalidate_application_job(sender, instance, **kwargs):
+    cache.invalidate(Job, [instance.job_id])
+
+
+# -- change feed ---------------------------------------------------------------
+# transitions change status with QuerySet.update and publish their own events
+
+@receiver(post_save, sender=JobApplication)
+def publish_application(sender, instance, **kwargs):
+    events.application_changed(
+        instance.pk, instance.status, instance.worker_phone_id, instance.job.employer_phone_id, instance.job_id
+    )
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking(sender, instance, **kwargs):
+    events.booking_changed(instance.pk, instance.status, instance.worker_phone_id, instance.employer_phone_id)
+
+
+# -- delta sync tombstones -----------------------------------------------------
+
+@receiver(post_delete, sender=Worker)
+def tombstone_worker(sender, instance, **kwargs):
+    Tombstone.objects.create(kind="worker", object_id=instance.phone, worker_phone=instance.phone)
+
+
+@receiver(post_delete, sender=Job)
+def tombstone_job(sender, instance, **kwargs):
+    # applicants get the cascaded application tombstones
+    Tombstone.objects.create(kind="job", object_id=instance.pk, employer_phone=instance.employer_phone_id)
+
+
+@receiver(post_delete, sender=JobApplication)
+def tombstone_application(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind="job_application",
+        object_id=instance.pk,
+        worker_phone=instance.worker_phone_id,
+        employer_phone=Job.objects.filter(pk=instance.job_id).values_list("employer_phone", flat=True).first(),
+    )
+
+
+@receiver(post_delete, sender=Booking)
+def tombstone_booking(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind="booking",
+        object_id=instance.pk,
+        worker_phone=instance.worker_phone_id,
+        employer_phone=instance.employer_phone_id,
+    )
@@ -0,0 +1,53 @@
+# api/skills.py
+"""
+Normalized skill vocabulary.
+
+``Worker.skills`` stays the comma separated string clients send, but every
+write also syncs it into ``Skill``/``WorkerSkill`` so skill searches are exact,
+index-backed lookups instead of ``LIKE '%...%'`` scans.
+"""
+import re
+
+from django.db import transaction
+
+from .models import Skill, WorkerSkill
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_skill(name):
+    return _WHITESPACE.sub(" ", (name or "").strip().lower())
+
+
+def parse_skills(value):
+    """Split a comma separated skills string (or list) into unique normalized names, keeping order."""
+    if not value:
+        return []
+    parts = value.split(",") if isinstance(value, str) else value
+    names = []
+    for part in parts:
+        name = normalize_skill(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_worker_skills(workers):
+    """Rebuild the WorkerSkill rows for the given workers from their ``skills`` strings."""
+    wanted = {worker.phone: parse_skills(worker.skills) for worker in workers}
+    names = {name for skill_names in wanted.values() for name in skill_names}
+
+    with transaction.atomic():
+        if names:
+            Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+        skill_ids = dict(Skill.objects.filter(name__in=names).values_list("name", "id"))
+
+        WorkerSkill.objects.filter(worker_id__in=list(wanted)).delete()
+        WorkerSkill.objects.bulk_create(
+            [
+                WorkerSkill(worker_id=phone, skill_id=skill_ids[name])
+                for phone, skill_names in wanted.items()
+                for name in skill_names
+            ],
+            ignore_conflicts=True,
+        )
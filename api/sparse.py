@@ -0,0 +1,190 @@
+# api/sparse.py
+"""
+Sparse fieldsets: ``?fields=`` and ``?expand=`` on GET requests.
+
+    ?fields=id,status,worker.name       only these fields; a dotted name reaches into a relation
+    ?expand=worker,applications.worker  nested relations to embed
+
+Without either parameter responses are unchanged and every nested relation is
+embedded. Once either is given, nested relations (``JobSerializer.applications``,
+``BookingSerializer.employer``/``worker``, ...) are only embedded when named in
+``expand`` or ``fields``, and the SQL shrinks with the response: the views
+``only()`` the columns behind the kept fields and drop the select/prefetch
+related lookups of relations that are not expanded (``expandable`` on the view).
+
+A list request whose ``fields`` are all plain columns skips model instances
+and serializers altogether and renders straight from ``.values()`` rows.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+# field types whose representation differs from the raw column value
+CONVERTED = (
+    serializers.DecimalField,
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DurationField,
+    serializers.UUIDField,
+)
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _heads(paths):
+    return {path.split(".", 1)[0] for path in paths}
+
+
+class Spec:
+    """What a sparse request keeps: ``fields`` is None when only ``expand`` narrows it down."""
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = None if fields is None else set(fields)
+        self.expand = set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None  # writes always validate and echo the full serializer
+        params = request.query_params
+        if "fields" not in params and "expand" not in params:
+            return None
+        return cls(_split(params.get("fields")) or None, _split(params.get("expand")))
+
+    def keeps(self, name):
+        return self.fields is None or name in _heads(self.fields)
+
+    def expands(self, name):
+        return name in _heads(self.expand) or (self.fields is not None and name in _heads(self.fields))
+
+    def child(self, name):
+        """The spec for the relation ``name``, from the dotted paths under it."""
+        prefix = name + "."
+        fields = {path[len(prefix):] for path in self.fields or () if path.startswith(prefix)}
+        expand = {path[len(prefix):] for path in self.expand if path.startswith(prefix)}
+        return Spec(fields or None, expand)
+
+    def key(self):
+        """Canonical form, for cache keys."""
+        return "fields={}&expand={}".format(
+            ",".join(sorted(self.fields)) if self.fields is not None else "*", ",".join(sorted(self.expand))
+        )
+
+
+class SparseFieldsMixin:
+    """Serializer side: leaves out the fields and relations a sparse request did not ask for."""
+
+    sparse = None  # set on nested serializers by their parent
+
+    def sparse_spec(self):
+        if self.sparse is not None:
+            return self.sparse
+        parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        if parent is not None:
+            return None  # nested under a serializer that did not pass a spec down
+        return Spec.from_request(self.context.get("request"))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.sparse_spec()
+        if spec is None:
+            return fields
+        kept = {}
+        for name, field in fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                if not spec.expands(name):
+                    continue
+                nested = field.child if isinstance(field, serializers.ListSerializer) else field
+                nested.sparse = spec.child(name)
+            elif not spec.keeps(name):
+                continue
+            kept[name] = field
+        return kept
+
+
+def _lookup(spec, name, expandable):
+    """The lookup for relation ``name``: the most specific ``expandable`` entry the request expands."""
+    child = spec.child(name)
+    for key, lookup in expandable.items():
+        head, _, rest = key.partition(".")
+        if head == name and rest and child.expands(rest):
+            return lookup
+    return expandable.get(name)
+
+
+def restrict(queryset, serializer, expandable):
+    """Narrow ``queryset`` to what a sparse request serializes; unchanged for a normal request.
+
+    ``expandable`` maps a nested serializer field to the ``select_related`` path
+    (a string) or ``Prefetch`` it needs. Dotted keys (``"applications.worker"``)
+    give the lookup to use when the relation is expanded one level further.
+    """
+    spec = serializer.sparse_spec()
+    if spec is None:
+        return queryset
+    meta = queryset.model._meta
+    concrete = {field.name for field in meta.concrete_fields}
+    columns = {meta.pk.name}
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    for name, field in serializer.fields.items():
+        if field.source in concrete:
+            columns.add(field.source)  # a plain column, or the foreign key behind a nested relation
+        if not isinstance(field, serializers.BaseSerializer):
+            continue
+        lookup = _lookup(spec, name, expandable)
+        if isinstance(lookup, str):
+            queryset = queryset.select_related(lookup)
+        elif lookup is not None:
+            queryset = queryset.prefetch_related(lookup)
+
+    if spec.fields is not None:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+def keep_columns(queryset, names):
+    """Undefer ``names`` (e.g. the keyset ordering) on a queryset ``restrict`` narrowed with ``only()``."""
+    loaded, deferred = queryset.query.deferred_loading
+    if not loaded or deferred:
+        return queryset
+    concrete = {field.name for field in queryset.model._meta.concrete_fields}
+    return queryset.only(*loaded, *(name for name in names if name in concrete))
+
+
+def flat_columns(serializer, queryset):
+    """``[(name, source, convert)]`` when every requested field is a plain column of ``queryset``, else None."""
+    spec = serializer.sparse_spec()
+    if spec is None or spec.fields is None:
+        return None
+    available = {field.name for field in queryset.model._meta.concrete_fields} | set(queryset.query.annotations)
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+            return None
+        if field.source not in available:
+            return None
+        convert = field.to_representation if isinstance(field, CONVERTED) else None
+        columns.append((name, field.source, convert))
+    return columns
+
+
+def values(queryset, columns, ordering):
+    """``.values()`` of ``columns`` plus the ordering columns the keyset paginator reads its cursor from."""
+    names = list(dict.fromkeys([source for _, source, _ in columns] + [field.lstrip("-") for field in ordering]))
+    return queryset.values(*names)
+
+
+def render(rows, columns):
+    """Rows from ``values()`` in the shape the serializer would have produced."""
+    return [
+        {
+            name: convert(row[source]) if convert is not None and row[source] is not None else row[source]
+            for name, source, convert in columns
+        }
+        for row in rows
+    ]
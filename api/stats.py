@@ -0,0 +1,44 @@
+# api/stats.py
+"""
+Incrementally maintained per-worker summary (``WorkerStats``).
+
+Called from the completion transitions, inside their transaction, so the
+summary can never disagree with the history it was derived from.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import WorkerStats
+
+
+def _record(phone, completed_jobs=0, completed_bookings=0, earnings=0):
+    today = timezone.localdate()
+    increments = {
+        "completed_jobs": F("completed_jobs") + completed_jobs,
+        "completed_bookings": F("completed_bookings") + completed_bookings,
+        "total_earnings": F("total_earnings") + earnings,
+        "last_active": today,
+    }
+    if WorkerStats.objects.filter(worker_id=phone).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            WorkerStats.objects.create(
+                worker_id=phone,
+                completed_jobs=completed_jobs,
+                completed_bookings=completed_bookings,
+                total_earnings=earnings,
+                last_active=today,
+            )
+    except IntegrityError:
+        # a concurrent completion created the row first
+        WorkerStats.objects.filter(worker_id=phone).update(**increments)
+
+
+def job_completed(phone, wage):
+    _record(phone, completed_jobs=1, earnings=wage or 0)
+
+
+def booking_completed(phone):
+    _record(phone, completed_bookings=1)
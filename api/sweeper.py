@@ -0,0 +1,240 @@
+# api/sweeper.py
+"""
+Expiry and archival, run by ``manage.py sweep`` or in the web process every
+``SWEEP_INTERVAL_SECONDS``.
+
+* Open jobs whose ``work_date`` has passed become ``expired``, and their
+  undecided applications are declined (with a change-feed event each).
+* Finished jobs (with their applications and contacts) and finished bookings
+  untouched for ``SWEEP_ARCHIVE_AFTER_DAYS`` move to the ``*_archive`` tables
+  under the same ids, so the hot tables and their indexes only hold live
+  work. Reviews keep pointing at the archived ids; exports read both.
+* Change-feed events and delta-sync tombstones past their retention are deleted,
+  and so are calendar days that have passed and expired idempotency keys.
+* ``Worker.is_available`` is brought in line with today's calendar as the
+  days roll over (api/availability.py); run the sweep at least daily.
+
+Everything runs in batches of ``SWEEP_BATCH_SIZE`` rows, one transaction per
+batch, picked straight from the hot tables: a sweep stopped half-way loses
+nothing and the next one carries on from there. On Postgres batches are
+locked with ``SKIP LOCKED``, so sweepers in several processes never take the
+same rows.
+
+Archived rows are removed with plain ``DELETE`` rather than
+``QuerySet.delete()``: they are history, not deletions, so no cascade or
+tombstone should follow.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from . import availability, cache, events
+from .models import (
+    Job, JobApplication, JobContact, Booking, Event, Tombstone, WorkerOccupancy, IdempotencyKey,
+    ArchivedJob, ArchivedJobApplication, ArchivedJobContact, ArchivedBooking,
+)
+
+logger = logging.getLogger(__name__)
+
+FINISHED_JOB = ("completed", "expired")
+FINISHED_BOOKING = ("completed", "declined")
+UNDECIDED_APPLICATION = ("pending", "waiting_for_worker_confirmation")
+
+
+def _batch(queryset, size):
+    """Primary keys of the next batch; on Postgres locked, skipping rows another sweeper holds."""
+    return list(queryset.select_for_update(skip_locked=True).values_list("pk", flat=True)[:size])
+
+
+def _until_done(step, batch_size):
+    """Run ``step(batch_size)`` until a batch comes back short; rows handled in total."""
+    total = 0
+    while True:
+        done = step(batch_size)
+        total += done
+        if done < batch_size:
+            return total
+
+
+def _copy(queryset, archive):
+    """Insert the rows of ``queryset`` into ``archive``, ids included."""
+    fields = [field for field in archive._meta.concrete_fields if field.name != "archived_at"]
+    rows = queryset.values_list(*(field.name for field in fields))
+    archive.objects.bulk_create(
+        [archive(**{field.attname: value for field, value in zip(fields, row)}) for row in rows]
+    )
+
+
+def _delete(model, column, values):
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {connection.ops.quote_name(column)} IN ({placeholders})", values)
+
+
+def expire_jobs(batch_size, today=None):
+    """Open jobs dated before ``today`` become expired; their undecided applications are declined."""
+    today = today or timezone.localdate()
+
+    def step(size):
+        with transaction.atomic():
+            ids = _batch(Job.objects.filter(status="open", work_date__lt=today), size)
+            if not ids:
+                return 0
+            now = timezone.now()
+            Job.objects.filter(pk__in=ids).update(status="expired", updated_at=now)
+            undecided = list(
+                JobApplication.objects.filter(job_id__in=ids, status__in=UNDECIDED_APPLICATION).values_list(
+                    "pk", "worker_phone", "job__employer_phone", "job_id"
+                )
+            )
+            JobApplication.objects.filter(pk__in=[row[0] for row in undecided]).update(
+                status="declined", updated_at=now
+            )
+            events.record_many("job_application", [
+                (pk, "declined", worker_phone, employer_phone, {"job_id": job_id})
+                for pk, worker_phone, employer_phone, job_id in undecided
+            ])
+            cache.invalidate(Job, ids)
+        return len(ids)
+
+    return _until_done(step, batch_size)
+
+
+def archive_jobs(before, batch_size):
+    """Move finished jobs last changed before ``before``, with their applications and contacts."""
+
+    def step(size):
+        with transaction.atomic():
+            ids = _batch(Job.objects.filter(status__in=FINISHED_JOB, updated_at__lt=before), size)
+            if not ids:
+                return 0
+            _copy(Job.objects.filter(pk__in=ids), ArchivedJob)
+            _copy(JobApplication.objects.filter(job_id__in=ids), ArchivedJobApplication)
+            _copy(JobContact.objects.filter(job_id__in=ids), ArchivedJobContact)
+            WorkerOccupancy.objects.filter(application__job_id__in=ids).delete()
+            _delete(JobContact, "job_id", ids)
+            _delete(JobApplication, "job_id", ids)
+            _delete(Job, "id", ids)
+            cache.invalidate(Job, ids)
+        return len(ids)
+
+    return _until_done(step, batch_size)
+
+
+def archive_bookings(before, batch_size):
+    """Move finished bookings last changed before ``before``."""
+
+    def step(size):
+        with transaction.atomic():
+            ids = _batch(Booking.objects.filter(status__in=FINISHED_BOOKING, updated_at__lt=before), size)
+            if not ids:
+                return 0
+            _copy(Booking.objects.filter(pk__in=ids), ArchivedBooking)
+            WorkerOccupancy.objects.filter(booking_id__in=ids).delete()
+            _delete(Booking, "id", ids)
+        return len(ids)
+
+    return _until_done(step, batch_size)
+
+
+def prune(model, field, before, batch_size):
+    """Delete rows of an append-only table whose ``field`` is before ``before``, oldest first.
+
+    Ids follow ``field`` in these tables, so the old rows are the lowest ids and
+    each batch is read from the start of the primary key index.
+    """
+
+    def step(size):
+        oldest = model.objects.order_by("pk").values_list(field, flat=True).first()
+        if oldest is None or oldest >= before:
+            return 0  # without this the query below would walk the whole index finding nothing
+        with transaction.atomic():
+            ids = _batch(model.objects.filter(**{f"{field}__lt": before}).order_by("pk"), size)
+            model.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    return _until_done(step, batch_size)
+
+
+def clear_past_days(batch_size, today=None):
+    """Delete calendar rows for days before ``today``; they no longer decide anyone's availability."""
+    today = today or timezone.localdate()
+
+    def step(size):
+        with transaction.atomic():
+            ids = _batch(WorkerOccupancy.objects.filter(date__lt=today), size)
+            WorkerOccupancy.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    return _until_done(step, batch_size)
+
+
+def refresh_availability(batch_size, today=None):
+    """Rewrite ``is_available`` of workers whose calendar for ``today`` says otherwise."""
+
+    def step(size):
+        return len(availability.refresh(list(availability.stale(today).values_list("phone", flat=True)[:size]), today))
+
+    return _until_done(step, batch_size)
+
+
+def sweep(batch_size=None, archive_after_days=None):
+    """One full pass; returns the number of rows each stage handled."""
+    batch_size = batch_size or getattr(settings, "SWEEP_BATCH_SIZE", 500)
+    if archive_after_days is None:
+        archive_after_days = getattr(settings, "SWEEP_ARCHIVE_AFTER_DAYS", 90)
+    now = timezone.now()
+    archive_before = now - timedelta(days=archive_after_days)
+    events_before = now - timedelta(days=getattr(settings, "EVENTS_RETENTION_DAYS", 30))
+    tombstones_before = now - timedelta(days=getattr(settings, "TOMBSTONE_RETENTION_DAYS", 90))
+    keys_before = now - timedelta(seconds=getattr(settings, "IDEMPOTENCY_TTL", 86400))
+    return {
+        "expired_jobs": expire_jobs(batch_size),
+        "past_days": clear_past_days(batch_size),
+        "availability_changes": refresh_availability(batch_size),
+        "archived_jobs": archive_jobs(archive_before, batch_size),
+        "archived_bookings": archive_bookings(archive_before, batch_size),
+        "pruned_events": prune(Event, "created_at", events_before, batch_size),
+        "pruned_tombstones": prune(Tombstone, "deleted_at", tombstones_before, batch_size),
+        "pruned_idempotency_keys": prune(IdempotencyKey, "created_at", keys_before, batch_size),
+    }
+
+
+class Scheduler:
+    """Runs ``sweep()`` every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread = threading.Thread(target=self.run, name="sweeper", daemon=True)
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                logger.info("Sweep done: %s", sweep())
+            except Exception:
+                logger.exception("Sweep failed")
+            finally:
+                connections.close_all()  # this thread's connections, not held between sweeps
+
+
+@lru_cache(maxsize=None)
+def scheduler():
+    interval = getattr(settings, "SWEEP_INTERVAL_SECONDS", 0)
+    if interval <= 0:
+        return None
+    scheduled = Scheduler(interval)
+    scheduled.thread.start()
+    return scheduled
+
+
+def start_scheduler(**kwargs):
+    """``request_started`` receiver: only processes that serve requests sweep in the background."""
+    scheduler()
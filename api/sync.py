@@ -0,0 +1,121 @@
+# api/sync.py
+"""
+Delta sync for offline clients: everything relevant to one phone that changed
+since a cursor.
+
+Rows are selected on ``updated_at`` through the ``(owner, updated_at)``
+indexes, deletions come from ``Tombstone`` rows. A cursor is the time the
+previous sync started, minus ``OVERLAP``: a transaction can commit after a
+later one that the client already saw, and the overlap makes sure its rows
+are still picked up. Rows inside the overlap are sent again, so clients must
+apply the payload as upserts (keyed on ``id``/``phone``), which they have to
+do anyway.
+
+Tombstones are only kept for ``TOMBSTONE_RETENTION_DAYS`` (api/sweeper.py), so
+an older cursor could miss deletions and is refused: the client syncs again
+from scratch.
+
+Only flat column values go out, no nested serializers, to keep the payload
+small on slow connections.
+"""
+import base64
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Worker, Employer, Job, JobApplication, Booking, Tombstone
+
+OVERLAP = datetime.timedelta(seconds=5)
+
+WORKER_FIELDS = (
+    "phone", "name", "location", "skills", "is_available", "rating", "latitude", "longitude",
+    "pincode", "age", "gender", "has_phone", "wages", "updated_at",
+)
+EMPLOYER_FIELDS = ("phone", "name", "location", "rating", "pincode", "latitude", "longitude", "updated_at")
+JOB_FIELDS = (
+    "id", "employer_phone", "work_type", "location", "work_date", "wage", "detail", "status",
+    "created_at", "updated_at",
+)
+APPLICATION_FIELDS = (
+    "id", "job_id", "worker_phone", "status", "worker_accept", "employer_accept",
+    "worker_complete", "employer_complete", "applied_at", "updated_at",
+)
+BOOKING_FIELDS = (
+    "id", "employer_phone", "worker_phone", "description", "location", "category", "work_date", "status",
+    "employer_response", "worker_response", "employer_complete", "worker_complete", "created_at", "updated_at",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        moment = parse_datetime(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode())
+    except (TypeError, ValueError):
+        moment = None
+    if moment is None or timezone.is_naive(moment):
+        raise InvalidCursor("Invalid cursor")
+    retention = datetime.timedelta(days=getattr(settings, "TOMBSTONE_RETENTION_DAYS", 90))
+    if moment < timezone.now() - retention:
+        raise InvalidCursor("Cursor expired, sync again without a cursor")
+    return moment
+
+
+def changes(phone, since=None):
+    """Payload for ``phone`` (a worker, an employer or both) of rows changed at or after ``since``; None for unknown phones."""
+    started = timezone.now()
+
+    def changed(queryset, field="updated_at"):
+        return queryset.filter(**{f"{field}__gte": since}) if since is not None else queryset
+
+    payload = {"worker": None, "employer": None, "jobs": [], "applications": [], "bookings": []}
+    deleted = Q()
+
+    is_worker = Worker.objects.filter(phone=phone).exists()
+    is_employer = Employer.objects.filter(phone=phone).exists()
+    if not (is_worker or is_employer):
+        return None
+
+    if is_worker:
+        # None when the profile itself has not changed
+        payload["worker"] = changed(Worker.objects.filter(phone=phone)).values(*WORKER_FIELDS).first()
+        # jobs this worker applied to, whoever changed them
+        payload["jobs"] += changed(Job.objects.filter(applications__worker_phone=phone)).values(*JOB_FIELDS)
+        payload["applications"] += changed(JobApplication.objects.filter(worker_phone=phone)).values(
+            *APPLICATION_FIELDS
+        )
+        payload["bookings"] += changed(Booking.objects.filter(worker_phone=phone)).values(*BOOKING_FIELDS)
+        deleted |= Q(worker_phone=phone)
+
+    if is_employer:
+        payload["employer"] = changed(Employer.objects.filter(phone=phone)).values(*EMPLOYER_FIELDS).first()
+        payload["jobs"] += changed(Job.objects.filter(employer_phone=phone)).values(*JOB_FIELDS)
+        payload["applications"] += changed(JobApplication.objects.filter(job__employer_phone=phone)).values(
+            *APPLICATION_FIELDS
+        )
+        payload["bookings"] += changed(Booking.objects.filter(employer_phone=phone)).values(*BOOKING_FIELDS)
+        deleted |= Q(employer_phone=phone)
+
+    if is_worker and is_employer:
+        # someone who is both may see the same job, application or booking from each side
+        for key in ("jobs", "applications", "bookings"):
+            payload[key] = list({row["id"]: row for row in payload[key]}.values())
+
+    payload["deleted"] = {"jobs": [], "applications": [], "bookings": []}
+    if deleted:
+        keys = {"job": "jobs", "job_application": "applications", "booking": "bookings"}
+        tombstones = changed(Tombstone.objects.filter(deleted, kind__in=keys), "deleted_at")
+        for kind, object_id in tombstones.values_list("kind", "object_id").distinct():
+            payload["deleted"][keys[kind]].append(int(object_id))
+
+    payload["cursor"] = encode_cursor(started - OVERLAP)
+    return payload
@@ -1,3 +1,1477 @@
-from django.test import TestCase
+import asyncio
+import base64
+import datetime
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from decimal import Decimal
+from itertools import count
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Exp, Greatest, Least
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from .models import Worker, Employer, Job, JobApplication, JobContact, Booking, Review, Event, WorkerOccupancy
+from .models import WorkerSkill
+from .models import IdempotencyKey
+from .models import ArchivedJob, ArchivedJobApplication, ArchivedJobContact, ArchivedBooking
+from . import geo, idempotency, matching, pincodes, sweeper, transitions
+from .sync import encode_cursor
+from .ratings import averages
+from .skills import sync_worker_skills
+
+_seq = count()
+_timing_log = logging.getLogger("api.timing")
+
+
+def setUpModule():
+    # every request logs its timings at INFO; keep them out of the test output
+    _timing_log.disabled = True
+
+
+def tearDownModule():
+    _timing_log.disabled = False
+
+
+def make_worker(**kwargs):
+    n = next(_seq)
+    defaults = dict(phone=f"9{n:09d}", name=f"Worker {n}", location="Pune", skills="plumber, painter",
+                    latitude=18.52, longitude=73.85)
+    defaults.update(kwargs)
+    return Worker.objects.create(**defaults)
+
+
+def make_employer(**kwargs):
+    n = next(_seq)
+    defaults = dict(phone=f"8{n:09d}", name=f"Employer {n}", location="Pune")
+    defaults.update(kwargs)
+    return Employer.objects.create(**defaults)
+
+
+def make_job(employer, **kwargs):
+    defaults = dict(employer_phone=employer, work_type="plumber", location="Pune",
+                    work_date=datetime.date.today() + datetime.timedelta(days=3), wage=700, detail="Fix pipes")
+    defaults.update(kwargs)
+    return Job.objects.create(**defaults)
+
+
+class QueryCountTests(APITestCase):
+    """Every list endpoint must run a fixed number of queries, however many rows it returns."""
+
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+
+    def grow(self, rows=3):
+        for _ in range(rows):
+            job = make_job(self.employer, status="completed")
+            workers = [make_worker() for _ in range(2)]
+            sync_worker_skills(workers)
+            for worker in workers:
+                JobApplication.objects.create(job=job, worker_phone=worker, status="completed")
+            application = JobApplication.objects.create(job=job, worker_phone=self.worker, status="completed")
+            JobContact.objects.create(job=job, worker_phone=workers[0])
+            Review.objects.create(application=application, reviewer="employer", worker_phone=self.worker,
+                                  employer_phone=self.employer, rating=4)
+            make_job(self.employer)  # open, for the feed
+            Booking.objects.create(employer_phone=self.employer, worker_phone=make_worker())
+            Booking.objects.create(employer_phone=make_employer(), worker_phone=self.worker)
+
+    def assertConstantQueries(self, url, expected):
+        for _ in range(2):
+            self.grow()
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertTrue(response.data["results"])
+
+    def test_job_list(self):
+        self.assertConstantQueries("/api/jobs/", 2)
+
+    # conditional endpoints add their two validator aggregates, see api/conditional.py
+    def test_my_jobs(self):
+        self.assertConstantQueries(f"/api/jobs/my_jobs/?employer_phone={self.employer.phone}", 4)
+
+    def test_employer_history(self):
+        self.assertConstantQueries(f"/api/jobs/employer_history/?employer_phone={self.employer.phone}", 2)
+
+    def test_worker_history(self):
+        self.assertConstantQueries(f"/api/jobs/worker_history/?worker_phone={self.worker.phone}", 2)
+
+    def test_job_application_list(self):
+        self.assertConstantQueries("/api/job-applications/", 1)
+
+    def test_booking_list(self):
+        self.assertConstantQueries("/api/bookings/", 1)
+
+    def test_my_bookings(self):
+        self.assertConstantQueries(f"/api/bookings/my_bookings/?employer_phone={self.employer.phone}", 3)
+
+    def test_worker_bookings(self):
+        self.assertConstantQueries(f"/api/bookings/worker_bookings/?worker_phone={self.worker.phone}", 3)
+
+    def test_worker_list(self):
+        self.assertConstantQueries("/api/workers/", 1)
+
+    def test_employer_list(self):
+        self.assertConstantQueries("/api/employers/", 1)
+
+    def test_worker_skill_search(self):
+        self.assertConstantQueries("/api/workers/?skills=plumber,painter&match=all", 1)
+
+    def test_nearby(self):
+        self.assertConstantQueries("/api/workers/nearby/?lat=18.52&lon=73.85&skill=plumber", 1)
+
+    def test_nearby_by_rating(self):
+        self.assertConstantQueries("/api/workers/nearby/?lat=18.52&lon=73.85&sort=rating", 1)
+
+    def test_available(self):
+        self.assertConstantQueries("/api/workers/available/?skill=painter", 1)
+
+    def test_available_nearby(self):
+        self.assertConstantQueries("/api/workers/available/?lat=18.52&lon=73.85", 1)
+
+    def test_top_rated(self):
+        self.assertConstantQueries("/api/workers/top_rated/?skill=plumber", 1)
+
+    def test_job_feed(self):
+        # the worker, then the ranked jobs
+        self.assertConstantQueries(f"/api/jobs/feed/?worker_phone={self.worker.phone}", 2)
+
+    def test_job_contact_list(self):
+        self.assertConstantQueries("/api/job-contacts/", 1)
+
+    def test_review_list(self):
+        self.assertConstantQueries(f"/api/reviews/?worker_phone={self.worker.phone}", 1)
+
+    def test_next_page(self):
+        # following the keyset cursor costs what the first page did
+        for _ in range(2):
+            self.grow()
+            next_url = self.client.get("/api/jobs/?page_size=2").data["next"]
+            with self.assertNumQueries(2):
+                response = self.client.get(next_url)
+            self.assertEqual(len(response.data["results"]), 2)
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer(latitude=18.52, longitude=73.85)
+        self.worker = make_worker()
+        for _ in range(3):
+            make_job(self.employer)
+            Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)
+
+    def test_next_links_walk_every_row_once(self):
+        url, seen = "/api/jobs/feed/?page_size=2&worker_phone=" + self.worker.phone, []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(sorted(seen), sorted(Job.objects.values_list("pk", flat=True)))
+
+    def test_tampered_cursors_are_rejected(self):
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+        feed = f"jobs/feed/?worker_phone={self.worker.phone}"
+        bookings = f"bookings/my_bookings/?employer_phone={self.employer.phone}"
+        nearby = "workers/nearby/?lat=18.52&lon=73.85"
+        cases = [
+            ("bookings/", ["x", "y"]), ("jobs/", ["abc"]), ("jobs/", [None]), ("jobs/", [[1]]), ("jobs/", ["1", "2"]),
+            ("workers/top_rated/", [None, self.worker.phone]),
+            (bookings, ["x", "1"]), (feed, ["fast", "1"]), (feed, ["nan", "1"]), (nearby, ["far", self.worker.phone]),
+        ]
+        async_paths = (bookings, feed, nearby)  # also served by api/async_views.py
+        for path, values in cases:
+            url = f"{path}{'&' if '?' in path else '?'}cursor={cursor(values)}"
+            with self.subTest(url=url):
+                response = self.client.get(f"/api/{url}")
+                self.assertEqual((response.status_code, response.json()), (404, {"detail": "Invalid cursor"}))
+                if path in async_paths:
+                    response = self.client.get(f"/api/async/{url}")
+                    self.assertEqual((response.status_code, response.json()), (404, {"error": "Invalid cursor"}))
+
+
+class RequestTimingTests(APITestCase):
+    def timings(self, response):
+        parts = [part.split(";") for part in response["Server-Timing"].split(", ")]
+        return {part[0]: float(part[1].removeprefix("dur=")) for part in parts}
+
+    def test_serialization_is_reported_apart_from_the_view(self):
+        for _ in range(20):
+            Booking.objects.create(employer_phone=make_employer(), worker_phone=make_worker())
+        timings = self.timings(self.client.get("/api/bookings/"))
+        self.assertEqual(set(timings), {"db", "app", "serialize", "render", "total"})
+        self.assertGreater(timings["serialize"], 0)
+        self.assertLessEqual(timings["db"] + timings["app"] + timings["serialize"] + timings["render"],
+                             timings["total"] + 0.5)  # each figure is rounded to 0.1 ms
+
+    def test_one_log_line_per_request_by_default(self):
+        self.assertEqual(_timing_log.level, logging.INFO)
+        _timing_log.disabled = False
+        try:
+            with self.assertLogs("api.timing", "INFO") as logs:
+                self.client.get("/api/bookings/")
+        finally:
+            _timing_log.disabled = True
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual((logs.records[0].view, logs.records[0].status_code), ("BookingViewSet.list", 200))
+
+    async def test_async_views(self):
+        await sync_to_async(make_worker)()
+        response = await self.async_client.get("/api/async/workers/")
+        self.assertGreater(self.timings(response)["serialize"], 0)
+
+
+class NearbyTests(APITestCase):
+    def setUp(self):
+        self.near = make_worker(latitude=18.52, longitude=73.85)
+        self.far = make_worker(latitude=18.80, longitude=73.85)  # about 31 km north
+
+    def phones(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row["phone"] for row in response.data["results"]]
+
+    def test_radius(self):
+        base = "/api/workers/nearby/?lat=18.52&lon=73.85"
+        self.assertEqual(self.phones(base), [self.near.phone])
+        self.assertEqual(self.phones(f"{base}&radius_km=40"), [self.near.phone, self.far.phone])
+        self.assertEqual(self.phones(f"{base}&radius_km=5000"), [self.near.phone, self.far.phone])
+
+    def test_radius_must_be_finite(self):
+        for path in ("workers/nearby/", "async/workers/nearby/"):
+            for radius in ("nan", "inf", "-inf", "ten"):
+                response = self.client.get(f"/api/{path}?lat=18.52&lon=73.85&radius_km={radius}")
+                self.assertEqual(response.status_code, 400, (path, radius))
+
+
+class SkillSearchTests(APITestCase):
+    """?skills= goes through the WorkerSkill index and must find what the old ``skills__icontains`` filter did."""
+
+    def setUp(self):
+        workers = [
+            make_worker(skills="plumber, painter"),
+            make_worker(skills="Painter"),
+            make_worker(skills=" mason ,plumber"),
+            make_worker(skills="electrician"),
+            make_worker(skills=""),
+        ]
+        sync_worker_skills(workers)
+
+    def search(self, query):
+        response = self.client.get(f"/api/workers/?{query}&page_size=200")
+        self.assertEqual(response.status_code, 200)
+        return {row["phone"] for row in response.data["results"]}
+
+    def icontains(self, skills, match):
+        # the filter ?skills= replaced
+        queryset = Worker.objects.all()
+        if match == "all":
+            for skill in skills:
+                queryset = queryset.filter(skills__icontains=skill)
+        else:
+            any_of = Q()
+            for skill in skills:
+                any_of |= Q(skills__icontains=skill)
+            queryset = queryset.filter(any_of)
+        return set(queryset.values_list("phone", flat=True))
+
+    def test_matches_the_icontains_filter(self):
+        for skills in (["plumber"], ["painter"], ["plumber", "painter"], ["mason", "electrician"], ["roofer"]):
+            for match in ("any", "all"):
+                with self.subTest(skills=skills, match=match):
+                    found = self.search(f"skills={','.join(skills)}&match={match}")
+                    self.assertEqual(found, self.icontains(skills, match))
+
+    def test_names_are_normalized(self):
+        self.assertEqual(self.search("skills= PAINTER ,plumber&match=all"), self.icontains(["painter", "plumber"], "all"))
+
+    def test_update_resyncs_the_index(self):
+        worker = make_worker(skills="plumber")
+        sync_worker_skills([worker])
+        response = self.client.patch(f"/api/workers/{worker.phone}/", {"skills": "roofer, Mason"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(worker.phone, self.search("skills=plumber"))
+        self.assertIn(worker.phone, self.search("skills=roofer,mason&match=all"))
+        self.assertEqual(
+            set(WorkerSkill.objects.filter(worker=worker).values_list("skill__name", flat=True)), {"roofer", "mason"}
+        )
+
+    def test_bulk_import_syncs_the_index(self):
+        existing = make_worker(skills="plumber")
+        sync_worker_skills([existing])
+        rows = [
+            {"phone": existing.phone, "name": "Worker", "location": "Pune", "skills": "tiler"},
+            {"phone": "7000000011", "name": "Worker", "location": "Pune", "skills": "Tiler, plumber"},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows).encode()
+        response = self.client.generic("POST", "/api/workers/bulk_import/", body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(self.search("skills=tiler"), {existing.phone, "7000000011"})
+        self.assertEqual(self.search("skills=tiler&match=all"), self.icontains(["tiler"], "all"))
+        self.assertNotIn(existing.phone, self.search("skills=plumber"))
+
+
+class JobFeedTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer(latitude=18.53, longitude=73.86)
+        self.worker = make_worker(skills="plumber")
+        self.other = make_worker()
+
+    def test_ranked_without_other_applicants(self):
+        best = make_job(self.employer, wage=900)
+        make_job(self.employer, work_type="mason", wage=900)
+        make_job(self.employer, wage=400)
+        applied = make_job(self.employer, wage=1000)
+        JobApplication.objects.create(job=applied, worker_phone=self.worker)
+        for job in Job.objects.all():
+            JobApplication.objects.create(job=job, worker_phone=self.other)
+
+        url = f"/api/jobs/feed/?worker_phone={self.worker.phone}"
+        with self.assertNumQueries(2):  # the worker, then the page
+            response = self.client.get(url)
+        rows = response.data["results"]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["id"], best.id)
+        self.assertEqual([row["feed_score"] for row in rows], sorted((row["feed_score"] for row in rows), reverse=True))
+        self.assertNotIn("applications", rows[0])
+        self.assertNotIn(self.other.phone, response.content.decode())
+
+
+class BulkImportTests(APITestCase):
+    def upload(self, url, rows, content_type="application/x-ndjson"):
+        if content_type == "text/csv":
+            body = "\n".join(rows)
+        else:
+            body = "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+        return self.client.generic("POST", url, body.encode(), content_type=content_type)
+
+    def worker_row(self, phone, **fields):
+        return {"phone": phone, "name": f"Worker {phone}", "location": "Pune", "skills": "plumber", **fields}
+
+    def test_workers_upsert_on_phone(self):
+        existing = make_worker(name="Old name", age=30)
+        response = self.upload("/api/workers/bulk_import/", [
+            self.worker_row(existing.phone, name="New name"),
+            self.worker_row("7000000001", latitude=18.5, longitude=73.8),
+        ])
+        self.assertEqual(response.data, {"rows": 2, "imported": 2, "failed": 0, "errors": []})
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.age), ("New name", 30))  # columns not in the row are kept
+        self.assertEqual(Worker.objects.get(phone="7000000001").geo_cell, pincodes.geo.cell_for(18.5, 73.8))
+
+    def test_queries_per_chunk_not_per_row(self):
+        employer = make_employer()
+
+        def queries(first, rows):
+            phones = [f"70000{first + i:05d}" for i in range(rows)]
+            for phone in phones:
+                make_job(employer).applications.create(worker_phone=make_worker(phone=phone))
+            with CaptureQueriesContext(connection) as captured:
+                response = self.upload("/api/workers/bulk_import/", [self.worker_row(phone) for phone in phones])
+            self.assertEqual(response.data["imported"], rows)
+            return len(captured)
+
+        self.assertEqual(queries(0, 3), queries(100, 30))
+
+    def test_invalid_rows_are_reported_and_the_rest_imported(self):
+        response = self.upload("/api/workers/bulk_import/", [
+            self.worker_row("7000000002"),
+            {"phone": "7000000003", "location": "Pune", "skills": "mason"},
+            "{not json",
+            self.worker_row("7000000004", age="old"),
+        ])
+        self.assertEqual((response.data["rows"], response.data["imported"], response.data["failed"]), (4, 1, 3))
+        self.assertEqual([error["line"] for error in response.data["errors"]], [2, 3, 4])
+        self.assertIn("name", response.data["errors"][0]["errors"])
+        self.assertEqual(list(Worker.objects.values_list("phone", flat=True)), ["7000000002"])
+
+    def test_jobs_need_a_known_employer(self):
+        employer = make_employer()
+        response = self.upload("/api/jobs/bulk_import/", [
+            "employer_phone,work_type,location,work_date,wage,detail",
+            f"{employer.phone},plumber,Pune,2030-01-01,700,Fix pipes",
+            "8000000999,mason,Pune,2030-01-02,800,Build wall",
+        ], content_type="text/csv")
+        self.assertEqual((response.data["imported"], response.data["failed"]), (1, 1))
+        self.assertEqual(response.data["errors"][0]["line"], 3)
+        self.assertIn("does not exist", response.data["errors"][0]["errors"]["employer_phone"][0])
+        self.assertEqual(list(Job.objects.values_list("employer_phone", flat=True)), [employer.phone])
+
+    def test_unsupported_content_type(self):
+        self.assertEqual(self.upload("/api/workers/bulk_import/", ["x"], content_type="text/plain").status_code, 415)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.jobs = [
+            make_job(self.employer, work_date=datetime.date(2030, 1, day), status=job_status, wage=700 + day)
+            for day, job_status in ((1, "open"), (2, "completed"), (3, "completed"), (4, "open"))
+        ]
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def ndjson(self, url):
+        return [json.loads(line) for line in self.export(url)[1].splitlines()]
+
+    def test_ndjson_rows(self):
+        response, body = self.export(f"/api/jobs/export/?employer_phone={self.employer.phone}")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertRegex(response["Content-Disposition"], r'attachment; filename="jobs-\d{4}-\d{2}-\d{2}\.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [job.pk for job in self.jobs])
+        first = self.jobs[0]
+        self.assertEqual(rows[0], {
+            "id": first.pk, "employer_phone": self.employer.phone, "work_type": "plumber", "location": "Pune",
+            "work_date": "2030-01-01", "wage": "701.00", "detail": "Fix pipes", "status": "open",
+            "created_at": DjangoJSONEncoder().default(Job.objects.get(pk=first.pk).created_at),
+        })
+
+    def test_csv_rows(self):
+        response, body = self.export("/api/jobs/export/?fmt=csv&status=completed")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertTrue(response["Content-Disposition"].endswith('.csv"'))
+        lines = body.splitlines()
+        self.assertEqual(lines[0], "id,employer_phone,work_type,location,work_date,wage,detail,status,created_at")
+        rows = [line.split(",") for line in lines[1:]]
+        self.assertEqual([int(row[0]) for row in rows], [self.jobs[1].pk, self.jobs[2].pk])
+        self.assertEqual(rows[0][1:8], [self.employer.phone, "plumber", "Pune", "2030-01-02", "702.00", "Fix pipes",
+                                        "completed"])
+
+    def test_date_and_status_filters(self):
+        def ids(query):
+            return [row["id"] for row in self.ndjson(f"/api/jobs/export/?{query}")]
+
+        self.assertEqual(ids("date_from=2030-01-02&date_to=2030-01-03"), [job.pk for job in self.jobs[1:3]])
+        self.assertEqual(ids("date_from=2030-01-04"), [self.jobs[3].pk])
+        self.assertEqual(ids("date_to=2030-01-01"), [self.jobs[0].pk])
+        self.assertEqual(ids("status=open,completed&date_from=2030-01-03"), [job.pk for job in self.jobs[2:]])
+        self.assertEqual(ids("status=assigned"), [])
+
+    def test_date_filters_on_datetime_columns_cover_whole_days(self):
+        applications = [JobApplication.objects.create(job=job, worker_phone=self.worker) for job in self.jobs[:3]]
+        for application, stamp in zip(applications, ("2029-12-31T23:59:59", "2030-01-01T00:00:00",
+                                                     "2030-01-01T23:59:59")):
+            moment = timezone.make_aware(datetime.datetime.fromisoformat(stamp))
+            JobApplication.objects.filter(pk=application.pk).update(applied_at=moment)
+        rows = self.ndjson("/api/job-applications/export/?date_from=2030-01-01&date_to=2030-01-01")
+        self.assertEqual([row["id"] for row in rows], [application.pk for application in applications[1:]])
+        self.assertEqual((rows[0]["job__employer_phone"], rows[0]["job__wage"]), (self.employer.phone, "702.00"))
+
+    def test_bad_parameters(self):
+        for url in ("/api/jobs/export/?fmt=xml", "/api/bookings/export/?fmt=",
+                    "/api/jobs/export/?date_from=yesterday", "/api/job-applications/export/?date_to=2030-02-30"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.data)
+
+
+class TransitionTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.job = make_job(self.employer)
+        self.application = JobApplication.objects.create(job=self.job, worker_phone=self.worker)
+
+    def post(self, url, data=None):
+        return self.client.post(url, data or {}, format="json")
+
+    def test_application_flow(self):
+        base = f"/api/job-applications/{self.application.pk}"
+        # savepoint, swap returning the row, event, release
+        with self.assertNumQueries(4):
+            self.assertEqual(self.post(f"{base}/accept/").data["status"], "waiting_for_worker_confirmation")
+        # savepoint, swap, job assignment, calendar row, event, release
+        with self.assertNumQueries(6):
+            self.assertEqual(self.post(f"{base}/worker_accept/").data["status"], "accepted")
+        self.job.refresh_from_db()
+        self.worker.refresh_from_db()
+        self.assertEqual(self.job.status, "assigned")
+        # the job is in three days: busy then, still available today
+        self.assertTrue(self.worker.is_available)
+        self.assertFalse(Worker.objects.free_on(self.job.work_date).filter(phone=self.worker.phone).exists())
+
+        with self.assertNumQueries(4):
+            self.assertEqual(self.post(f"{base}/complete/", {"role": "worker"}).data["status"], "accepted")
+        # swap, job, calendar release (2), first stats row (upsert + savepoint pair), event, savepoint pair
+        with self.assertNumQueries(11):
+            self.assertEqual(self.post(f"{base}/complete/", {"role": "employer"}).data["status"], "completed")
+        self.job.refresh_from_db()
+        self.worker.refresh_from_db()
+        self.assertEqual(self.job.status, "completed")
+        self.assertTrue(Worker.objects.free_on(self.job.work_date).filter(phone=self.worker.phone).exists())
+
+        stats = self.client.get(f"/api/workers/{self.worker.phone}/stats/").data
+        self.assertEqual(stats["completed_jobs"], 1)
+        self.assertEqual(stats["total_earnings"], "700.00")
+
+    def test_repeated_booking_refusal_is_a_no_op(self):
+        booking = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker, employer_response=True)
+        url = f"/api/bookings/{booking.pk}/respond/"
+        for _ in range(2):
+            response = self.post(url, {"role": "worker", "response": False})
+            self.assertEqual((response.status_code, response.data["status"]), (200, "declined"))
+        response = self.post(url, {"role": "employer", "response": True})
+        self.assertEqual((response.status_code, response.data["status"]), (409, "declined"))
+        self.assertEqual(Event.objects.filter(object_id=booking.pk, status="declined").count(), 1)
+
+    def test_swap_returns_typed_columns_on_every_path(self):
+        # UPDATE ... RETURNING where the configured database runs it (SQLite 3.35+, Postgres), and the
+        # QuerySet.update fallback everywhere
+        returning = ("status", "worker_phone", "job__work_date", "job__wage")
+        paths = [False] + [True] * transitions._can_update_returning(connection)
+        for native in paths:
+            with self.subTest(update_returning=native):
+                app = JobApplication.objects.create(job=self.job, worker_phone=make_worker())
+                with mock.patch("api.transitions._can_update_returning", return_value=native):
+                    with self.assertNumQueries(1 if native else 2):
+                        row = transitions._swap(JobApplication, app.pk, "pending", returning, status="declined")
+                    self.assertIsNone(transitions._swap(JobApplication, app.pk, "pending", returning, status="accepted"))
+                self.assertEqual(row, {"status": "declined", "worker_phone": app.worker_phone_id,
+                                       "job__work_date": self.job.work_date, "job__wage": Decimal("700.00")})
+                self.assertIsInstance(row["job__wage"], Decimal)
+                self.assertIsInstance(row["job__work_date"], datetime.date)
+
+    def test_update_returning_is_only_used_where_supported(self):
+        def backend(vendor, sqlite_version=(3, 40, 1)):
+            return SimpleNamespace(vendor=vendor, Database=SimpleNamespace(sqlite_version_info=sqlite_version))
+
+        self.assertTrue(transitions._can_update_returning(backend("postgresql")))
+        self.assertTrue(transitions._can_update_returning(backend("sqlite", (3, 35, 0))))
+        self.assertFalse(transitions._can_update_returning(backend("sqlite", (3, 34, 1))))
+        self.assertFalse(transitions._can_update_returning(backend("mysql")))  # MariaDB reports as mysql
+
+    def test_job_is_assigned_once(self):
+        other = JobApplication.objects.create(job=self.job, worker_phone=make_worker())
+        for app in (self.application, other):
+            self.post(f"/api/job-applications/{app.pk}/accept/")
+        self.assertEqual(self.post(f"/api/job-applications/{self.application.pk}/worker_accept/").status_code, 200)
+        response = self.post(f"/api/job-applications/{other.pk}/worker_accept/")
+        self.assertEqual(response.status_code, 409)
+        other.refresh_from_db()
+        self.assertEqual(other.status, "waiting_for_worker_confirmation")
+
+    def test_complete_requires_accepted(self):
+        response = self.post(f"/api/job-applications/{self.application.pk}/complete/", {"role": "worker"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["status"], "pending")
+
+    def test_booking_flow(self):
+        response = self.post("/api/bookings/", {"employer_phone": self.employer.phone, "worker_phone": self.worker.phone})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["employer_response"])
+        base = f"/api/bookings/{response.data['id']}"
+        # savepoint, swap returning the row, calendar row, worker availability, cache fan-out lookup, event, release
+        with self.assertNumQueries(7):
+            self.assertEqual(self.post(f"{base}/respond/", {"role": "worker", "response": True}).data["status"], "accepted")
+        # repeating the answer is a no-op, changing it is a conflict
+        with self.assertNumQueries(4):  # savepoint, swap, status, release
+            self.assertEqual(self.post(f"{base}/respond/", {"role": "worker", "response": True}).data["status"], "accepted")
+        self.assertEqual(self.post(f"{base}/respond/", {"role": "worker", "response": False}).status_code, 409)
+        self.assertEqual(WorkerOccupancy.objects.filter(booking=response.data["id"]).count(), 1)
+        self.assertEqual(self.post(f"{base}/complete/", {"role": "worker"}).data["status"], "accepted")
+        self.assertEqual(self.post(f"{base}/complete/", {"role": "employer"}).data["status"], "completed")
+        self.assertEqual(self.client.get(f"/api/workers/{self.worker.phone}/stats/").data["completed_bookings"], 1)
+
+
+class AvailabilityTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker(skills="mason")
+        sync_worker_skills([self.worker])
+        self.today = timezone.localdate()
+        self.tuesday = self.today + datetime.timedelta(days=2)
+
+    def post(self, url, data=None):
+        return self.client.post(url, data or {}, format="json")
+
+    def book(self, work_date=None):
+        booking = Booking.objects.create(
+            employer_phone=self.employer, worker_phone=self.worker, employer_response=True, work_date=work_date
+        )
+        return self.post(f"/api/bookings/{booking.pk}/respond/", {"role": "worker", "response": True})
+
+    def available_on(self, day, **params):
+        query = "&".join(f"{key}={value}" for key, value in {"date": day.isoformat(), **params}.items())
+        return [row["phone"] for row in self.client.get(f"/api/workers/available/?{query}").data["results"]]
+
+    def test_booked_day_only_hides_the_worker_on_that_day(self):
+        self.assertEqual(self.book(self.tuesday).data["status"], "accepted")
+        self.worker.refresh_from_db()
+        self.assertTrue(self.worker.is_available)
+        self.assertNotIn(self.worker.phone, self.available_on(self.tuesday))
+        self.assertIn(self.worker.phone, self.available_on(self.today, skill="mason"))
+        self.assertIn(self.worker.phone, self.available_on(self.today, lat=18.52, lon=73.85))
+        self.assertNotIn(self.worker.phone, self.available_on(self.today, skill="plumber"))
+        response = self.client.get("/api/workers/available/?lat=18.52&lon=73.85&radius_km=nan")
+        self.assertEqual(response.status_code, 400)
+
+        # a second commitment on the same day is refused
+        response = self.book(self.tuesday)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(self.tuesday.isoformat(), response.data["error"])
+
+    def test_booking_today_updates_cached_flag_until_completed(self):
+        booking_id = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker).pk
+        self.post(f"/api/bookings/{booking_id}/respond/", {"role": "employer", "response": True})
+        self.post(f"/api/bookings/{booking_id}/respond/", {"role": "worker", "response": True})
+        self.worker.refresh_from_db()
+        self.assertFalse(self.worker.is_available)
+        for role in ("worker", "employer"):
+            self.post(f"/api/bookings/{booking_id}/complete/", {"role": role})
+        self.worker.refresh_from_db()
+        self.assertTrue(self.worker.is_available)
+        self.assertFalse(WorkerOccupancy.objects.exists())
+
+    def test_days_off_and_daily_refresh(self):
+        calendar = f"/api/workers/{self.worker.phone}/calendar/"
+        response = self.post(calendar, {"dates": [self.today.isoformat(), self.tuesday.isoformat()]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row["date"] for row in response.data["busy"]], [self.today, self.tuesday])
+        self.worker.refresh_from_db()
+        self.assertFalse(self.worker.is_available)
+        self.assertEqual(self.post(calendar, {"dates": ["someday"]}).status_code, 400)
+        for off in ("false", 0, None):
+            with self.subTest(off=off):
+                response = self.post(calendar, {"dates": [self.tuesday.isoformat()], "off": off})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(WorkerOccupancy.objects.filter(worker=self.worker).count(), 2)
+
+        # the next morning: today's row has passed and Tuesday is still ahead
+        tomorrow = self.today + datetime.timedelta(days=1)
+        self.assertEqual(sweeper.clear_past_days(10, today=tomorrow), 1)
+        self.assertEqual(sweeper.refresh_availability(10, today=tomorrow), 1)
+        self.worker.refresh_from_db()
+        self.assertTrue(self.worker.is_available)
+        self.assertEqual(sweeper.refresh_availability(10, today=self.tuesday), 1)
+        self.worker.refresh_from_db()
+        self.assertFalse(self.worker.is_available)
+
+
+class IdempotencyTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+
+    def create_booking(self, key, url="/api/bookings/"):
+        data = {"employer_phone": self.employer.phone, "worker_phone": self.worker.phone}
+        return self.client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response_without_touching_the_domain_tables(self):
+        first = self.create_booking("booking-1")
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as captured:
+            retry = self.create_booking("booking-1")
+        self.assertEqual(len(captured), 1)
+        self.assertIn('FROM "idempotency_keys"', captured[0]["sql"])
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+        self.assertEqual(self.create_booking("booking-2").status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(self.create_booking("booking-1", url="/api/reviews/").status_code, 422)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_duplicate_of_an_in_flight_request_is_not_run(self):
+        in_flight = timezone.now() + datetime.timedelta(seconds=30)
+        IdempotencyKey.objects.create(key=idempotency.digest("booking-3"), target="POST /api/bookings/",
+                                      claimed_until=in_flight)
+        with self.assertNumQueries(1):
+            response = self.create_booking("booking-3")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Booking.objects.exists())
+
+        # the first request's process died: once its claim lapses the key is taken over
+        IdempotencyKey.objects.update(claimed_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(self.create_booking("booking-3").status_code, 201)
+        self.assertEqual(self.create_booking("booking-3")["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_duplicate_waits_for_the_in_flight_response(self):
+        row = IdempotencyKey.objects.create(key=idempotency.digest("booking-5"), target="POST /api/bookings/",
+                                            claimed_until=timezone.now() + datetime.timedelta(seconds=30))
+        pauses = []
+
+        def first_request_finishes(seconds):
+            pauses.append(seconds)
+            if len(pauses) == 3:
+                IdempotencyKey.objects.filter(pk=row.pk).update(
+                    status=201, headers=[["Content-Type", "application/json"]], content=b'{"id": 7}', claimed_until=None
+                )
+
+        with mock.patch("api.idempotency.time.sleep", first_request_finishes):
+            response = self.create_booking("booking-5")
+        self.assertEqual((response.status_code, response.content), (201, b'{"id": 7}'))
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(pauses, [0.05, 0.1, 0.2])  # backing off
+        self.assertFalse(Booking.objects.exists())
+
+    def test_duplicate_runs_when_the_in_flight_request_fails(self):
+        row = IdempotencyKey.objects.create(key=idempotency.digest("booking-6"), target="POST /api/bookings/",
+                                            claimed_until=timezone.now() + datetime.timedelta(seconds=30))
+        with mock.patch("api.idempotency.time.sleep", lambda seconds: IdempotencyKey.objects.filter(pk=row.pk).delete()):
+            response = self.create_booking("booking-6")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.2)
+    def test_duplicate_gives_up_after_the_wait(self):
+        IdempotencyKey.objects.create(key=idempotency.digest("booking-7"), target="POST /api/bookings/",
+                                      claimed_until=timezone.now() + datetime.timedelta(seconds=30))
+        started = time.monotonic()
+        response = self.create_booking("booking-7")
+        self.assertEqual(response.status_code, 409)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_server_errors_release_the_key(self):
+        request = RequestFactory().post("/api/bookings/", HTTP_IDEMPOTENCY_KEY="booking-4")
+
+        def fail():
+            raise RuntimeError("database went away")
+
+        with self.assertRaises(RuntimeError):
+            idempotency.run(request, fail)
+        self.assertEqual(idempotency.run(request, lambda: HttpResponse(status=503)).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(idempotency.run(request, lambda: HttpResponse(status=201)).status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status, 201)
+
+
+class IdempotencyClaimTests(TransactionTestCase):
+    # the claim is renewed from another thread and connection, so it has to see committed rows
+
+    @override_settings(IDEMPOTENCY_LOCK_SECONDS=0.3, IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_slow_request_keeps_its_claim(self):
+        request = RequestFactory().post("/api/bookings/", HTTP_IDEMPOTENCY_KEY="slow")
+        duplicates = []
+
+        def slow():
+            time.sleep(0.6)  # twice the claim's lifetime
+            duplicates.append(idempotency.run(request, lambda: HttpResponse(status=202)))
+            return HttpResponse(status=201)
+
+        self.assertEqual(idempotency.run(request, slow).status_code, 201)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(IdempotencyKey.objects.get().status, 201)
+
+
+class ReviewTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.application = JobApplication.objects.create(
+            job=make_job(self.employer, status="completed"), worker_phone=self.worker, status="completed"
+        )
+
+    def review(self, **data):
+        return self.client.post("/api/reviews/", data, format="json")
+
+    def test_reviews_update_running_aggregates(self):
+        other = JobApplication.objects.create(
+            job=make_job(self.employer, status="completed"), worker_phone=self.worker, status="completed"
+        )
+        self.assertEqual(self.review(application=self.application.pk, reviewer="employer", rating=5).status_code, 201)
+        self.assertEqual(self.review(application=other.pk, reviewer="employer", rating=4).status_code, 201)
+        self.assertEqual(self.review(application=other.pk, reviewer="worker", rating=2).status_code, 201)
+
+        self.worker.refresh_from_db()
+        self.employer.refresh_from_db()
+        self.assertEqual((self.worker.rating_sum, self.worker.rating_count), (9, 2))
+        self.assertEqual(float(self.worker.rating), 4.5)
+        self.assertAlmostEqual(self.worker.rating_score, averages(9, 2)[1])
+        self.assertEqual((self.employer.rating_count, float(self.employer.rating)), (1, 2.0))
+
+    def test_one_review_per_side_of_completed_work(self):
+        self.assertEqual(self.review(application=self.application.pk, reviewer="employer", rating=5).status_code, 201)
+        self.assertEqual(self.review(application=self.application.pk, reviewer="employer", rating=1).status_code, 409)
+        pending = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)
+        self.assertEqual(self.review(booking=pending.pk, reviewer="worker", rating=3).status_code, 409)
+        self.assertEqual(self.review(reviewer="worker", rating=3).status_code, 400)
+        self.assertEqual(self.review(application=self.application.pk, reviewer="worker", rating=6).status_code, 400)
+        self.worker.refresh_from_db()
+        self.assertEqual(self.worker.rating_count, 1)
+
+    def test_top_rated_prefers_many_good_reviews_over_one_perfect_one(self):
+        steady = make_worker(rating_sum=48, rating_count=10, rating_score=averages(48, 10)[1])
+        lucky = make_worker(rating_sum=5, rating_count=1, rating_score=averages(5, 1)[1])
+        phones = [row["phone"] for row in self.client.get("/api/workers/top_rated/").data["results"]]
+        self.assertLess(phones.index(steady.phone), phones.index(lucky.phone))
+        self.assertLess(phones.index(lucky.phone), phones.index(self.worker.phone))
+
+
+class AsyncViewTests(APITestCase):
+    """The async read path must return exactly what the DRF actions it mirrors do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employer(latitude=18.53, longitude=73.86)
+        cls.worker = make_worker()
+        for i in range(3):
+            make_job(cls.employer, wage=600 + i * 100)
+            make_worker(skills="painter")
+            Booking.objects.create(employer_phone=cls.employer, worker_phone=cls.worker)
+        sync_worker_skills(list(Worker.objects.all()))
+
+    async def assertSameAsSync(self, path):
+        expected = (await self.async_client.get(f"/api/{path}")).json()
+        response = await self.async_client.get(f"/api/async/{path}")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["results"], expected["results"])
+        self.assertTrue(response.json()["results"])
+
+    async def test_worker_search(self):
+        await self.assertSameAsSync("workers/?skills=painter&page_size=2")
+        await self.assertSameAsSync("workers/nearby/?lat=18.52&lon=73.85&radius_km=5")
+
+    async def test_job_feed(self):
+        await self.assertSameAsSync(f"jobs/feed/?worker_phone={self.worker.phone}")
+
+    async def test_bookings(self):
+        await self.assertSameAsSync(f"bookings/my_bookings/?employer_phone={self.employer.phone}")
+        await self.assertSameAsSync(f"bookings/worker_bookings/?worker_phone={self.worker.phone}&page_size=2")
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_client.get("/api/async/jobs/feed/")).status_code, 400)
+        self.assertEqual((await self.async_client.get("/api/async/jobs/feed/?worker_phone=0")).status_code, 404)
+        self.assertEqual((await self.async_client.get("/api/async/workers/?cursor=bogus")).status_code, 404)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.job = make_job(self.employer)
+        JobApplication.objects.create(job=self.job, worker_phone=self.worker)
+        self.booking = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)
+
+    def test_plain_columns_render_like_the_serializer(self):
+        full = self.client.get("/api/jobs/").data["results"]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/jobs/?fields=id,wage,work_date,created_at,employer_phone")
+        self.assertEqual(len(captured), 1)  # no applications prefetch
+        self.assertNotIn('"detail"', captured[0]["sql"])
+        expected = [{key: row[key] for key in ("id", "wage", "work_date", "created_at", "employer_phone")} for row in full]
+        self.assertEqual([dict(row) for row in response.data["results"]], expected)
+
+    def test_nested_fields_and_expand(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/bookings/?fields=id,status,worker.name")
+        self.assertEqual(len(captured), 1)
+        self.assertNotIn('"employers"', captured[0]["sql"])
+        self.assertEqual(
+            response.data["results"], [{"id": self.booking.id, "worker": {"name": self.worker.name}, "status": "pending"}]
+        )
+
+        job = self.client.get(f"/api/jobs/{self.job.id}/?expand=applications").data
+        self.assertNotIn("worker", job["applications"][0])
+        self.assertEqual(job["wage"], "700.00")
+        job = self.client.get(f"/api/jobs/{self.job.id}/?fields=id,applications.worker.phone").data
+        self.assertEqual(job, {"id": self.job.id, "applications": [{"worker": {"phone": self.worker.phone}}]})
+
+    def test_cached_detail_per_variant(self):
+        full = self.client.get(f"/api/workers/{self.worker.phone}/").data
+        sparse = self.client.get(f"/api/workers/{self.worker.phone}/?fields=name").data
+        self.assertEqual(sparse, {"name": self.worker.name})
+        self.assertEqual(self.client.get(f"/api/workers/{self.worker.phone}/").data, full)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(
+            "/api/employers/?fields=name", {"phone": "8999999999", "name": "New", "location": "Pune"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIn("phone", response.data)
+
+    async def test_async_views(self):
+        path = f"bookings/my_bookings/?employer_phone={self.employer.phone}&fields=id,created_at,employer.name"
+        expected = (await self.async_client.get(f"/api/{path}")).json()
+        response = await self.async_client.get(f"/api/async/{path}")
+        self.assertEqual(response.json()["results"], expected["results"])
+        self.assertEqual(set(expected["results"][0]), {"id", "created_at", "employer"})
+
+
+class DetailCacheTests(APITestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.job = make_job(self.employer)
+
+    def test_cached_until_the_row_changes(self):
+        url = f"/api/jobs/{self.job.id}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {"wage": "900.00"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.client.get(url).data["wage"], "900.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/workers/{self.worker.phone}/", {"name": "Renamed"}, format="json")
+        self.assertEqual(self.client.get(f"/api/workers/{self.worker.phone}/").data["name"], "Renamed")
+
+    def test_lookup_spellings_share_one_entry(self):
+        padded = f"/api/jobs/0{self.job.id}/"
+        self.assertEqual(self.client.get(padded).data["wage"], "700.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/jobs/{self.job.id}/", {"wage": "900.00"}, format="json")
+        self.assertEqual(self.client.get(padded).data["wage"], "900.00")
+        self.assertEqual(self.client.get("/api/jobs/five/").status_code, 404)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.job = make_job(self.employer)
+        self.booking = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)
+
+    def revalidate(self, url, queries):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200, first.content)
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+        return first
+
+    def assertChanged(self, url, first):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        return response
+
+    def test_booking_lists(self):
+        url = f"/api/bookings/my_bookings/?employer_phone={self.employer.phone}"
+        first = self.revalidate(url, 2)
+        self.assertTrue(first["Last-Modified"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+        # the embedded worker changed, not the booking
+        self.worker.name = "Renamed"
+        self.worker.save()
+        first = self.assertChanged(url, first)
+        self.booking.delete()
+        self.assertChanged(url, first)
+
+        url = f"/api/bookings/worker_bookings/?worker_phone={self.worker.phone}"
+        self.assertNotEqual(self.revalidate(url, 2)["ETag"], self.revalidate(url + "&fields=id", 2)["ETag"])
+
+    def test_my_jobs(self):
+        url = f"/api/jobs/my_jobs/?employer_phone={self.employer.phone}"
+        first = self.revalidate(url, 2)
+        JobApplication.objects.create(job=self.job, worker_phone=self.worker)
+        self.assertChanged(url, first)
+
+    def test_job_detail(self):
+        url = f"/api/jobs/{self.job.id}/"
+        first = self.revalidate(url, 0)  # the row version comes from the payload cache
+        with self.captureOnCommitCallbacks(execute=True):
+            app = JobApplication.objects.create(job=self.job, worker_phone=self.worker)
+        first = self.assertChanged(url, first)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/job-applications/{app.id}/accept/")
+        self.assertChanged(url, first)
+
+    async def test_async_bookings(self):
+        url = f"/api/async/bookings/my_bookings/?employer_phone={self.employer.phone}"
+        first = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+
+class EventFeedTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+
+    def book(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/", {"employer_phone": self.employer.phone, "worker_phone": self.worker.phone}, format="json"
+            )
+        return response.data["id"]
+
+    def poll(self, phone, last_event_id, timeout=0):
+        return self.client.get(f"/api/events/poll/?phone={phone}&last_event_id={last_event_id}&timeout={timeout}").json()
+
+    def test_both_parties_see_changes_and_resume(self):
+        booking = self.book()
+        self.client.post(f"/api/bookings/{booking}/respond/", {"role": "worker", "response": True}, format="json")
+
+        feed = self.poll(self.worker.phone, 0)
+        self.assertEqual([(e["kind"], e["object_id"], e["status"]) for e in feed["events"]],
+                         [("booking", booking, "pending"), ("booking", booking, "accepted")])
+        self.assertEqual(self.poll(self.employer.phone, 0)["events"], feed["events"])
+        self.assertEqual(self.poll(self.worker.phone, feed["events"][0]["id"])["events"], feed["events"][1:])
+        self.assertEqual(self.poll(self.worker.phone, feed["last_event_id"]),
+                         {"last_event_id": feed["last_event_id"], "events": []})
+        self.assertEqual(self.poll(make_worker().phone, 0)["events"], [])
+        for timeout in ("nan", "inf", "soon"):
+            url = f"/api/events/poll/?phone={self.worker.phone}&timeout={timeout}"
+            self.assertEqual(self.client.get(url).status_code, 400, timeout)
+
+    async def test_long_poll_wakes_on_commit(self):
+        started = time.monotonic()
+        poll = asyncio.ensure_future(self.async_client.get(f"/api/events/poll/?phone={self.worker.phone}&timeout=10"))
+        await asyncio.sleep(0.2)
+        await sync_to_async(self.book)()
+        response = (await poll).json()
+        self.assertEqual([e["status"] for e in response["events"]], ["pending"])
+        self.assertLess(time.monotonic() - started, 5)
+
+    @override_settings(EVENTS_STREAM_SECONDS=0)
+    async def test_event_stream_resumes_from_last_event_id(self):
+        await sync_to_async(self.book)()
+        response = await self.async_client.get(f"/api/events/?phone={self.worker.phone}", headers={"Last-Event-ID": "0"})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(body.startswith("retry: 3000\n\n"))
+        self.assertIn("event: booking\n", body)
+        self.assertEqual(body.count("\nid: "), 1)
+
+
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.jobs = [make_job(self.employer) for _ in range(3)]
+        self.applications = [JobApplication.objects.create(job=job, worker_phone=self.worker) for job in self.jobs]
+        self.booking = Booking.objects.create(
+            employer_phone=self.employer, worker_phone=self.worker, employer_response=True
+        )
+
+    def sync(self, phone, since=None):
+        url = f"/api/sync/?phone={phone}" + (f"&since={since}" if since else "")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def age_everything(self):
+        """Move every row an hour into the past and return a cursor from half an hour ago."""
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        for model in (Worker, Job, JobApplication, Booking):
+            model.objects.update(updated_at=hour_ago)
+        return encode_cursor(hour_ago + datetime.timedelta(minutes=30))
+
+    def test_full_sync(self):
+        worker = self.sync(self.worker.phone)
+        self.assertEqual(worker["worker"]["phone"], self.worker.phone)
+        self.assertEqual(len(worker["jobs"]), 3)
+        self.assertEqual(len(worker["applications"]), 3)
+        self.assertEqual([b["id"] for b in worker["bookings"]], [self.booking.pk])
+        employer = self.sync(self.employer.phone)
+        self.assertIsNone(employer["worker"])
+        self.assertEqual(len(employer["applications"]), 3)
+
+    def test_only_changes_since_cursor(self):
+        since = self.age_everything()
+        self.assertEqual(self.sync(self.worker.phone, since)["bookings"], [])
+
+        self.client.post(f"/api/job-applications/{self.applications[0].pk}/accept/")
+        self.client.post(f"/api/bookings/{self.booking.pk}/respond/", {"role": "worker", "response": True}, format="json")
+        deleted = self.applications[2].pk
+        self.applications[2].delete()
+
+        for phone in (self.worker.phone, self.employer.phone):
+            delta = self.sync(phone, since)
+            self.assertEqual([a["id"] for a in delta["applications"]], [self.applications[0].pk])
+            self.assertEqual([(b["id"], b["status"]) for b in delta["bookings"]], [(self.booking.pk, "accepted")])
+            self.assertEqual(delta["deleted"]["applications"], [deleted])
+        # accepting a booking makes the worker unavailable
+        self.assertFalse(self.sync(self.worker.phone, since)["worker"]["is_available"])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get("/api/sync/").status_code, 400)
+        self.assertEqual(self.client.get(f"/api/sync/?phone={self.worker.phone}&since=bogus").status_code, 400)
+        self.assertEqual(self.client.get("/api/sync/?phone=0").status_code, 404)
+        expired = encode_cursor(timezone.now() - datetime.timedelta(days=365))
+        self.assertEqual(self.client.get(f"/api/sync/?phone={self.worker.phone}&since={expired}").status_code, 400)
+
+
+class SweeperTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer()
+        self.worker = make_worker()
+        self.long_ago = timezone.now() - datetime.timedelta(days=200)
+
+    def test_past_open_jobs_expire_and_decline_undecided_applications(self):
+        past = make_job(self.employer, work_date=datetime.date.today() - datetime.timedelta(days=1))
+        upcoming = make_job(self.employer)
+        pending = JobApplication.objects.create(job=past, worker_phone=self.worker)
+        accepted = JobApplication.objects.create(job=past, worker_phone=make_worker(), status="accepted")
+        waiting = JobApplication.objects.create(job=upcoming, worker_phone=self.worker)
+
+        self.assertEqual(sweeper.expire_jobs(batch_size=1), 1)
+        past.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertEqual((past.status, upcoming.status), ("expired", "open"))
+        statuses = dict(JobApplication.objects.values_list("pk", "status"))
+        self.assertEqual(
+            (statuses[pending.pk], statuses[accepted.pk], statuses[waiting.pk]), ("declined", "accepted", "pending")
+        )
+        self.assertTrue(Event.objects.filter(object_id=pending.pk, status="declined").exists())
+
+    def test_archive_moves_finished_work_and_keeps_reviews(self):
+        job = make_job(self.employer, status="completed")
+        application = JobApplication.objects.create(job=job, worker_phone=self.worker, status="completed")
+        JobContact.objects.create(job=job, worker_phone=self.worker)
+        self.client.post("/api/reviews/", {"application": application.pk, "reviewer": "employer", "rating": 5},
+                         format="json")
+        booking = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker, status="completed")
+        live = Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)
+        Job.objects.filter(pk=job.pk).update(updated_at=self.long_ago)
+        Booking.objects.update(updated_at=self.long_ago)
+
+        counts = sweeper.sweep(batch_size=10, archive_after_days=90)
+        self.assertEqual((counts["archived_jobs"], counts["archived_bookings"]), (1, 1))
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+        self.assertEqual(list(Booking.objects.values_list("pk", flat=True)), [live.pk])
+        archived = ArchivedJob.objects.get(pk=job.pk)
+        self.assertEqual((archived.employer_phone, archived.status), (self.employer.phone, "completed"))
+        self.assertEqual(ArchivedJobApplication.objects.get(pk=application.pk).job_id, job.pk)
+        self.assertEqual(ArchivedJobContact.objects.filter(job=job.pk).count(), 1)
+        self.assertEqual(ArchivedBooking.objects.get(pk=booking.pk).worker_phone, self.worker.phone)
+        self.assertEqual(Review.objects.get().application_id, application.pk)
+
+        rows = b"".join(self.client.get(f"/api/job-applications/export/?worker_phone={self.worker.phone}")).split(b"\n")
+        self.assertEqual(len([row for row in rows if row]), 1)
+        rows = b"".join(self.client.get(f"/api/bookings/export/?employer_phone={self.employer.phone}&fmt=csv"))
+        self.assertEqual(len(rows.decode().splitlines()), 3)  # header, archived, live
+
+    def test_prune_and_command(self):
+        Booking.objects.create(employer_phone=self.employer, worker_phone=self.worker)  # records an event
+        Event.objects.update(created_at=self.long_ago)
+        call_command("sweep", "--batch-size", "1", stdout=io.StringIO())
+        self.assertFalse(Event.objects.exists())
+
+
+class MatchingTests(APITestCase):
+    """The NumPy index (api/matching.py) must rank exactly like the same score computed by the database."""
+
+    def setUp(self):
+        self.employer = make_employer(latitude=18.52, longitude=73.85)
+        self.job = make_job(self.employer, work_type="plumber", wage=700)
+        rows = [
+            dict(skills="plumber", latitude=18.53, longitude=73.86, rating_score=4.1, wages=650),
+            dict(skills="plumber, painter", latitude=18.70, longitude=73.95, rating_score=4.8, wages=900),
+            dict(skills="painter", latitude=18.52, longitude=73.85, rating_score=3.2, wages=None),
+            dict(skills="Plumber", latitude=None, longitude=None, rating_score=3.9, wages=1500),
+            dict(skills="mason", latitude=19.10, longitude=72.90, rating_score=4.5, wages=500),
+            dict(skills="plumber", latitude=18.60, longitude=73.80, rating_score=2.7, wages=800),
+        ]
+        self.workers = [make_worker(**row) for row in rows]
+        sync_worker_skills(self.workers)
+        busy = make_worker(skills="plumber", rating_score=5.0)
+        WorkerOccupancy.objects.create(worker=busy, date=self.job.work_date, kind="off")
+        matching.worker_index.invalidate()  # drop workers left in the index by other tests
+
+    def orm_ranking(self, job):
+        # the index's score, computed by the database for every worker free on the job's day
+        lat, lon, wage = self.employer.latitude, self.employer.longitude, float(job.wage)
+        weights = matching.WEIGHTS
+        has_skill = Exists(WorkerSkill.objects.filter(worker=OuterRef("pk"), skill__name=job.work_type))
+        closeness = Coalesce(Exp(-geo.haversine_expression(lat, lon) / matching.DISTANCE_SCALE_KM), Value(0.0))
+        wage_fit = Case(
+            When(wages__isnull=True, then=Value(1.0)),
+            default=Greatest(Least(Value(2.0) - Cast("wages", FloatField()) / wage, Value(1.0)), Value(0.0)),
+            output_field=FloatField(),
+        )
+        score = (
+            Case(When(has_skill, then=Value(weights["skill"])), default=Value(0.0), output_field=FloatField())
+            + Value(weights["distance"]) * closeness
+            + Value(weights["rating"]) * F("rating_score") / matching.MAX_RATING
+            + Value(weights["wage"]) * wage_fit
+        )
+        workers = Worker.objects.free_on(job.work_date).annotate(score=score).order_by("-score")
+        return list(workers.values_list("phone", "score"))
+
+    def assertSameRanking(self, job=None):
+        job = job or Job.objects.select_related("employer_phone").get(pk=self.job.pk)
+        ranked = matching.rank_workers_for_job(job, k=100)
+        expected = self.orm_ranking(job)
+        self.assertEqual([phone for phone, _, _ in ranked], [phone for phone, _ in expected])
+        for (_, score, _), (_, orm_score) in zip(ranked, expected):
+            self.assertAlmostEqual(score, orm_score, places=3)
+        return ranked
+
+    def test_index_agrees_with_the_database(self):
+        ranked = self.assertSameRanking()
+        self.assertEqual(len(ranked), len(self.workers))
+        distances = {phone: distance for phone, _, distance in ranked}
+        self.assertIsNone(distances[self.workers[3].phone])
+        self.assertAlmostEqual(distances[self.workers[1].phone], geo.haversine_km(18.52, 73.85, 18.70, 73.95), places=2)
+
+    def test_top_k_is_the_head_of_the_full_ranking(self):
+        full = matching.rank_workers_for_job(self.job, k=100)
+        self.assertEqual(matching.rank_workers_for_job(self.job, k=3), full[:3])
+
+    def test_changed_workers_are_reloaded(self):
+        self.assertSameRanking()
+        last = self.workers[4]
+        last.skills, last.latitude, last.longitude = "plumber", 18.52, 73.85
+        last.save()
+        sync_worker_skills([last])
+        self.assertEqual(self.assertSameRanking()[0][0], last.phone)
+
+        # writes that bypass save() are announced explicitly
+        Worker.objects.filter(phone=last.phone).update(rating_score=0.5, wages=5000)
+        matching.workers_changed([last.phone])
+        with self.assertNumQueries(1):  # only the dirty row is read back
+            matching.worker_index.rank(lat=18.52, lon=73.85, skill="plumber", wage=700)
+        self.assertNotEqual(self.assertSameRanking()[0][0], last.phone)
+
+        self.workers[0].delete()
+        new = make_worker(skills="plumber", latitude=18.521, longitude=73.851, rating_score=4.9, wages=700)
+        sync_worker_skills([new])
+        ranked = self.assertSameRanking()
+        self.assertEqual(ranked[0][0], new.phone)
+        self.assertNotIn(self.workers[0].phone, [phone for phone, _, _ in ranked])
+
+
+class BroadcastTests(APITestCase):
+    def setUp(self):
+        self.employer = make_employer(latitude=18.52, longitude=73.85)
+        self.job = make_job(self.employer)
+        self.workers = [make_worker() for _ in range(6)]
+        WorkerOccupancy.objects.create(worker=make_worker(), date=self.job.work_date, kind="off")
+        JobApplication.objects.create(job=self.job, worker_phone=self.workers[0])
+        JobContact.objects.create(job=self.job, worker_phone=self.workers[1])
+        matching.worker_index.invalidate()  # drop workers left in the index by other tests
+
+    def broadcast(self, **data):
+        return self.client.post(f"/api/jobs/{self.job.pk}/broadcast/", data, format="json")
+
+    def test_broadcast_contacts_new_available_workers_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.broadcast(limit=3)
+        self.assertEqual(response.status_code, 200, response.content)
+        contacted = [row["worker_phone"] for row in response.data["contacted"]]
+        self.assertEqual(len(contacted), 3)
+        self.assertFalse({self.workers[0].phone, self.workers[1].phone} & set(contacted))
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+
+        rest = [row["worker_phone"] for row in self.broadcast(limit=500).data["contacted"]]
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(JobContact.objects.filter(job=self.job).count(), 5)
+        self.assertEqual(self.broadcast().data["contacted"], [])
+
+        Job.objects.filter(pk=self.job.pk).update(status="assigned")
+        self.assertEqual(self.broadcast().status_code, 409)
+        self.assertEqual(self.client.post("/api/jobs/0/broadcast/").status_code, 404)
+
+    def test_worker_answers_many_contacts_at_once(self):
+        other = make_job(self.employer)
+        JobContact.objects.create(job=other, worker_phone=self.workers[1])
+        answers = [
+            {"job_id": self.job.pk, "response": "accepted"},
+            {"job_id": other.pk, "response": "rejected"},
+            {"job_id": 0, "response": "accepted"},
+        ]
+        response = self.client.post(
+            "/api/job-contacts/respond/", {"worker_phone": self.workers[1].phone, "responses": answers}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data, {"updated": sorted([self.job.pk, other.pk]), "not_contacted": [0]})
+        self.assertEqual(
+            dict(JobContact.objects.filter(worker_phone=self.workers[1]).values_list("job_id", "response")),
+            {self.job.pk: "accepted", other.pk: "rejected"},
+        )
+        bad = [{"job_id": self.job.pk, "response": "maybe"}]
+        response = self.client.post(
+            "/api/job-contacts/respond/", {"worker_phone": self.workers[1].phone, "responses": bad}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class PincodeTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = os.path.join(directory.name, "pincodes.csv")
+        with open(source, "w") as f:
+            f.write("officename,Pincode,Latitude,Longitude\n"
+                    "Shivajinagar,411005,18.53,73.85\n"
+                    "Deccan,411005,18.51,73.83\n"
+                    "Andheri,400053,19.12,72.84\n"
+                    "Nowhere,560001,NA,NA\n")
+        self.path = os.path.join(directory.name, "pincodes.bin")
+        call_command("build_pincode_table", source, "--output", self.path, stdout=io.StringIO())
+        settings = override_settings(PINCODE_TABLE_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        pincodes.table.cache_clear()
+        self.addCleanup(pincodes.table.cache_clear)
+
+    def test_lookup(self):
+        self.assertEqual(len(pincodes.table()), 2)
+        self.assertEqual(pincodes.coordinates("411 005"), (18.52, 73.84))
+        self.assertEqual(pincodes.coordinates(400053), (19.12, 72.84))
+        for unknown in ("560001", "411006", "000000", "41100", "", None):
+            self.assertIsNone(pincodes.coordinates(unknown))
+
+    def test_serializers_fill_missing_coordinates(self):
+        response = self.client.post("/api/workers/", {
+            "phone": "9123456789", "name": "Ravi", "location": "Pune", "skills": "mason", "pincode": "411005",
+            "has_phone": False,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        worker = Worker.objects.get(phone="9123456789")
+        self.assertEqual((worker.latitude, worker.longitude), (18.52, 73.84))
+        self.assertIsNotNone(worker.geo_cell)
+        gps = make_employer(latitude=18.6, longitude=73.9)
+        self.client.patch(f"/api/employers/{gps.phone}/", {"pincode": "400053"}, format="json")
+        gps.refresh_from_db()
+        self.assertEqual((gps.latitude, gps.longitude), (18.6, 73.9))  # real coordinates are kept
+
+    def test_backfill_command(self):
+        worker = make_worker(latitude=None, longitude=None, pincode="400053")
+        unknown = make_worker(latitude=None, longitude=None, pincode="999999")
+        employer = make_employer(pincode="411005")
+        call_command("backfill_coordinates", "--batch-size", "1", stdout=io.StringIO())
+        worker.refresh_from_db()
+        unknown.refresh_from_db()
+        employer.refresh_from_db()
+        self.assertEqual((worker.latitude, worker.longitude), (19.12, 72.84))
+        self.assertEqual(worker.geo_cell, pincodes.geo.cell_for(19.12, 72.84))
+        self.assertIsNone(unknown.latitude)
+        self.assertEqual(employer.latitude, 18.52)
+
+    def test_backfill_queries_per_batch_not_per_row(self):
+        def queries(rows):
+            phones = [make_worker(latitude=None, longitude=None, pincode="400053").phone for _ in range(rows)]
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(pincodes.backfill(Worker.objects.filter(phone__in=phones), batch_size=100), rows)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(20))
+
+
+class QueryPlanTests(APITestCase):
+    """
+    Runs each endpoint's SQL through EXPLAIN and fails if it would read one of
+    the large tables sequentially. On Postgres sequential scans are priced out
+    so the plan shows whether a usable index exists at all, not just whether
+    the planner prefers it for a small test table.
+    """
+    LARGE_TABLES = ("workers", "worker_skills", "jobs", "job_applications", "bookings", "job_contacts", "tombstones")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employer(latitude=18.52, longitude=73.85)
+        cls.worker = make_worker()
+        for i in range(30):
+            job = make_job(cls.employer, status=("open", "assigned", "completed")[i % 3])
+            JobApplication.objects.create(job=job, worker_phone=make_worker(), status="completed")
+            Booking.objects.create(employer_phone=make_employer(), worker_phone=cls.worker)
+            Booking.objects.create(employer_phone=cls.employer, worker_phone=make_worker())
+        cls.job = job
+        JobApplication.objects.create(job=job, worker_phone=cls.worker, status="completed")
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+                cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("RESET enable_seqscan")
+
+    def sequential_scans(self, sql):
+        if connection.vendor == "postgresql":
+            explain, pattern = "EXPLAIN ", r"Seq Scan on (\w+)"
+        else:
+            # SQLite reports a full table walk as "SCAN <table>" (with no index)
+            explain, pattern = "EXPLAIN QUERY PLAN ", r"\bSCAN (\w+)(?! USING)"
+        with connection.cursor() as cursor:
+            cursor.execute(explain + sql)
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        return [table for table in re.findall(pattern, plan) if table in self.LARGE_TABLES], plan
+
+    def assertIndexedPlans(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        for query in captured:
+            if not query["sql"].lstrip().upper().startswith("SELECT"):
+                continue
+            tables, plan = self.sequential_scans(query["sql"])
+            self.assertFalse(tables, f"{url} scans {tables}:\n{query['sql']}\n{plan}")
+
+    def test_nearby_workers(self):
+        self.assertIndexedPlans("/api/workers/nearby/?lat=18.52&lon=73.85&radius_km=5&skill=plumber")
+
+    def test_top_rated_workers(self):
+        self.assertIndexedPlans("/api/workers/top_rated/")
+
+    def test_workers_by_skill(self):
+        self.assertIndexedPlans("/api/workers/?skills=plumber,painter&match=all")
+
+    def test_sync(self):
+        since = encode_cursor(timezone.now() - datetime.timedelta(hours=1))
+        self.assertIndexedPlans(f"/api/sync/?phone={self.worker.phone}&since={since}")
+        self.assertIndexedPlans(f"/api/sync/?phone={self.employer.phone}&since={since}")
+
+    def test_my_jobs(self):
+        self.assertIndexedPlans(f"/api/jobs/my_jobs/?employer_phone={self.employer.phone}")
+
+    def test_employer_history(self):
+        self.assertIndexedPlans(f"/api/jobs/employer_history/?employer_phone={self.employer.phone}")
+
+    def test_worker_history(self):
+        self.assertIndexedPlans(f"/api/jobs/worker_history/?worker_phone={self.worker.phone}")
+
+    def test_job_feed(self):
+        self.assertIndexedPlans(f"/api/jobs/feed/?worker_phone={self.worker.phone}")
+
+    def test_applications_by_job(self):
+        self.assertIndexedPlans(f"/api/job-applications/?job_id={self.job.pk}")
+
+    def test_application_by_job_and_worker(self):
+        self.assertIndexedPlans(
+            f"/api/job-applications/get_by_job_and_worker/?job_id={self.job.pk}&worker_phone={self.worker.phone}"
+        )
+
+    def test_my_bookings(self):
+        self.assertIndexedPlans(f"/api/bookings/my_bookings/?employer_phone={self.employer.phone}")
+
+    def test_worker_bookings(self):
+        self.assertIndexedPlans(f"/api/bookings/worker_bookings/?worker_phone={self.worker.phone}")
+
+    def test_booking_list(self):
+        self.assertIndexedPlans("/api/bookings/")
+
+    def test_application_list(self):
+        self.assertIndexedPlans("/api/job-applications/")
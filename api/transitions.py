@@ -0,0 +1,265 @@
+# api/transitions.py
+"""
+Application and booking state transitions.
+
+Each transition is one conditional ``UPDATE ... WHERE status=<expected>
+RETURNING ...`` (compare-and-swap) inside ``transaction.atomic``. The new
+status is worked out by the statement itself from the row's current flags
+(``CASE WHEN employer_complete ...``), and the columns the follow-up work
+needs come back with it, so a transition never reads the row before or
+after changing it. Backends without ``UPDATE ... RETURNING`` run the same
+swap through ``QuerySet.update`` and read the changed row once afterwards.
+Only a swap that matches nothing reads the status, to
+tell a repeated request (answered with the current status) from a conflict
+(``TransitionConflict``) or a missing row (404). Only the changed columns
+are written.
+
+``QuerySet.update`` bypasses ``post_save``, so the detail cache, the
+ranking index and the change feed (``api/events.py``) are updated here
+explicitly. Confirmed work takes its day in the worker's calendar
+(``api/availability.py``) and completing it frees the day again.
+"""
+from django.db import connections, transaction
+from django.db.models import Case, Value, When
+from django.db.models.sql import UpdateQuery
+from django.http import Http404
+from django.utils import timezone
+
+from . import availability, cache, events, stats
+from .models import Job, JobApplication, Booking
+
+ROLES = ("employer", "worker")
+
+
+class TransitionConflict(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _other(role):
+    return "worker" if role == "employer" else "employer"
+
+
+def _can_update_returning(connection):
+    """Whether ``connection`` runs ``UPDATE ... RETURNING``: Postgres, and SQLite from 3.35.
+
+    Not ``features.can_return_columns_from_insert``: that is about INSERT, and
+    MariaDB sets it without supporting RETURNING on UPDATE.
+    """
+    if connection.vendor == "postgresql":
+        return True
+    return connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def _update_returning(queryset, changes, returning):
+    """``queryset.update(**changes)`` as one ``UPDATE ... RETURNING`` statement.
+
+    Returns ``{name: value}`` of ``returning`` for the first changed row, or
+    None. A ``relation__field`` name is read one foreign key away by a subquery
+    in the same statement. Django has no public API for this: the ORM compiles
+    the UPDATE, the RETURNING clause is appended, and the values go through
+    the same converters ``values()`` applies. Only call it where
+    ``_can_update_returning`` holds.
+    """
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    meta = queryset.model._meta
+    table = qn(meta.db_table)
+
+    def column(name):
+        relation, _, name = name.partition("__")
+        field = meta.get_field(relation)
+        if not name:
+            return f"{table}.{qn(field.column)}", field.get_col(meta.db_table)
+        related = field.related_model._meta
+        target = related.get_field(name)
+        sql = (
+            f"(SELECT {qn(target.column)} FROM {qn(related.db_table)} "
+            f"WHERE {qn(related.db_table)}.{qn(field.target_field.column)} = {table}.{qn(field.column)})"
+        )
+        return sql, target.get_col(related.db_table)
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(changes)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = [column(name) for name in returning]
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {', '.join(sql for sql, _ in columns)}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    values = {}
+    for name, value, (_, col) in zip(returning, row, columns):
+        for converter in connection.ops.get_db_converters(col) + col.get_db_converters(connection):
+            value = converter(value, col, connection)
+        values[name] = value
+    return values
+
+
+def _swap(model, pk, expected, returning, filters=None, **changes):
+    """Apply ``changes`` only if the row is still in status ``expected``.
+
+    Returns ``{name: value}`` of ``returning`` read from the changed row, or
+    None when the row was not in that status. One round trip where the
+    backend runs ``UPDATE ... RETURNING``; elsewhere the same swap goes
+    through ``QuerySet.update`` and the changed row is read once.
+    """
+    queryset = model.objects.filter(pk=pk, status=expected, **(filters or {}))
+    changes["updated_at"] = timezone.now()
+    if _can_update_returning(connections[queryset.db]):
+        return _update_returning(queryset, changes, returning)
+    if not queryset.update(**changes):
+        return None
+    return model.objects.filter(pk=pk).values(*returning).first()
+
+
+def _status(model, pk):
+    """The row's current status, after a swap matched nothing."""
+    status = model.objects.filter(pk=pk).values_list("status", flat=True).first()
+    if status is None:
+        raise Http404(f"No {model.__name__} matches the given query.")
+    return status
+
+
+def _completed_if(flag, otherwise):
+    return Case(When(**{flag: True}, then=Value("completed")), default=Value(otherwise))
+
+
+def _occupy(phone, day, kind, status, **source):
+    try:
+        availability.occupy(phone, day, kind, **source)
+    except availability.Busy as exc:
+        raise TransitionConflict(str(exc), status=status)
+
+
+def _application_event(pk, status, app):
+    events.application_changed(pk, status, app["worker_phone"], app["job__employer_phone"], app["job_id"])
+
+
+def _booking_event(pk, status, booking):
+    events.booking_changed(pk, status, booking["worker_phone"], booking["employer_phone"])
+
+
+# -- job applications ----------------------------------------------------------
+
+# returned by the swap so the change can be published to both parties
+APPLICATION_PARTIES = ("job_id", "worker_phone", "job__employer_phone")
+
+def accept_application(pk):
+    """Employer selects the worker; the worker still has to confirm."""
+    status = "waiting_for_worker_confirmation"
+    with transaction.atomic():
+        app = _swap(JobApplication, pk, "pending", APPLICATION_PARTIES, employer_accept=True, status=status)
+        if app is None:
+            current = _status(JobApplication, pk)
+            if current == status:
+                return current
+            raise TransitionConflict("Only pending applications can be accepted", status=current)
+        _application_event(pk, status, app)
+    cache.invalidate(Job, [app["job_id"]])
+    return status
+
+
+def worker_accept_application(pk):
+    """Worker confirms. Once the employer has accepted too, the job is assigned to this worker."""
+    waiting = "waiting_for_worker_confirmation"
+    with transaction.atomic():
+        status = "accepted"
+        app = _swap(
+            JobApplication, pk, waiting, APPLICATION_PARTIES + ("job__work_date",),
+            filters={"employer_accept": True}, worker_accept=True, status=status,
+        )
+        if app is not None:
+            # a job is assigned at most once, whichever worker confirms first wins
+            if not Job.objects.filter(pk=app["job_id"], status="open").update(
+                status="assigned", updated_at=timezone.now()
+            ):
+                raise TransitionConflict("Job is no longer open", status=waiting)
+            _occupy(app["worker_phone"], app["job__work_date"], "job", waiting, application_id=pk)
+        else:
+            status = "pending"  # employer has not chosen this worker yet
+            app = _swap(JobApplication, pk, status, APPLICATION_PARTIES, worker_accept=True)
+        if app is None:
+            current = _status(JobApplication, pk)
+            if current == "accepted":
+                return current
+            raise TransitionConflict("Application can no longer be confirmed", status=current)
+        _application_event(pk, status, app)
+
+    cache.invalidate(Job, [app["job_id"]])
+    return status
+
+
+def complete_application(pk, role):
+    """Marks the role's completion flag; once both sides are done the application and job complete."""
+    with transaction.atomic():
+        # the other side's flag is read by the same UPDATE, under the row lock, so two
+        # sides finishing at once still complete the application
+        app = _swap(
+            JobApplication, pk, "accepted", ("status",) + APPLICATION_PARTIES + ("job__wage",),
+            status=_completed_if(f"{_other(role)}_complete", "accepted"), **{f"{role}_complete": True},
+        )
+        if app is None:
+            current = _status(JobApplication, pk)
+            if current == "completed":
+                return current
+            raise TransitionConflict("Only accepted applications can be completed", status=current)
+        status = app["status"]
+        if status == "completed":
+            Job.objects.filter(pk=app["job_id"]).update(status="completed", updated_at=timezone.now())
+            availability.release(application_id=pk)
+            stats.job_completed(app["worker_phone"], app["job__wage"])
+        _application_event(pk, status, app)
+
+    cache.invalidate(Job, [app["job_id"]])
+    return status
+
+
+# -- bookings ------------------------------------------------------------------
+
+BOOKING_PARTIES = ("worker_phone", "employer_phone")
+
+def respond_booking(pk, role, response):
+    """Records one side's yes/no; any no declines the booking, two yeses accept it."""
+    if response:
+        status = Case(When(**{f"{_other(role)}_response": True}, then=Value("accepted")), default=Value("pending"))
+    else:
+        status = Value("declined")
+    with transaction.atomic():
+        booking = _swap(
+            Booking, pk, "pending", ("status", "work_date") + BOOKING_PARTIES,
+            status=status, **{f"{role}_response": response},
+        )
+        if booking is None:
+            # a repeated yes finds the booking accepted (the other side had said yes), a repeated no declined
+            current = _status(Booking, pk)
+            if current == ("accepted" if response else "declined"):
+                return current
+            raise TransitionConflict("Booking has already been decided", status=current)
+        status = booking["status"]
+        if status == "accepted":
+            day = booking["work_date"] or timezone.localdate()
+            _occupy(booking["worker_phone"], day, "booking", "pending", booking_id=pk)
+        _booking_event(pk, status, booking)
+    return status
+
+
+def complete_booking(pk, role):
+    """Marks the role's completion flag; once both sides are done the booking completes."""
+    with transaction.atomic():
+        booking = _swap(
+            Booking, pk, "accepted", ("status",) + BOOKING_PARTIES,
+            status=_completed_if(f"{_other(role)}_complete", "accepted"), **{f"{role}_complete": True},
+        )
+        if booking is None:
+            current = _status(Booking, pk)
+            if current == "completed":
+                return current
+            raise TransitionConflict("Only accepted bookings can be completed", status=current)
+        status = booking["status"]
+        if status == "completed":
+            availability.release(booking_id=pk)
+            stats.booking_completed(booking["worker_phone"])
+        _booking_event(pk, status, booking)
+    return status
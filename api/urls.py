@@ -1,7 +1,8 @@
 # shramo/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WorkerViewSet, EmployerViewSet, JobViewSet, JobApplicationViewSet,JobContactViewSet,BookingViewSet
+from . import async_views
+from .views import WorkerViewSet, EmployerViewSet, JobViewSet, JobApplicationViewSet,JobContactViewSet,BookingViewSet, ReviewViewSet, cache_stats, sync_changes
 
 router = DefaultRouter()
 router.register(r'workers', WorkerViewSet, basename='worker')
@@ -10,7 +11,22 @@ router.register(r'jobs', JobViewSet, basename='job')
 router.register(r'job-applications', JobApplicationViewSet, basename='jobapplication')
 router.register(r'job-contacts', JobContactViewSet, basename='jobcontact')
 router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'reviews', ReviewViewSet, basename='review')
+
+# async (ASGI) read path, see api/async_views.py
+async_urlpatterns = [
+    path('workers/', async_views.workers, name='async-workers'),
+    path('workers/nearby/', async_views.workers_nearby, name='async-workers-nearby'),
+    path('jobs/feed/', async_views.job_feed, name='async-job-feed'),
+    path('bookings/my_bookings/', async_views.my_bookings, name='async-my-bookings'),
+    path('bookings/worker_bookings/', async_views.worker_bookings, name='async-worker-bookings'),
+]
 
 urlpatterns = [
+    path('cache-stats/', cache_stats, name='cache-stats'),
+    path('sync/', sync_changes, name='sync'),
+    path('async/', include(async_urlpatterns)),
+    path('events/', async_views.event_stream, name='event-stream'),
+    path('events/poll/', async_views.event_poll, name='event-poll'),
     path('', include(router.urls)),
 ]
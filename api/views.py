@@ -1,33 +1,322 @@
 # shramo/views.py
-from rest_framework import viewsets
-from rest_framework.decorators import action
+import datetime
+import itertools
+from contextlib import contextmanager
+
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
-from .models import Worker, Employer, Job, JobApplication,JobContact,Booking
-from .serializers import WorkerSerializer, EmployerSerializer, JobSerializer, JobApplicationSerializer,JobContactSerializer,BookingSerializer
+from .models import Worker, Employer, Job, JobApplication,JobContact,Booking,WorkerStats,Review
+from .models import ArchivedJob, ArchivedJobApplication, ArchivedBooking
+from .serializers import WorkerSerializer, EmployerSerializer, JobSerializer, JobFeedSerializer, JobApplicationSerializer,JobContactSerializer,BookingSerializer,WorkerStatsSerializer,ReviewSerializer
 from rest_framework import status
+from . import availability, cache, conditional, fanout, feed, geo, matching, ratings, sparse, sync, transitions
+from .bulk_import import JobImporter, UnsupportedFormat, WorkerImporter, read_records
+from .cache import CachedRetrieveMixin
+from .idempotency import IdempotentMixin
+from .middleware import serializing
+from .export import ExportError, export_response, filter_export, iter_values
+from .skills import normalize_skill, parse_skills
 
-class WorkerViewSet(viewsets.ModelViewSet):
+
+def bulk_import_response(request, importer):
+    try:
+        records = read_records(request)
+    except UnsupportedFormat as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    return Response(importer.run(records))
+
+
+def parse_day(value):
+    """A YYYY-MM-DD string as a date, or None."""
+    try:
+        return parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+class TransitionConflictError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Conflicting state change"
+    default_code = "conflict"
+
+
+@contextmanager
+def transition_errors():
+    """Surface a failed compare-and-swap as 409 with the row's current status."""
+    try:
+        yield
+    except transitions.TransitionConflict as exc:
+        raise TransitionConflictError({"error": str(exc), "status": exc.status})
+
+
+def export_history(request, queryset, date_field, fields, filename, archive=None):
+    """Export ``queryset``, preceded by the matching rows of its ``archive`` table (see api/sweeper.py)."""
+    try:
+        querysets = [filter_export(request, qs, date_field) for qs in (archive, queryset) if qs is not None]
+        rows = itertools.chain.from_iterable(iter_values(qs, fields) for qs in querysets)
+        return export_response(request, rows, fields, filename)
+    except ExportError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PaginatedActionMixin:
+    """Lets custom list actions page through the keyset paginator like `list` does.
+
+    Also applies ``?fields=``/``?expand=`` (see api/sparse.py) to the queryset and the page.
+    """
+    # nested serializer field -> select_related path or Prefetch, only used while the relation is expanded
+    expandable = {}
+
+    def get_queryset(self):
+        return sparse.restrict(super().get_queryset(), self.get_serializer(), self.expandable)
+
+    def list(self, request, *args, **kwargs):
+        return self.paginated_response(self.filter_queryset(self.get_queryset()))
+
+    def paginated_response(self, queryset, ordering=None):
+        ordering = ordering or self.keyset_ordering
+        serializer = self.get_serializer()
+        columns = sparse.flat_columns(serializer, queryset)
+        if columns is not None:
+            # plain columns only: no model instances, no field-by-field serialization
+            rows = sparse.values(queryset, columns, ordering)
+            page = self.paginator.paginate_queryset(rows, self.request, view=self, ordering=ordering)
+            with serializing():
+                results = sparse.render(page, columns)
+            return self.paginator.get_paginated_response(results)
+        queryset = sparse.keep_columns(queryset, [field.lstrip("-") for field in ordering])
+        page = self.paginator.paginate_queryset(queryset, self.request, view=self, ordering=ordering)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    def conditional_paginated_response(self, queryset, state, ordering=None):
+        """``paginated_response``, or 304 while ``state`` (see api/conditional.py) is what the client last saw."""
+        etag, last_modified = conditional.validators(self.request, state)
+        return conditional.respond(
+            self.request, lambda: self.paginated_response(queryset, ordering), etag, last_modified
+        )
+
+
+class WorkerViewSet(IdempotentMixin, CachedRetrieveMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = Worker.objects.all()
     serializer_class = WorkerSerializer
     lookup_field = 'phone'
+    keyset_ordering = ('phone',)
 
-class EmployerViewSet(viewsets.ModelViewSet):
+    # ✅ ?skills=a,b&match=any|all filters through the WorkerSkill index
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        skills = parse_skills(self.request.query_params.get("skills"))
+        if skills:
+            match = "all" if self.request.query_params.get("match") == "all" else "any"
+            queryset = queryset.with_skills(skills, match=match)
+        return queryset
+
+    # ✅ Profile summary: one row maintained by the completion transitions
+    @action(detail=True, methods=["get"])
+    def stats(self, request, phone=None):
+        worker_stats = WorkerStats.objects.filter(worker_id=phone).first()
+        if worker_stats is None:
+            if not Worker.objects.filter(phone=phone).exists():
+                return Response({"error": "Worker not found"}, status=status.HTTP_404_NOT_FOUND)
+            worker_stats = WorkerStats(worker_id=phone)
+        return Response(WorkerStatsSerializer(worker_stats).data)
+
+    # ✅ Field agents onboard workers in bulk: NDJSON or CSV body, upserted on phone
+    @action(detail=False, methods=["post"])
+    def bulk_import(self, request):
+        return bulk_import_response(request, WorkerImporter())
+
+    # ✅ Workers near a point, nearest first
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        lat = geo.parse_coordinate(request.query_params.get("lat"), 90)
+        lon = geo.parse_coordinate(request.query_params.get("lon"), 180)
+        if lat is None or lon is None:
+            return Response({"error": "valid lat and lon required"}, status=status.HTTP_400_BAD_REQUEST)
+        radius_km = geo.parse_radius(request.query_params.get("radius_km"))
+        if radius_km is None:
+            return Response({"error": "radius_km must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        workers = Worker.objects.near(lat, lon, radius_km)
+        skill = normalize_skill(request.query_params.get("skill"))
+        if skill:
+            workers = workers.with_skills([skill])
+        # ?sort=rating: best rated within the radius first
+        if request.query_params.get("sort") == "rating":
+            return self.paginated_response(workers, ordering=("-rating_score", "phone"))
+        return self.paginated_response(workers, ordering=("distance_km", "phone"))
+
+    # ✅ Workers free on ?date=YYYY-MM-DD (default today), optionally with a ?skill and near ?lat/?lon
+    # (?radius_km): one query, the calendar is checked through its (date, worker) index
+    @action(detail=False, methods=["get"])
+    def available(self, request):
+        day = parse_day(request.query_params.get("date")) if request.query_params.get("date") else timezone.localdate()
+        if day is None:
+            return Response({"error": "date must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        workers = self.get_queryset()
+        skill = normalize_skill(request.query_params.get("skill"))
+        if skill:
+            workers = workers.with_skills([skill])
+        workers = workers.free_on(day)
+        if "lat" not in request.query_params and "lon" not in request.query_params:
+            return self.paginated_response(workers, ordering=("-rating_score", "phone"))
+
+        lat = geo.parse_coordinate(request.query_params.get("lat"), 90)
+        lon = geo.parse_coordinate(request.query_params.get("lon"), 180)
+        if lat is None or lon is None:
+            return Response({"error": "valid lat and lon required"}, status=status.HTTP_400_BAD_REQUEST)
+        radius_km = geo.parse_radius(request.query_params.get("radius_km"))
+        if radius_km is None:
+            return Response({"error": "radius_km must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.paginated_response(workers.near(lat, lon, radius_km), ordering=("distance_km", "phone"))
+
+    # ✅ Busy days (?from, ?to; the next 30 days by default). POST {"dates": [...], "off": true|false}
+    # blocks days out or frees them again
+    @action(detail=True, methods=["get", "post"])
+    def calendar(self, request, phone=None):
+        if not Worker.objects.filter(phone=phone).exists():
+            return Response({"error": "Worker not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.method == "POST":
+            dates = request.data.get("dates")
+            days = [parse_day(value) for value in dates] if isinstance(dates, list) else []
+            if not days or None in days:
+                return Response({"error": "dates must be a list of YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+            off = request.data.get("off", True)  # boolean
+            if not isinstance(off, bool):
+                return Response({"error": "off must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+            availability.set_days_off(phone, days, off=off)
+
+        params = request.query_params
+        start = parse_day(params["from"]) if params.get("from") else timezone.localdate()
+        end = parse_day(params["to"]) if params.get("to") else start and start + datetime.timedelta(days=30)
+        if start is None or end is None:
+            return Response({"error": "from and to must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"from": start, "to": end, "busy": availability.calendar(phone, start, end)})
+
+    # ✅ Highest Bayesian rating first, read in index order (?skill= narrows it down)
+    @action(detail=False, methods=["get"])
+    def top_rated(self, request):
+        workers = self.get_queryset()
+        skill = normalize_skill(request.query_params.get("skill"))
+        if skill:
+            workers = workers.with_skills([skill])
+        return self.paginated_response(workers, ordering=("-rating_score", "phone"))
+
+class EmployerViewSet(IdempotentMixin, CachedRetrieveMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = Employer.objects.all()
     serializer_class = EmployerSerializer
     lookup_field = 'phone'
+    keyset_ordering = ('phone',)
 
 # shramo/views.py
-class JobViewSet(viewsets.ModelViewSet):
-    queryset = Job.objects.all()
+class JobViewSet(IdempotentMixin, CachedRetrieveMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    # JobSerializer nests every application and its worker
+    queryset = Job.objects.prefetch_related(
+        Prefetch("applications", queryset=JobApplication.objects.select_related("worker_phone"))
+    )
     serializer_class = JobSerializer
+    expandable = {
+        "applications": Prefetch("applications"),
+        "applications.worker": Prefetch("applications", queryset=JobApplication.objects.select_related("worker_phone")),
+    }
+    # ids are handed out in creation order, and unlike created_at they are never null
+    keyset_ordering = ('-id',)
+
+    def get_serializer_class(self):
+        return JobFeedSerializer if self.action == "feed" else super().get_serializer_class()
+
+    # ✅ Bulk job upload: NDJSON or CSV body
+    @action(detail=False, methods=["post"])
+    def bulk_import(self, request):
+        return bulk_import_response(request, JobImporter())
+
+    # ✅ Best available workers for this job, ranked by skill, distance, rating and wage
+    @action(detail=True, methods=["get"])
+    def candidates(self, request, pk=None):
+        job = Job.objects.select_related("employer_phone").filter(pk=pk).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = matching.rank_workers_for_job(job, k=limit)
+        workers = Worker.objects.in_bulk([phone for phone, _, _ in ranked])
+        return Response([
+            {"score": score, "distance_km": distance, "worker": WorkerSerializer(workers[phone]).data}
+            for phone, score, distance in ranked
+            if phone in workers
+        ])
+
+    # ✅ Contact the best available workers for an open job in one batch ({"limit": 50}, at most 500)
+    @action(detail=True, methods=["post"])
+    def broadcast(self, request, pk=None):
+        job = Job.objects.select_related("employer_phone").filter(pk=pk).first()
+        if job is None:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != "open":
+            return Response({"error": "Job is not open", "status": job.status}, status=status.HTTP_409_CONFLICT)
+        try:
+            limit = min(max(int(request.data.get("limit", 50)), 1), fanout.MAX_WORKERS)
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # ✅ Employer can list only their jobs
+        contacted = fanout.broadcast(job, limit)
+        return Response({
+            "job_id": job.pk,
+            "contacted": [
+                {"worker_phone": phone, "score": score, "distance_km": distance}
+                for phone, score, distance in contacted
+            ],
+        })
+
+    # ✅ Worker's personalised feed: open, upcoming, not yet applied, best match first
+    @action(detail=False, methods=["get"])
+    def feed(self, request):
+        worker_phone = request.query_params.get("worker_phone")
+        if not worker_phone:
+            return Response({"error": "worker_phone required"}, status=status.HTTP_400_BAD_REQUEST)
+        worker = Worker.objects.filter(phone=worker_phone).first()
+        if worker is None:
+            return Response({"error": "Worker not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        applied = JobApplication.objects.filter(job=OuterRef("pk"), worker_phone=worker_phone)
+        jobs = (
+            self.get_queryset().prefetch_related(None)  # the feed serializer does not embed applications
+            .filter(status="open", work_date__gte=timezone.localdate())
+            .filter(~Exists(applied))
+        )
+        jobs = feed.rank_jobs_for_worker(jobs, worker)
+        return self.paginated_response(jobs, ordering=("-feed_score", "-id"))
+
+    # ✅ Employer can list only their jobs (conditional: polls of an unchanged list get 304)
     @action(detail=False, methods=["get"])
     def my_jobs(self, request):
         employer_phone = request.query_params.get("employer_phone")
-        jobs = Job.objects.filter(employer_phone=employer_phone)
-        serializer = self.get_serializer(jobs, many=True)
-        return Response(serializer.data)
+        jobs = self.get_queryset().filter(employer_phone=employer_phone)
+        return self.conditional_paginated_response(jobs, conditional.job_state(employer_phone))
+
+    # ✅ Streaming export for payroll/analytics (?employer_phone, ?worker_phone, ?status, ?date_from, ?date_to, ?fmt)
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        def narrow(jobs):
+            if request.query_params.get("employer_phone"):
+                jobs = jobs.filter(employer_phone=request.query_params["employer_phone"])
+            if request.query_params.get("worker_phone"):
+                jobs = jobs.filter(applications__worker_phone=request.query_params["worker_phone"])
+            return jobs
+
+        fields = ["id", "employer_phone", "work_type", "location", "work_date", "wage", "detail", "status", "created_at"]
+        return export_history(
+            request, narrow(Job.objects.all()), "work_date", fields, "jobs", archive=narrow(ArchivedJob.objects.all())
+        )
 
     # ✅ Employer history (completed jobs only)
     @action(detail=False, methods=["get"])
@@ -36,9 +325,8 @@ class JobViewSet(viewsets.ModelViewSet):
         if not employer_phone:
             return Response({"error": "employer_phone required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        jobs = Job.objects.filter(employer_phone=employer_phone, status="completed")
-        serializer = self.get_serializer(jobs, many=True)
-        return Response(serializer.data)
+        jobs = self.get_queryset().filter(employer_phone=employer_phone, status="completed")
+        return self.paginated_response(jobs)
 
     # ✅ Worker history (completed jobs only)
     @action(detail=False, methods=["get"])
@@ -47,20 +335,20 @@ class JobViewSet(viewsets.ModelViewSet):
         if not worker_phone:
             return Response({"error": "worker_phone required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # fetch completed applications for this worker
-        applications = JobApplication.objects.filter(
-            worker_phone__phone=worker_phone,
-            status="completed"
-        ).select_related("job")
+        # completed jobs this worker completed an application for
+        jobs = self.get_queryset().filter(
+            status="completed",
+            applications__worker_phone=worker_phone,
+            applications__status="completed",
+        )
+        return self.paginated_response(jobs)
 
-        jobs = [app.job for app in applications if app.job.status == "completed"]
-        serializer = self.get_serializer(jobs, many=True)
-        return Response(serializer.data)
 
-
-class JobApplicationViewSet(viewsets.ModelViewSet):
-    queryset = JobApplication.objects.all()
+class JobApplicationViewSet(IdempotentMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    queryset = JobApplication.objects.select_related("worker_phone", "job")
     serializer_class = JobApplicationSerializer
+    expandable = {"worker": "worker_phone"}
+    keyset_ordering = ('-applied_at', '-id')
 
 
     def get_queryset(self):
@@ -84,7 +372,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         except Job.DoesNotExist:
             return Response({"error": "Job not available"}, status=404) 
         
-        worker = Worker.objects.filter(phone=worker_phone, is_available=True).first() 
+        worker = Worker.objects.free_on(job.work_date).filter(phone=worker_phone).first() 
         
         if not worker:
             return Response({"error": "Worker not available"}, status=400) 
@@ -93,6 +381,28 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         return Response(JobApplicationSerializer(application).data)
     
 
+    # ✅ Streaming export of applications with the job fields payroll needs
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        def narrow(applications):
+            if request.query_params.get("job_id"):
+                applications = applications.filter(job_id=request.query_params["job_id"])
+            if request.query_params.get("worker_phone"):
+                applications = applications.filter(worker_phone=request.query_params["worker_phone"])
+            if request.query_params.get("employer_phone"):
+                applications = applications.filter(job__employer_phone=request.query_params["employer_phone"])
+            return applications
+
+        fields = [
+            "id", "job_id", "worker_phone", "status", "worker_accept", "employer_accept",
+            "worker_complete", "employer_complete", "applied_at", "updated_at",
+            "job__employer_phone", "job__work_type", "job__work_date", "job__wage",
+        ]
+        return export_history(
+            request, narrow(JobApplication.objects.all()), "applied_at", fields, "job-applications",
+            archive=narrow(ArchivedJobApplication.objects.all()),
+        )
+
     @action(detail=False, methods=["get"])
     def get_by_job_and_worker(self, request):
         job_id = request.query_params.get("job_id")
@@ -102,8 +412,8 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
             return Response({"error": "job_id and worker_phone required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            application = JobApplication.objects.get(job__id=job_id, worker_phone__phone=worker_phone)
-            return Response(JobApplicationSerializer(application).data, status=status.HTTP_200_OK)
+            application = self.get_queryset().get(job__id=job_id, worker_phone__phone=worker_phone)
+            return Response(self.get_serializer(application).data, status=status.HTTP_200_OK)
         except JobApplication.DoesNotExist:
             return Response({"application": None}, status=status.HTTP_200_OK)
 
@@ -111,36 +421,22 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     # Employer accepts worker → wait for worker confirmation
     @action(detail=True, methods=["post"])
     def accept(self, request, pk=None):
-        application = self.get_object()
-        application.employer_accept = True
-        application.status = "waiting_for_worker_confirmation"  # 👈 new status
-        application.save()
-
+        with transition_errors():
+            new_status = transitions.accept_application(pk)
         return Response({
             "message": "Worker selected. Waiting for worker confirmation.",
-            "status": application.status
+            "status": new_status
         })
 
 
     # Worker confirms job
     @action(detail=True, methods=["post"])
     def worker_accept(self, request, pk=None):
-        application = self.get_object()
-        application.worker_accept = True
-
-        if application.employer_accept:
-            application.status = "accepted"  # fully accepted now
-            application.worker_phone.is_available = False
-            application.worker_phone.save()
-            application.job.status = "assigned"
-            application.job.save()
-        else:
-            application.status = "pending"  # just in case employer hasn’t chosen yet
-
-        application.save()
+        with transition_errors():
+            new_status = transitions.worker_accept_application(pk)
         return Response({
             "message": "Worker confirmed job",
-            "status": application.status
+            "status": new_status
         })
 
 
@@ -148,93 +444,164 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def complete(self, request, pk=None):
         role = request.data.get("role")
-        application = self.get_object()
-
-        if role == "employer":
-            application.employer_complete = True
-        elif role == "worker":
-            application.worker_complete = True
-        else:
+        if role not in transitions.ROLES:
             return Response({"error": "Invalid role"}, status=400)
 
-        # 🔹 If both completed → mark application + job as completed
-        if application.worker_complete and application.employer_complete:
-            application.status = "completed"
-            application.worker_phone.is_available = True
-            application.worker_phone.save()
-            application.job.status = "completed"
-            application.job.save()
-
-        application.save()
-        return Response({"message": "Completion updated", "status": application.status})
+        # 🔹 If both completed → application + job are marked completed
+        with transition_errors():
+            new_status = transitions.complete_application(pk, role)
+        return Response({"message": "Completion updated", "status": new_status})
 
 
-class JobContactViewSet(viewsets.ModelViewSet):
+class JobContactViewSet(IdempotentMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = JobContact.objects.all()
     serializer_class = JobContactSerializer
-
-class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.all()
+    keyset_ordering = ('-contacted_at', '-id')
+
+    # ✅ Worker answers many broadcasts at once:
+    # {"worker_phone": ..., "responses": [{"job_id": 1, "response": "accepted"}, ...]}
+    @action(detail=False, methods=['post'])
+    def respond(self, request):
+        worker_phone = request.data.get('worker_phone')
+        responses = request.data.get('responses')
+        if not worker_phone or not isinstance(responses, list) or not responses:
+            return Response({"error": "worker_phone and responses required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(responses) > fanout.MAX_WORKERS:
+            return Response(
+                {"error": f"At most {fanout.MAX_WORKERS} responses per request"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        answers = {}
+        for item in responses:
+            job_id = item.get('job_id') if isinstance(item, dict) else None
+            if type(job_id) is not int or item.get('response') not in fanout.RESPONSES:
+                return Response(
+                    {"error": f"Each response needs an integer job_id and a response in {', '.join(fanout.RESPONSES)}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            answers[job_id] = item['response']
+
+        updated = fanout.respond(worker_phone, answers)
+        return Response({"updated": updated, "not_contacted": sorted(set(answers) - set(updated))})
+
+class BookingViewSet(IdempotentMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    queryset = Booking.objects.select_related("employer_phone", "worker_phone")
     serializer_class = BookingSerializer
+    expandable = {"employer": "employer_phone", "worker": "worker_phone"}
+    keyset_ordering = ('-created_at', '-id')
 
     def perform_create(self, serializer):
-        booking = serializer.save()
-        booking.employer_response = True
-        booking.save()
+        serializer.save(employer_response=True)
 
     @action(detail=True, methods=['post'])
     def respond(self, request, pk=None):
-        booking = self.get_object()
         role = request.data.get('role')
-        response = request.data.get('response')  # assume boolean
-        if role == 'employer':
-            booking.employer_response = response
-        elif role == 'worker':
-            booking.worker_response = response
-        else:
+        response = request.data.get('response')  # boolean
+        if role not in transitions.ROLES:
             return Response({"error": "Invalid role"}, status=status.HTTP_400_BAD_REQUEST)
-        if booking.employer_response is False or booking.worker_response is False:
-            booking.status = 'declined'
-        elif booking.employer_response and booking.worker_response:
-            booking.status = 'accepted'
-            booking.worker_phone.is_available = False
-            booking.worker_phone.save()
-        booking.save()
-        return Response({"message": "Response updated", "status": booking.status})
+        if not isinstance(response, bool):
+            return Response({"error": "response must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+        with transition_errors():
+            new_status = transitions.respond_booking(pk, role, response)
+        return Response({"message": "Response updated", "status": new_status})
 
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        booking = self.get_object()
         role = request.data.get('role')
-        if role == 'employer':
-            booking.employer_complete = True
-        elif role == 'worker':
-            booking.worker_complete = True
-        else:
+        if role not in transitions.ROLES:
             return Response({"error": "Invalid role"}, status=status.HTTP_400_BAD_REQUEST)
-        if booking.employer_complete and booking.worker_complete:
-            booking.status = 'completed'
-            booking.worker_phone.is_available = True
-            booking.worker_phone.save()
-        booking.save()
-        return Response({"message": "Completion updated", "status": booking.status})
+        with transition_errors():
+            new_status = transitions.complete_booking(pk, role)
+        return Response({"message": "Completion updated", "status": new_status})
+
+    # ✅ Streaming export of bookings (?employer_phone, ?worker_phone, ?status, ?date_from, ?date_to, ?fmt)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        def narrow(bookings):
+            if request.query_params.get('employer_phone'):
+                bookings = bookings.filter(employer_phone=request.query_params['employer_phone'])
+            if request.query_params.get('worker_phone'):
+                bookings = bookings.filter(worker_phone=request.query_params['worker_phone'])
+            return bookings
+
+        fields = [
+            'id', 'employer_phone', 'worker_phone', 'description', 'location', 'category', 'work_date', 'status',
+            'employer_response', 'worker_response', 'employer_complete', 'worker_complete', 'created_at',
+        ]
+        return export_history(
+            request, narrow(Booking.objects.all()), 'created_at', fields, 'bookings',
+            archive=narrow(ArchivedBooking.objects.all()),
+        )
 
     @action(detail=False, methods=['get'])
     def my_bookings(self, request):
         employer_phone = request.query_params.get('employer_phone')
         if not employer_phone:
             return Response({"error": "employer_phone required"}, status=status.HTTP_400_BAD_REQUEST)
-        bookings = Booking.objects.filter(employer_phone__phone=employer_phone)
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        bookings = self.get_queryset().filter(employer_phone=employer_phone)
+        return self.conditional_paginated_response(bookings, conditional.booking_state(employer_phone=employer_phone))
 
     @action(detail=False, methods=['get'])
     def worker_bookings(self, request):
         worker_phone = request.query_params.get('worker_phone')
         if not worker_phone:
             return Response({"error": "worker_phone required"}, status=status.HTTP_400_BAD_REQUEST)
-        bookings = Booking.objects.filter(worker_phone=worker_phone)
+        bookings = self.get_queryset().filter(worker_phone=worker_phone)
         # print("DEBUG: Found bookings:", bookings.count())  # Add this line
 
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+        return self.conditional_paginated_response(bookings, conditional.booking_state(worker_phone=worker_phone))
+
+
+class ReviewViewSet(IdempotentMixin, PaginatedActionMixin, mixins.CreateModelMixin, mixins.ListModelMixin,
+                    mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    # reviews are immutable: the running aggregates in api/ratings.py only ever add to them
+    queryset = Review.objects.all()
+    serializer_class = ReviewSerializer
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param in ("worker_phone", "employer_phone", "reviewer"):
+            if self.request.query_params.get(param):
+                queryset = queryset.filter(**{param: self.request.query_params[param]})
+        return queryset
+
+    # ✅ Employer reviews the worker, worker reviews the employer, once per completed application/booking
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            review = ratings.submit_review(
+                data["reviewer"],
+                data["rating"],
+                comment=data.get("comment", ""),
+                application=data.get("application"),
+                booking=data.get("booking"),
+            )
+        except ratings.ReviewError as exc:
+            return Response({"error": str(exc)}, status=exc.status)
+        return Response(self.get_serializer(review).data, status=status.HTTP_201_CREATED)
+
+
+# ✅ Detail cache hit/miss counters for this process
+@api_view(["GET"])
+def cache_stats(request):
+    return Response(cache.counters.as_dict())
+
+
+# ✅ Delta sync for offline clients: rows for ?phone= changed since ?since (the cursor of the previous sync)
+@api_view(["GET"])
+def sync_changes(request):
+    phone = request.query_params.get("phone")
+    if not phone:
+        return Response({"error": "phone required"}, status=status.HTTP_400_BAD_REQUEST)
+    since = None
+    if request.query_params.get("since"):
+        try:
+            since = sync.decode_cursor(request.query_params["since"])
+        except sync.InvalidCursor as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    payload = sync.changes(phone, since)
+    if payload is None:
+        return Response({"error": "No worker or employer with this phone"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(payload)
@@ -48,8 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'api.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,18 +78,60 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'shramo.wsgi.application'
+ASGI_APPLICATION = 'shramo.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Falls back to a local SQLite file when DATABASE_URL is unset (tests, benchmarks).
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+
+# The web process (Procfile) is gunicorn on WSGI, keeping one persistent
+# connection per worker. Serving the async views natively is opt-in:
+#
+#     DB_POOL=1 uvicorn shramo.asgi:application --workers ${WEB_CONCURRENCY:-2}
+#
+# Under ASGI each request's ORM calls run on a thread of their own, so a
+# persistent connection would be left behind per thread; DB_POOL=1 hands them
+# out from a psycopg pool instead (Postgres only), so requests neither leak
+# connections nor pay a new connection and TLS handshake each.
+DB_POOL = os.getenv("DB_POOL") == "1" and not DATABASE_URL.startswith("sqlite")
+
 DATABASES = {
-    "default": dj_database_url.config(
-        default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
-        ssl_require=True,
+    "default": dj_database_url.parse(
+        DATABASE_URL,
+        conn_max_age=0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        ssl_require=not DATABASE_URL.startswith("sqlite"),
     )
 }
+if DB_POOL:
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = True
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "shramo"),
+    }
+}
+
+# Serialized worker / employer / job detail payloads (api/cache.py). Invalidation
+# only reaches other processes through a shared backend: set CACHE_BACKEND to
+# Redis or Memcached whenever more than one web process runs.
+API_CACHE_ALIAS = "default"
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", "300"))
+
+# Idempotency-Key on POST (api/idempotency.py), kept in the idempotency_keys table. A duplicate
+# waits up to IDEMPOTENCY_WAIT_SECONDS for the first request's response before answering 409;
+# the first request's claim is renewed while it runs and lapses IDEMPOTENCY_LOCK_SECONDS after
+# its process stops renewing it.
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
 
 
 # Password validation
@@ -125,6 +168,51 @@ REST_FRAMEWORK = {
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Per-request DB / serialization / render timings (Server-Timing header + api.timing log)
+API_TIMING_ENABLED = os.getenv("API_TIMING_ENABLED", "1") == "1"
+
+# Seconds before the in-memory worker ranking index (api/matching.py) is fully
+# reloaded, which picks up writes made by other processes.
+MATCHING_INDEX_TTL = int(os.getenv("MATCHING_INDEX_TTL", "300"))
+
+# Offline pincode -> coordinates table (api/pincodes.py), built with
+# `manage.py build_pincode_table <csv>`. Lookups return nothing while it is missing.
+PINCODE_TABLE_PATH = os.getenv("PINCODE_TABLE_PATH", str(BASE_DIR / "data" / "pincodes.bin"))
+
+# Change feed (/api/events/): pub/sub broker that wakes waiting streams, see api/events.py.
+# api.events.PostgresBroker wakes streams in every process through LISTEN/NOTIFY.
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "api.events.InProcessBroker")
+EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_STREAM_SECONDS = int(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+
+# Expiry and archival (api/sweeper.py): `manage.py sweep` from cron, or every
+# SWEEP_INTERVAL_SECONDS in each web process (0 = off).
+SWEEP_INTERVAL_SECONDS = int(os.getenv("SWEEP_INTERVAL_SECONDS", "0"))
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "500"))
+# finished jobs and bookings untouched this long move to the *_archive tables
+SWEEP_ARCHIVE_AFTER_DAYS = int(os.getenv("SWEEP_ARCHIVE_AFTER_DAYS", "90"))
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", "30"))
+# also how long a delta sync cursor stays valid
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            # one line per request at INFO; API_TIMING_LOG_LEVEL=WARNING turns them off
+            'level': os.getenv("API_TIMING_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
+    },
 }
 
 